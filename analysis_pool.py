@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+"""
+Analysis Pool parses downloaded pages and matches the keywords in their visible text in worker processes, so the
+async engine keeps downloading while pages are analyzed on all CPU cores. Each worker process compiles the keyword
+matcher once when it is started. Only the parsed page and the indices of the matched keywords are returned, the
+crawl logic of each hoster stays in the crawling process.
+
+The worker processes are forked, since scan_hosters.py would be run again by processes that import the main module.
+Where fork is not available no pool is created and the pages are analyzed in the crawl thread of the async engine.
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from metrics import phase
+from page_parser import parse_page
+from keyword_matcher import KeywordMatcher
+
+_matcher = None
+_parser_backend = 'bs4'
+_anchors = False
+
+def _init_worker(keywords, parser_backend: str, anchors: bool):
+    """Compile the keyword matcher of a worker process"""
+    global _matcher, _parser_backend, _anchors
+    _matcher = KeywordMatcher(keywords)
+    _parser_backend = parser_backend
+    _anchors = anchors
+
+def analyze_page(content: bytes, content_type: str, timed: bool = False):
+    """Return (ParsedPage, indices of the matched keywords, timings or None) of a page, called in a worker process"""
+    timings = {} if timed else None
+    parsed = parse_page(content, content_type, _parser_backend, timings, _anchors)
+    with phase(timings, 'match'):
+        matched = _matcher.match(parsed.text)
+    return parsed, matched, timings
+
+def create_analysis_pool(keywords, parser_backend: str, anchors: bool, processes: int = 0):
+    """Return ProcessPoolExecutor analyzing pages in processes worker processes (one per CPU core if 0) or None if processes can't be forked"""
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    return ProcessPoolExecutor(processes or os.cpu_count() or 1, multiprocessing.get_context('fork'),
+                               initializer=_init_worker, initargs=(list(keywords), parser_backend, anchors))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+Async crawl engine that crawls many hosters at once using pooled keep-alive connections.
+
+The engine only downloads pages. Each hoster is represented by a crawl object with its hoster_url that
+decides which url is crawled next (next_url), processes downloaded pages (add_page) and documents failed
+downloads (add_error), retried requests (add_retry), throttled responses (add_throttled) and skipped responses (add_skipped), so the async engine
+and the sync loop of the Scanner in scanner.py share the same crawl logic and output files. If a RateController is specified, the parallel requests per hoster grow
+from one up to per_host while the hoster responds fast and shrink as soon as it throttles the crawler.
+
+The crawl objects and finish_hoster are only called from one crawl thread, so the event loop keeps downloading while
+pages are processed and finished hosters are stored. If an analysis pool is specified, the analysis job of each page
+(analysis_job) parses and matches it in a worker process and its result is passed to add_page. A page that can't be
+downloaded or parsed is documented as error of its url instead of stopping the crawl of all hosters, any other exception
+is a bug and stops the crawl.
+"""
+
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from circuit_breaker import is_transient, backoff_delay
+from fetcher import fetch_page_async, request_headers, SkippedResponse, ThrottledResponse, DEFAULT_MAX_PAGE_BYTES
+
+try:
+    import aiohttp
+    ASYNC_ENGINE_AVAILABLE = True
+except ImportError:
+    ASYNC_ENGINE_AVAILABLE = False
+
+async def _fetch(call, session, semaphore, crawl, url: str, max_page_bytes: int, cache, rate_controller, retries: int):
+    """Download a single page and retry transient errors with exponential backoff"""
+    attempt = 0
+    while True:
+        try:
+            return await fetch_page_async(session, url, max_page_bytes, cache, rate_controller, semaphore)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt < retries and is_transient(e):
+                await call(crawl.add_retry, url, e)
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+            else:
+                raise
+
+async def _process(call, analysis_pool, crawl, url: str, page):
+    """Analyze a downloaded page in the analysis pool if needed and add it to its crawl object"""
+    prepared = None
+    if analysis_pool is not None:
+        job = await call(crawl.analysis_job, url, page)
+        if job is not None:
+            prepared = await asyncio.get_running_loop().run_in_executor(analysis_pool, *job)
+    await call(crawl.add_page, url, page, prepared)
+
+async def _crawl_hoster(call, session, semaphore, crawl, per_host: int, max_page_bytes: int, cache, rate_controller, retries: int, analysis_pool):
+    """Download all pages of a hoster website with up to per_host parallel requests"""
+    pending = {}
+    while True:
+        # fill up the parallel requests for this hoster
+        while len(pending) < (rate_controller.concurrency(crawl.hoster_url) if rate_controller else per_host):
+            url = await call(crawl.next_url)
+            if url is None:
+                break
+            task = asyncio.ensure_future(_fetch(call, session, semaphore, crawl, url, max_page_bytes, cache, rate_controller, retries))
+            pending[task] = (url, time.monotonic())
+
+        # stop if the queue is empty and all downloads are done
+        if not pending:
+            break
+
+        done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            url, start = pending.pop(task)
+            try:
+                await _process(call, analysis_pool, crawl, url, task.result())
+            except SkippedResponse as e:
+                await call(crawl.add_skipped, url, e)
+            except ThrottledResponse as e:
+                await call(crawl.add_throttled, url, e)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                # the parsers raise ValueError for pages they can't parse
+                await call(crawl.add_error, url, e, time.monotonic() - start)
+
+async def _crawl_all(crawls, finish_hoster, concurrency: int, per_host: int, timeout: int, headers: dict, max_page_bytes: int, cache, rate_controller, retries: int, analysis_pool):
+    """Crawl all hosters with a shared connection pool limited to concurrency parallel requests"""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    crawl_thread = ThreadPoolExecutor(1, thread_name_prefix='crawl')
+
+    async def call(function, *args):
+        # crawl objects are not thread-safe, so they are only used by the crawl thread
+        return await loop.run_in_executor(crawl_thread, function, *args)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout, headers=request_headers(headers)) as session:
+        async def worker():
+            # all workers share the same iterator, so each hoster is crawled exactly once
+            while True:
+                crawl = await call(next, crawls, None)
+                if crawl is None:
+                    break
+                await _crawl_hoster(call, session, semaphore, crawl, per_host, max_page_bytes, cache, rate_controller, retries, analysis_pool)
+                await call(finish_hoster, crawl)
+
+        try:
+            await asyncio.gather(*[worker() for _ in range(concurrency)])
+        finally:
+            crawl_thread.shutdown()
+
+def crawl_hosters_async(crawls, finish_hoster, concurrency: int = 200, per_host: int = 4, timeout: int = 30, headers: dict = None,
+                        max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES, cache = None, rate_controller = None, retries: int = 0, analysis_pool = None):
+    """Crawl all hosters of the iterable crawls concurrently and call finish_hoster for each completed hoster"""
+    asyncio.run(_crawl_all(iter(crawls), finish_hoster, concurrency, per_host, timeout, headers or {}, max_page_bytes, cache, rate_controller, retries, analysis_pool))
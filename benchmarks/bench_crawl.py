@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of scan_hosters.py and collect_urls.py against the local Synthetic Server. Each script runs
+as a separate process in a temporary folder and the benchmark reports the pages per second, the CPU time per
+page, the peak memory (RSS) and the wall time of the process. The results are saved as JSON including the
+configuration and the git commit, so runs of different branches can be compared.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import shlex
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(BENCHMARKS_DIR, '..')
+sys.path.insert(0, BENCHMARKS_DIR)
+from synthetic_server import SyntheticWeb, SyntheticConfig
+
+parser = argparse.ArgumentParser(description='Benchmark scan_hosters.py and collect_urls.py against generated hoster websites.')
+parser.add_argument('--hosters', type=int, default=20, help='Number of hosters. Default is 20.')
+parser.add_argument('--pages', type=int, default=50, help='Number of pages per hoster. Default is 50.')
+parser.add_argument('--links', type=int, default=20, help='Number of links per page. Default is 20.')
+parser.add_argument('--page-bytes', type=int, default=20000, help='Size of each page in bytes. Default is 20000.')
+parser.add_argument('--keyword-density', type=float, default=0.2, help='Share of pages mentioning keywords of products.csv. Default is 0.2.')
+parser.add_argument('--latency', type=float, default=0.0, help='Seconds each response is delayed. Default is 0.')
+parser.add_argument('--error-rate', type=float, default=0.0, help='Share of pages responding with 503. Default is 0.')
+parser.add_argument('--port', type=int, default=18000, help='First port of the synthetic server. Default is 18000.')
+parser.add_argument('--max-depth', type=int, default=50, help='Maximum number of pages crawled per hoster. Default is 50.')
+parser.add_argument('--scan-args', default='', help='Additional arguments for scan_hosters.py, e.g. "--engine async --parser lxml".')
+parser.add_argument('--collect-args', default='', help='Additional arguments for collect_urls.py.')
+parser.add_argument('--skip-collect', action='store_true', help='Only benchmark scan_hosters.py')
+parser.add_argument('--label', default='', help='Name of this run in the results. Default is the git branch.')
+parser.add_argument('--output', default='benchmark_results.json', metavar='file', help='JSON file the results are appended to. Default is benchmark_results.json.')
+args = parser.parse_args()
+
+def git(*arguments):
+    """Return output of a git command in the repository or an empty string if git is not available"""
+    try:
+        return subprocess.run(['git'] + list(arguments), cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def count_lines(filename: str):
+    """Return number of non-empty lines of a file or 0 if it does not exist"""
+    if not os.path.exists(filename):
+        return 0
+    with open(filename, 'r') as file:
+        return sum(1 for line in file if line.strip())
+
+def run_script(script: str, arguments, work_dir: str):
+    """Run script as separate process and return its wall time, CPU time and peak RSS including its worker processes"""
+    command = [sys.executable, os.path.join(ROOT_DIR, script)] + arguments
+    start = time.perf_counter()
+    with open(os.path.join(work_dir, script + '.log'), 'w') as log_file:
+        process = subprocess.Popen(command, cwd=work_dir, stdout=log_file, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    wall_seconds = time.perf_counter() - start
+
+    if process.returncode != 0:
+        with open(os.path.join(work_dir, script + '.log'), 'r') as log_file:
+            print(''.join(log_file.readlines()[-10:]))
+        raise SystemExit(f'{script} failed with exit code {process.returncode}')
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss_mb = usage.ru_maxrss / (1000000 if sys.platform == 'darwin' else 1000)
+    return wall_seconds, usage.ru_utime + usage.ru_stime, peak_rss_mb
+
+def result(pages: int, wall_seconds: float, cpu_seconds: float, peak_rss_mb: float, command: str):
+    return {
+        'command': command,
+        'pages': pages,
+        'wall_seconds': round(wall_seconds, 3),
+        'pages_per_second': round(pages / wall_seconds, 1) if wall_seconds > 0 else 0,
+        'cpu_ms_per_page': round(cpu_seconds * 1000 / pages, 2) if pages > 0 else 0,
+        'cpu_seconds': round(cpu_seconds, 3),
+        'peak_rss_mb': round(peak_rss_mb, 1)
+    }
+
+def print_result(name: str, values: dict):
+    print(name + ':', values['command'])
+    print('{:>10,}'.format(values['pages']), 'pages crawled')
+    print('{:>10,.1f}'.format(values['pages_per_second']), 'pages per second')
+    print('{:>10,.2f}'.format(values['cpu_ms_per_page']), 'ms CPU time per page')
+    print('{:>10,.1f}'.format(values['peak_rss_mb']), 'MB peak RSS')
+    print('{:>10,.2f}'.format(values['wall_seconds']), 'seconds wall time')
+    print()
+
+config = SyntheticConfig(args.hosters, args.pages, args.links, args.page_bytes, args.keyword_density, args.latency, args.error_rate, args.port)
+web = SyntheticWeb(config)
+web.start()
+work_dir = tempfile.mkdtemp(prefix='hoster-scan-bench-')
+results = {}
+
+try:
+    # prepare the input files of both scripts in the temporary folder
+    os.makedirs(os.path.join(work_dir, 'input'))
+    for filename in ('products.csv', 'blocked_url_endings.txt'):
+        shutil.copy(os.path.join(ROOT_DIR, 'input', filename), os.path.join(work_dir, 'input', filename))
+    with open(os.path.join(work_dir, 'input', 'hosters_to_be_crawled.csv'), 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['URL', 'CompanyName', 'HosterID'])
+        writer.writerows(web.hosters())
+    with open(os.path.join(work_dir, 'input', 'listing_sites.txt'), 'w') as file:
+        file.write(web.listing_url() + '\n')
+
+    arguments = ['--reset', '--max-depth', str(args.max_depth)] + shlex.split(args.scan_args)
+    wall_seconds, cpu_seconds, peak_rss_mb = run_script('scan_hosters.py', arguments, work_dir)
+    pages = count_lines(os.path.join(work_dir, 'output', 'urls_crawled.txt'))
+    results['scan_hosters'] = result(pages, wall_seconds, cpu_seconds, peak_rss_mb, ' '.join(['scan_hosters.py'] + arguments))
+    print_result('scan_hosters.py', results['scan_hosters'])
+
+    if not args.skip_collect:
+        # the listing site has one page per 50 hosters
+        arguments = ['--reset', '--max-depth', str(args.hosters // 50 + 1)] + shlex.split(args.collect_args)
+        wall_seconds, cpu_seconds, peak_rss_mb = run_script('collect_urls.py', arguments, work_dir)
+        pages = count_lines(os.path.join(work_dir, 'output', 'listing_site_urls_crawled.txt'))
+        results['collect_urls'] = result(pages, wall_seconds, cpu_seconds, peak_rss_mb, ' '.join(['collect_urls.py'] + arguments))
+        results['collect_urls']['hoster_urls_found'] = count_lines(os.path.join(work_dir, 'output', 'possible_hoster_urls_found.txt'))
+        print_result('collect_urls.py', results['collect_urls'])
+finally:
+    web.stop()
+    shutil.rmtree(work_dir)
+
+# append this run to the results file, so runs of several branches can be compared
+run = {
+    'label': args.label or git('rev-parse', '--abbrev-ref', 'HEAD'),
+    'commit': git('rev-parse', '--short', 'HEAD'),
+    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    'python': sys.version.split()[0],
+    'config': dict(config.as_dict(), max_depth=args.max_depth),
+    'results': results
+}
+runs = []
+if os.path.exists(args.output):
+    with open(args.output, 'r') as file:
+        runs = json.load(file)
+runs.append(run)
+with open(args.output, 'w') as file:
+    json.dump(runs, file, indent=2)
+
+print('Results saved to', args.output)
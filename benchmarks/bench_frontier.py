@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Micro benchmark of the crawl frontier and the crawled urls: the former list based queue with linear
+membership checks compared to the Frontier (deque plus set) and a set of crawled urls.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from frontier import Frontier
+
+parser = argparse.ArgumentParser(description='Benchmark crawl frontier and crawled url lookups.')
+parser.add_argument('--pages', type=int, default=50, help='Number of pages crawled per hoster. Default is 50.')
+parser.add_argument('--links', nargs='+', type=int, default=[50, 200, 500, 1000], help='Number of links per page to benchmark.')
+parser.add_argument('--urls', nargs='+', type=int, default=[10000, 100000, 1000000], help='Number of crawled urls per run to benchmark.')
+parser.add_argument('--lookups', type=int, default=1000, help='Number of lookups in the crawled urls. Default is 1000.')
+args = parser.parse_args()
+
+def generate_pages(pages: int, links: int, rnd):
+    """Return list of pages, each with a list of links to other pages of the same website"""
+    num_urls = pages * links // 4
+    return [['https://hoster.com/page' + str(rnd.randrange(num_urls)) for _ in range(links)] for _ in range(pages)]
+
+def crawl_with_list(pages):
+    """Former implementation: list as queue with pop(0) and 'in' checks on queue and visited"""
+    queue = ['https://hoster.com']
+    visited = set()
+    page = 0
+    while queue and len(visited) < len(pages):
+        url = queue.pop(0)
+        if url not in visited:
+            visited.add(url)
+            for link_url in pages[page]:
+                if link_url not in visited and link_url not in queue:
+                    queue.append(link_url)
+            page += 1
+    return visited
+
+def crawl_with_frontier(pages):
+    """Current implementation: Frontier with constant time push, pop and membership check"""
+    frontier = Frontier(['https://hoster.com'])
+    visited = set()
+    page = 0
+    while frontier and len(visited) < len(pages):
+        url = frontier.pop()
+        if url not in visited:
+            visited.add(url)
+            for link_url in pages[page]:
+                if link_url not in frontier:
+                    frontier.push(link_url)
+            page += 1
+    return visited
+
+def measure(function, *arguments):
+    """Return milliseconds needed to execute function"""
+    start = time.perf_counter()
+    function(*arguments)
+    return (time.perf_counter() - start) * 1000
+
+rnd = random.Random(42)
+
+print('Frontier maintenance per hoster ({} pages)'.format(args.pages))
+print('{:>12} {:>12} {:>14} {:>9}'.format('Links/page', 'List ms', 'Frontier ms', 'Speedup'))
+for links in args.links:
+    pages = generate_pages(args.pages, links, rnd)
+    assert crawl_with_list(pages) == crawl_with_frontier(pages)
+    list_ms = measure(crawl_with_list, pages)
+    frontier_ms = measure(crawl_with_frontier, pages)
+    print('{:>12,} {:>12.1f} {:>14.1f} {:>8.0f}x'.format(links, list_ms, frontier_ms, list_ms / frontier_ms))
+
+print()
+print('Crawled url lookups per run ({:,} lookups)'.format(args.lookups))
+print('{:>12} {:>12} {:>14} {:>9}'.format('URLs/run', 'List ms', 'Set ms', 'Speedup'))
+for num_urls in args.urls:
+    urls_crawled = ['https://hoster' + str(i) + '.com/page' + str(i % 50) for i in range(num_urls)]
+    urls_crawled_set = set(urls_crawled)
+    lookups = ['https://hoster' + str(rnd.randrange(num_urls * 2)) + '.com/page1' for _ in range(args.lookups)]
+    list_ms = measure(lambda: [url in urls_crawled for url in lookups])
+    set_ms = measure(lambda: [url in urls_crawled_set for url in lookups])
+    print('{:>12,} {:>12.1f} {:>14.3f} {:>8.0f}x'.format(num_urls, list_ms, set_ms, list_ms / set_ms))
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the crawl order within the max-depth budget: the BFS frontier compared to the priority frontier
+seeded from the sitemap. The real Scanner crawls generated hoster websites through an in-memory fetcher, so only
+the order of the pages matters. Like many real websites, the navigation lists news, press, partner and support pages
+before the products, and some product pages are only linked from deep support pages and the sitemap.
+
+For each budget the benchmark reports the pages fetched (including sitemaps), the distinct keywords found per hoster,
+their share of all keywords a crawl of every page finds, the keywords per 100 pages fetched and the share of hosters
+whose keywords were all found.
+"""
+
+import os
+import sys
+import csv
+import random
+import argparse
+import tempfile
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+from fetcher import Page
+from scanner import Scanner, ScanOptions
+
+parser = argparse.ArgumentParser(description='Benchmark keywords found per page fetched of the BFS and the priority frontier.')
+parser.add_argument('--hosters', type=int, default=30, help='Number of generated hoster websites. Default is 30.')
+parser.add_argument('--budgets', nargs='+', type=int, default=[10, 20, 30, 50], help='Values of --max-depth to benchmark.')
+parser.add_argument('--news', type=int, default=40, help='Number of news and press pages per hoster. Default is 40.')
+parser.add_argument('--products', type=int, default=12, help='Number of product pages per hoster. Default is 12.')
+parser.add_argument('--no-sitemap', action='store_true', help='Generate websites without sitemap.xml')
+parser.add_argument('--seed', type=int, default=42, help='Seed of the generated websites. Default is 42.')
+args = parser.parse_args()
+
+PRODUCTS_CSV = os.path.join(ROOT_DIR, 'input', 'products.csv')
+FILLER_WORDS = ('lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do', 'eiusmod',
+                'tempor', 'incididunt', 'ut', 'labore', 'et', 'dolore', 'magna', 'aliqua', 'enim', 'minim', 'veniam')
+
+def load_product_names():
+    """Return the official product names of products.csv"""
+    with open(PRODUCTS_CSV, 'r') as file:
+        return [row[0].strip() for row in csv.reader(file) if row and row[0].strip()]
+
+def filler(rnd, words: int = 60):
+    return ' '.join(rnd.choice(FILLER_WORDS) for _ in range(words))
+
+def html(title: str, text: str, links):
+    """Return HTML page with a text and (url, anchor text) links"""
+    anchors = ''.join('<li><a href="{}">{}</a></li>'.format(url, anchor_text) for url, anchor_text in links)
+    return '<html><head><title>{}</title></head><body><nav><ul>{}</ul></nav><p>{}</p></body></html>'.format(title, anchors, text).encode('utf-8')
+
+def generate_website(base: str, product_names, rnd):
+    """Return dictionary of url to content of a hoster website with a sitemap listing all pages"""
+    pages = {}
+    offered = rnd.sample(product_names, 3 * (args.products + 3))
+    news = [base + '/news/article-' + str(i) for i in range(args.news // 2)]
+    press = [base + '/press/release-' + str(i) for i in range(args.news // 2)]
+    partners = [base + '/partner/reseller-program-' + str(i) for i in range(5)]
+    events = [base + '/events/meetup-' + str(i) for i in range(5)]
+    support = [base + '/support/faq-' + str(i) for i in range(10)]
+    slugs = [name.lower().replace(' ', '-') for name in offered[:args.products + 3]]
+    product_pages = [base + '/products/' + slug for slug in slugs[:args.products]]
+    # the last product pages are only linked from deep support pages and listed in the sitemap
+    hidden_pages = [base + '/solutions/' + slug for slug in slugs[args.products:]]
+    navigation = [(base + '/news', 'News'), (base + '/press', 'Press'), (base + '/partner', 'Partner'), (base + '/events', 'Events'),
+                  (base + '/support', 'Support'), (base + '/products', 'Products'), (base + '/pricing', 'Pricing')]
+
+    pages[base] = html('Home', filler(rnd) + ' ' + offered[0], navigation)
+    for index, urls, anchor_text in ((base + '/news', news, 'Read more'), (base + '/press', press, 'Read more'), (base + '/partner', partners, 'Learn more'),
+                                     (base + '/events', events, 'Details'), (base + '/support', support, 'Question')):
+        pages[index] = html(anchor_text, filler(rnd), navigation + [(url, anchor_text) for url in urls])
+        for url in urls:
+            # filler pages rarely mention a product that also has its own page
+            text = filler(rnd) + (' ' + rnd.choice(offered[:args.products]) if rnd.random() < 0.1 else '')
+            pages[url] = html(anchor_text, text, navigation + [(rnd.choice(urls), anchor_text) for _ in range(3)])
+    for i, url in enumerate(support[-len(hidden_pages):]):
+        pages[url] = html('Question', filler(rnd), navigation + [(hidden_pages[i], 'Solution')])
+
+    pages[base + '/products'] = html('Products', filler(rnd), navigation + [(url, name) for url, name in zip(product_pages, offered)])
+    pages[base + '/pricing'] = html('Pricing', filler(rnd) + ' ' + ', '.join(offered[:3]), navigation)
+    # each product page also mentions two features that are not mentioned anywhere else
+    for i, url in enumerate(product_pages + hidden_pages):
+        features = offered[len(slugs) + 2 * i:len(slugs) + 2 * i + 2]
+        pages[url] = html(offered[i], filler(rnd) + ' ' + offered[i] + ' ' + filler(rnd, 20) + ' ' + ' and '.join(features), navigation + [(base + '/products', 'Products')])
+
+    if not args.no_sitemap:
+        urls = sorted(pages, key=lambda url: (not url.startswith((base + '/news', base + '/press')), url))
+        pages[base + '/sitemap.xml'] = ('<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                                        + ''.join('<url><loc>{}</loc></url>'.format(url) for url in urls) + '</urlset>').encode('utf-8')
+    return pages
+
+class InMemoryFetcher:
+    """Fetcher of the Scanner that returns the generated pages and counts the requests"""
+
+    def __init__(self, pages: dict):
+        self.pages = pages
+        self.requests = 0
+
+    def __call__(self, session, url: str, timeout: int, max_page_bytes: int, cache = None, rate_controller = None):
+        import requests
+
+        self.requests += 1
+        content = self.pages.get(url.rstrip('/'))
+        if content is None:
+            raise requests.exceptions.HTTPError('404 Not Found: ' + url)
+        content_type = 'application/xml' if url.endswith('.xml') else 'text/html; charset=utf-8'
+        return Page(url, 200, { 'Content-Type': content_type }, content, False, False, {})
+
+def scan(pages: dict, hosters_csv: str, work_dir: str, frontier: str, max_depth: int):
+    """Return number of requests and set of (hoster, keyword) found by a scan with the specified frontier"""
+    output_dir = os.path.join(work_dir, frontier + '-' + str(max_depth))
+    fetcher = InMemoryFetcher(pages)
+    scanner = Scanner(ScanOptions(max_depth=max_depth, frontier=frontier, reset=True, hosters=hosters_csv, products=PRODUCTS_CSV,
+                                  output_dir=output_dir, max_crawl_delay=0, retries=0, max_failures=0), fetcher=fetcher)
+    scanner.load()
+    scanner.open_state()
+    try:
+        scanner.crawl()
+    finally:
+        scanner.close()
+
+    found = set()
+    if os.path.exists(scanner.hosters_with_keywords_csv):
+        with open(scanner.hosters_with_keywords_csv, 'r') as file:
+            for row in csv.reader(file):
+                found.update((row[0], keyword) for keyword in row[3:])
+    return fetcher.requests, found
+
+rnd = random.Random(args.seed)
+product_names = load_product_names()
+pages = {}
+hosters = []
+for i in range(args.hosters):
+    base = 'https://hoster{}.example'.format(i)
+    pages.update(generate_website(base, product_names, rnd))
+    hosters.append([base, 'Hoster ' + str(i), 'hoster' + str(i)])
+
+with tempfile.TemporaryDirectory() as work_dir:
+    os.chdir(work_dir)
+    hosters_csv = os.path.join(work_dir, 'hosters.csv')
+    with open(hosters_csv, 'w', newline='') as file:
+        csv.writer(file).writerows(hosters)
+
+    # a crawl of all pages finds every keyword
+    _, all_keywords = scan(pages, hosters_csv, work_dir, 'bfs', len(pages))
+    keywords_per_hoster = {}
+    for hoster_url, keyword in all_keywords:
+        keywords_per_hoster.setdefault(hoster_url, set()).add(keyword)
+
+    print('{:,} hosters, {:,} pages, {:,} keywords in total{}'.format(args.hosters, len(pages), len(all_keywords), ', no sitemaps' if args.no_sitemap else ''))
+    print('{:>10} {:>10} {:>10} {:>10} {:>11} {:>14} {:>12}'.format('Max-depth', 'Frontier', 'Requests', 'Keywords', 'Found %', 'Keywords/100', 'Complete %'))
+    for max_depth in args.budgets:
+        for frontier in ('bfs', 'priority'):
+            requests, found = scan(pages, hosters_csv, work_dir, frontier, max_depth)
+            complete = sum(1 for hoster_url, keywords in keywords_per_hoster.items() if all((hoster_url, keyword) in found for keyword in keywords))
+            print('{:>10,} {:>10} {:>10,} {:>10,} {:>10.1f}% {:>14.1f} {:>11.1f}%'.format(max_depth, frontier, requests, len(found), 100 * len(found) / max(1, len(all_keywords)),
+                                                                                           100 * len(found) / max(1, requests), 100 * complete / max(1, len(keywords_per_hoster))))
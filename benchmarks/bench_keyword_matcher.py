@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the keyword matching per page: the former loop searching the page text once for each keyword
+compared to the compiled KeywordMatcher backends. The keywords from products.csv are extended by generated
+search terms to show the throughput in MB/s when the list of products grows to thousands of terms.
+"""
+
+import os
+import sys
+import csv
+import time
+import random
+import string
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from keyword_matcher import KeywordMatcher, ahocorasick
+
+PRODUCTS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'input', 'products.csv')
+
+parser = argparse.ArgumentParser(description='Benchmark keyword matching throughput.')
+parser.add_argument('--page-size', type=int, default=100000, help='Size of the generated page text in characters. Default is 100000.')
+parser.add_argument('--pages', type=int, default=20, help='Number of pages to match per measurement. Default is 20.')
+parser.add_argument('--sizes', nargs='+', type=int, default=[0, 1000, 2000, 5000], help='Number of keywords to benchmark, 0 for products.csv only.')
+args = parser.parse_args()
+
+def load_keywords():
+    """Return all keywords of products.csv in the same order as scan_hosters.py"""
+    keywords = []
+    with open(PRODUCTS_CSV, 'r') as csvfile:
+        for row in csv.reader(csvfile):
+            for keyword in row:
+                if keyword and keyword not in keywords:
+                    keywords.append(keyword)
+    return keywords
+
+def generate_keywords(keywords, size: int, rnd):
+    """Extend list of keywords with generated product names up to the specified size"""
+    keywords = list(keywords)
+    while len(keywords) < size:
+        name = ''.join(rnd.choice(string.ascii_letters) for _ in range(rnd.randint(4, 12)))
+        if rnd.random() < 0.3:
+            name += ' ' + rnd.choice(('Cloud', 'Backup', 'Hosting', 'Server', 'Pro'))
+        if name not in keywords:
+            keywords.append(name)
+    return keywords
+
+def generate_page(keywords, size: int, rnd):
+    """Return page text of the specified size with random words and a few keywords"""
+    words = []
+    length = 0
+    while length < size:
+        word = rnd.choice(keywords) if rnd.random() < 0.01 else ''.join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(2, 10)))
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)[:size]
+
+def loop_match(keywords, text: str):
+    """Former implementation searching the text once per keyword"""
+    text = text.lower()
+    return [j for j, keyword in enumerate(keywords) if keyword.lower() in text]
+
+def measure(function, pages):
+    """Return throughput in MB/s of function over all pages"""
+    start = time.perf_counter()
+    for page in pages:
+        function(page)
+    seconds = time.perf_counter() - start
+    return sum(len(page.encode('utf-8')) for page in pages) / seconds / 1000000
+
+rnd = random.Random(42)
+product_keywords = load_keywords()
+backends = ['re'] + (['ahocorasick'] if ahocorasick is not None else [])
+
+print('{:>8} {:>12} '.format('Keywords', 'Loop MB/s') + ' '.join('{:>16}'.format(backend + ' MB/s') for backend in backends) + ' {:>12}'.format('Compile ms'))
+for size in args.sizes:
+    keywords = generate_keywords(product_keywords, size, rnd)
+    pages = [generate_page(keywords, args.page_size, rnd) for _ in range(args.pages)]
+
+    start = time.perf_counter()
+    matchers = [KeywordMatcher(keywords, backend) for backend in backends]
+    compile_ms = (time.perf_counter() - start) * 1000 / len(matchers)
+
+    # make sure all implementations find the same keywords before measuring them
+    for matcher in matchers:
+        assert matcher.match(pages[0]) == loop_match(keywords, pages[0])
+
+    line = '{:>8,} {:>12.2f} '.format(len(keywords), measure(lambda page: loop_match(keywords, page), pages))
+    line += ' '.join('{:>16.2f}'.format(measure(matcher.match, pages)) for matcher in matchers)
+    print(line + ' {:>12.1f}'.format(compile_ms))
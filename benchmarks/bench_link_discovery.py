@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Micro benchmark of the discovery of possible hoster urls in collect_urls.py: the former check of each link against
+all listing sites with any() and a set of url strings compared to the set of listing site domains with the
+FingerprintSet and with the Bloom filter. The time per link should stay about the same up to millions of urls.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from listing_collector import ListingCollector, CollectOptions, listing_site_domains
+from fingerprints import FingerprintSet, BloomFilter
+
+parser = argparse.ArgumentParser(description='Benchmark the discovery of possible hoster urls on listing sites.')
+parser.add_argument('--urls', nargs='+', type=int, default=[10000, 100000, 1000000, 3000000], help='Number of different urls found to benchmark.')
+parser.add_argument('--listing-sites', type=int, default=500, help='Number of listing sites. Default is 500.')
+parser.add_argument('--repeats', type=float, default=3.0, help='Average number of links to each url. Default is 3.')
+parser.add_argument('--former-max', type=int, default=100000, help='Maximum number of urls benchmarked with the former implementation, which is much slower. Default is 100000.')
+args = parser.parse_args()
+
+def generate_links(num_urls: int, listing_sites, rnd):
+    """Return (base url, domain) links to num_urls hosters in random order with repeats and links to listing sites"""
+    links = []
+    for i in range(int(num_urls * args.repeats)):
+        if i % 50 == 0:
+            link_domain = 'www.' + listing_sites[rnd.randrange(len(listing_sites))][8:]
+        else:
+            link_domain = 'hoster{}.com'.format(rnd.randrange(num_urls))
+        links.append(('https://' + link_domain, link_domain))
+    return links
+
+def discover_former(links, listing_sites):
+    """Former implementation: set of url strings and any() over all listing sites for each new link"""
+    possible_hoster_urls = set()
+    new_urls = []
+    for link_base_url, link_domain in links:
+        if link_base_url not in possible_hoster_urls \
+            and (not any(link_domain in start_url for start_url in listing_sites)):
+            possible_hoster_urls.add(link_base_url)
+            new_urls.append(link_base_url)
+    return possible_hoster_urls, new_urls
+
+def discover_collector(links, listing_sites, bloom_filter: int):
+    """Current implementation: ListingCollector.discover with the set of listing site domains"""
+    collector = ListingCollector(CollectOptions(bloom_filter=bloom_filter))
+    collector.listing_sites = listing_sites
+    collector.listing_site_domains = listing_site_domains(listing_sites)
+    new_urls = collector.discover(links)
+    return collector.possible_hoster_urls, new_urls
+
+def size_of(urls):
+    """Return MB needed for the found urls in a set of strings, a FingerprintSet or a BloomFilter"""
+    if isinstance(urls, BloomFilter):
+        return sys.getsizeof(urls.bits) / 1000000
+    if isinstance(urls, FingerprintSet):
+        return urls.nbytes / 1000000
+    return (sys.getsizeof(urls) + sum(sys.getsizeof(url) for url in urls)) / 1000000
+
+def measure(function, *arguments):
+    """Return nanoseconds per link and MB of the found urls of function"""
+    start = time.perf_counter()
+    urls, _ = function(*arguments)
+    return (time.perf_counter() - start) * 1e9 / len(arguments[0]), size_of(urls)
+
+rnd = random.Random(42)
+listing_sites = ['https://hosting-directory{}.com/hosters'.format(i) for i in range(args.listing_sites)]
+
+print('Discovery of possible hoster urls ({:,} listing sites, {:.1f} links per url)'.format(args.listing_sites, args.repeats))
+print('{:>10} {:>12} {:>11} {:>11} {:>11} {:>11} {:>11} {:>10}'.format(
+    'URLs', 'Former ns', 'Former MB', 'Hashed ns', 'Hashed MB', 'Bloom ns', 'Bloom MB', 'Bloom lost'))
+for num_urls in args.urls:
+    links = generate_links(num_urls, listing_sites, rnd)
+    hashed_urls = discover_collector(links, listing_sites, 0)[1]
+    bloom_urls = discover_collector(links, listing_sites, num_urls)[1]
+
+    if num_urls <= args.former_max:
+        assert discover_former(links, listing_sites)[1] == hashed_urls
+        former = '{:>12,.0f} {:>11,.1f}'.format(*measure(discover_former, links, listing_sites))
+    else:
+        former = '{:>12} {:>11}'.format('-', '-')
+
+    hashed = measure(discover_collector, links, listing_sites, 0)
+    bloom = measure(discover_collector, links, listing_sites, num_urls)
+    print('{:>10,} {} {:>11,.0f} {:>11,.1f} {:>11,.0f} {:>11,.1f} {:>10.2%}'.format(
+        num_urls, former, hashed[0], hashed[1], bloom[0], bloom[1], 1 - len(bloom_urls) / len(hashed_urls)))
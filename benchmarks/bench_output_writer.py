@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark of appending the results of finished hosters to the output files: opening and closing each file for every
+hoster with write_list_to_file and write_csv_to_file compared to the OutputWriter with several flush intervals and
+fsync settings. Several threads finish hosters at the same time like the threads of collect_urls.py.
+
+The benchmark reports the milliseconds the threads spend per hoster, the seconds until all files are written and
+closed, the opened files or write calls and the fsyncs, and checks that every variant writes the same lines.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+from functions import write_list_to_file, write_csv_to_file
+from output_writer import OutputWriter
+
+parser = argparse.ArgumentParser(description='Benchmark per-hoster file appends against the background OutputWriter.')
+parser.add_argument('--hosters', type=int, default=5000, help='Number of finished hosters. Default is 5000.')
+parser.add_argument('--pages', type=int, default=30, help='Number of crawled urls per hoster. Default is 30.')
+parser.add_argument('--threads', type=int, default=4, help='Number of threads finishing hosters at the same time. Default is 4.')
+parser.add_argument('--fsync-every', type=int, default=100, help='Records between two fsyncs of the durable variant. Default is 100.')
+args = parser.parse_args()
+
+FILES = ('urls_crawled.txt', 'urls_with_errors.txt', 'crawling_errors.log', 'hosters_with_keywords.csv', 'urls_crawled_with_keywords.csv')
+
+def hoster_results(i: int):
+    """Return crawled urls, urls with errors, errors, keywords row and urls with keywords of a generated hoster"""
+    base = 'https://hoster{}.example'.format(i)
+    urls = [base + '/page-' + str(j) for j in range(args.pages)]
+    errors = urls[-2:] if i % 10 == 0 else []
+    return (urls, errors, ['Error downloading page {} from Hoster {}: 404 Not Found'.format(url, i) for url in errors],
+            [base, 'Hoster ' + str(i), str(i), 'WordPress', 'Plesk'], [url + ',Hoster {},WordPress'.format(i) for url in urls[:5]])
+
+def finish_direct(output_dir: str, results, lock):
+    urls, errors, error_lines, row, url_keywords = results
+    paths = [os.path.join(output_dir, name) for name in FILES]
+    # like the crawl loop before, the appends of a hoster are serialized by the caller
+    with lock:
+        write_list_to_file(paths[0], 'a+', urls)
+        write_list_to_file(paths[1], 'a+', errors)
+        if error_lines:
+            write_list_to_file(paths[2], 'a+', error_lines)
+        write_csv_to_file(paths[3], 'a+', row)
+        write_list_to_file(paths[4], 'a+', url_keywords)
+
+def finish_writer(output_dir: str, results, writer):
+    urls, errors, error_lines, row, url_keywords = results
+    paths = [os.path.join(output_dir, name) for name in FILES]
+    writer.write_lines(paths[0], urls)
+    writer.write_lines(paths[1], errors)
+    writer.write_lines(paths[2], error_lines)
+    writer.write_row(paths[3], row)
+    writer.write_lines(paths[4], url_keywords)
+
+def run(output_dir: str, finish, target):
+    """Return seconds spent finishing hosters in the threads and seconds until all files are written"""
+    os.makedirs(output_dir)
+    results = [hoster_results(i) for i in range(args.hosters)]
+    busy = []
+
+    def worker(k: int):
+        start = time.perf_counter()
+        for i in range(k, len(results), args.threads):
+            finish(output_dir, results[i], target)
+        busy.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if isinstance(target, OutputWriter):
+        target.close()
+    return sum(busy), time.perf_counter() - start
+
+def file_lines(output_dir: str):
+    """Return the sorted lines of all output files"""
+    lines = []
+    for name in FILES:
+        path = os.path.join(output_dir, name)
+        if os.path.exists(path):
+            with open(path, 'r', newline='') as file:
+                lines += sorted(name + ':' + line for line in file)
+    return lines
+
+with tempfile.TemporaryDirectory() as work_dir:
+    variants = (('open per hoster', finish_direct, lambda: threading.Lock()),
+                ('writer 0s', finish_writer, lambda: OutputWriter(0)),
+                ('writer 1s', finish_writer, lambda: OutputWriter(1)),
+                ('writer 0s fsync', finish_writer, lambda: OutputWriter(0, args.fsync_every)),
+                ('writer 1s fsync', finish_writer, lambda: OutputWriter(1, args.fsync_every)))
+
+    print('{:,} hosters with {} urls each, {} threads'.format(args.hosters, args.pages, args.threads))
+    print('{:>16} {:>11} {:>9} {:>8} {:>7} {:>6}'.format('Variant', 'ms/hoster', 'Seconds', 'Writes', 'Fsyncs', 'Same'))
+    expected = None
+    for i, (label, finish, create) in enumerate(variants):
+        output_dir = os.path.join(work_dir, str(i))
+        target = create()
+        busy, seconds = run(output_dir, finish, target)
+        lines = file_lines(output_dir)
+        expected = expected if expected is not None else lines
+        # every hoster opens four files and the crawling errors log if it has errors
+        writes = target.num_writes if isinstance(target, OutputWriter) else 4 * args.hosters + len(range(0, args.hosters, 10))
+        fsyncs = target.num_fsyncs if isinstance(target, OutputWriter) else 0
+        print('{:>16} {:>11.3f} {:>9.2f} {:>8,} {:>7,} {:>6}'.format(label, 1000 * busy / args.hosters, seconds, writes, fsyncs, 'yes' if lines == expected else 'NO'))
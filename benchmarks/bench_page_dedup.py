@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the page deduplication of the Scanner on generated reseller websites: every hoster serves its pages in
+several languages under /en, /de, /fr, ... with a slightly different text and a white-label shop template whose pages
+are byte-identical across all hosters, while its own product pages only differ from each other by their headline.
+The real Scanner crawls them through an in-memory fetcher without, with the content memo and with "--dedup" and the
+benchmark reports the pages parsed, the duplicate rates, the keywords found and the seconds needed.
+"""
+
+import os
+import sys
+import csv
+import time
+import random
+import argparse
+import tempfile
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+from fetcher import Page
+from scanner import Scanner, ScanOptions
+
+parser = argparse.ArgumentParser(description='Benchmark the content memo and --dedup on generated reseller websites.')
+parser.add_argument('--hosters', type=int, default=30, help='Number of generated hoster websites. Default is 30.')
+parser.add_argument('--languages', type=int, default=4, help='Number of language variants of each page. Default is 4.')
+parser.add_argument('--template-pages', type=int, default=8, help='Number of white-label template pages of each hoster. Default is 8.')
+parser.add_argument('--max-depth', type=int, default=50, help='Maximum number of pages crawled per hoster. Default is 50.')
+parser.add_argument('--parser', default='bs4', help='Parser backend of the Scanner. Default is bs4.')
+parser.add_argument('--seed', type=int, default=42, help='Seed of the generated websites. Default is 42.')
+args = parser.parse_args()
+
+PRODUCTS_CSV = os.path.join(ROOT_DIR, 'input', 'products.csv')
+LANGUAGES = ('en', 'de', 'fr', 'es', 'it', 'nl', 'pl', 'pt')
+
+def load_product_names():
+    """Return the official product names of products.csv"""
+    with open(PRODUCTS_CSV, 'r') as file:
+        return [row[0].strip() for row in csv.reader(file) if row and row[0].strip()]
+
+def html(title: str, text: str, links):
+    """Return HTML page with a text and (url, anchor text) links"""
+    anchors = ''.join('<li><a href="{}">{}</a></li>'.format(url, anchor_text) for url, anchor_text in links)
+    return '<html><head><title>{}</title></head><body><nav><ul>{}</ul></nav><h1>{}</h1><p>{}</p></body></html>'.format(title, anchors, title, text).encode('utf-8')
+
+def generate_text(rnd, words: int = 400):
+    return ' '.join('word{}'.format(rnd.randrange(2000)) for _ in range(words))
+
+def generate_websites(product_names, rnd):
+    """Return dictionary of url to content and the list of hosters of all generated websites"""
+    pages = {}
+    hosters = []
+
+    # the shop template links relatively, so its pages are the same for all resellers
+    template_text = generate_text(rnd) + ' ' + ' '.join(product_names[:5])
+    template_pages = [html('Shop ' + str(i), template_text, [('cart.php?a=add&pid=' + str(j), 'Order') for j in range(20)]) for i in range(args.template_pages)]
+
+    for i in range(args.hosters):
+        base = 'https://reseller{}.example'.format(i)
+        hosters.append([base, 'Reseller ' + str(i), 'reseller' + str(i)])
+        offered = rnd.sample(product_names, 10)
+        product_text = generate_text(rnd)
+        languages = LANGUAGES[:args.languages]
+        product_urls = ['/products/' + name.lower().replace(' ', '-') for name in offered]
+        shop_urls = ['/shop/page-' + str(j) for j in range(args.template_pages)]
+        links = [(base + '/' + language + path, path) for path in product_urls for language in languages] + [(base + path, 'Shop') for path in shop_urls]
+
+        pages[base] = html('Reseller ' + str(i), generate_text(rnd, 100), links)
+        for language in languages:
+            for name, path in zip(offered, product_urls):
+                # product pages share the text of the hoster and only differ by their headline, product and language
+                pages[base + '/' + language + path] = html(name, product_text + ' ' + name + ' lang' + language, links)
+        for j, path in enumerate(shop_urls):
+            pages[base + path] = template_pages[j]
+    return pages, hosters
+
+class InMemoryFetcher:
+    """Fetcher of the Scanner that returns the generated pages and counts the requests"""
+
+    def __init__(self, pages: dict):
+        self.pages = pages
+        self.requests = 0
+
+    def __call__(self, session, url: str, timeout: int, max_page_bytes: int, cache = None, rate_controller = None):
+        import requests
+
+        self.requests += 1
+        content = self.pages.get(url.rstrip('/'))
+        if content is None:
+            raise requests.exceptions.HTTPError('404 Not Found: ' + url)
+        return Page(url, 200, { 'Content-Type': 'text/html; charset=utf-8' }, content, False, False, {})
+
+def scan(pages: dict, hosters_csv: str, work_dir: str, label: str, **options):
+    """Return requests, seconds, run counters and number of (hoster, keyword) found by a scan with the specified options"""
+    fetcher = InMemoryFetcher(pages)
+    scanner = Scanner(ScanOptions(max_depth=args.max_depth, reset=True, hosters=hosters_csv, products=PRODUCTS_CSV, parser=args.parser,
+                                  output_dir=os.path.join(work_dir, label), max_crawl_delay=0, retries=0, **options), fetcher=fetcher)
+    scanner.load()
+    scanner.open_state()
+    start = time.perf_counter()
+    try:
+        scanner.crawl()
+    finally:
+        scanner.close()
+    seconds = time.perf_counter() - start
+
+    num_keywords = 0
+    if os.path.exists(scanner.hosters_with_keywords_csv):
+        with open(scanner.hosters_with_keywords_csv, 'r') as file:
+            num_keywords = sum(len(row) - 3 for row in csv.reader(file))
+    return fetcher.requests, seconds, scanner.run_counters, num_keywords
+
+rnd = random.Random(args.seed)
+pages, hosters = generate_websites(load_product_names(), rnd)
+
+with tempfile.TemporaryDirectory() as work_dir:
+    os.chdir(work_dir)
+    hosters_csv = os.path.join(work_dir, 'hosters.csv')
+    with open(hosters_csv, 'w', newline='') as file:
+        csv.writer(file).writerows(hosters)
+
+    print('{:,} hosters, {:,} pages, {} languages, max-depth {}'.format(args.hosters, len(pages), args.languages, args.max_depth))
+    print('{:>14} {:>9} {:>8} {:>12} {:>14} {:>15} {:>9} {:>9}'.format('Mode', 'Requests', 'Parsed', 'Same content', 'Near-duplicate', 'Language skips', 'Keywords', 'Seconds'))
+    for label, options in (('no memo', { 'memo_size': 0 }), ('memo', {}), ('memo + dedup', { 'dedup': True })):
+        requests, seconds, run_counters, num_keywords = scan(pages, hosters_csv, work_dir, label.replace(' ', ''), **options)
+        parsed = run_counters['pages_processed'] - run_counters['pages_same_content']
+        print('{:>14} {:>9,} {:>8,} {:>11.1%} {:>14.1%} {:>15,} {:>9,} {:>9.2f}'.format(label, requests, parsed, run_counters['pages_same_content'] / max(1, run_counters['pages_processed']),
+                                                                                   run_counters['pages_near_duplicate'] / max(1, run_counters['pages_processed']),
+                                                                                   run_counters['urls_language_variants'], num_keywords, seconds))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the HTML parser backends: pages per second and peak memory for extracting text and links of
+generated hoster pages. Each backend runs in a separate process, so the peak memory (max RSS) of one backend
+is not affected by the others.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import resource
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from page_parser import parse_page, parser_available, PARSER_BACKENDS
+
+parser = argparse.ArgumentParser(description='Benchmark HTML parser backends.')
+parser.add_argument('--pages', type=int, default=200, help='Number of generated pages to parse. Default is 200.')
+parser.add_argument('--page-size', type=int, default=100000, help='Approximate size of each page in bytes. Default is 100000.')
+parser.add_argument('--links', type=int, default=300, help='Number of links per page. Default is 300.')
+parser.add_argument('--backend', choices=PARSER_BACKENDS, help='Run the benchmark for one backend only and print the result as JSON')
+args = parser.parse_args()
+
+def generate_page(rnd, page_size: int, links: int):
+    """Return html page as bytes with navigation links, paragraphs, scripts and styles"""
+    words = ['hosting', 'cloud', 'server', 'cPanel', 'Plesk', 'WordPress', 'domain', 'backup', 'SSL', 'VPS', 'Preis', 'Größe']
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>Hoster</title>',
+             '<style>' + '.c{color:red}' * 200 + '</style><script>' + 'var x = 1;' * 300 + '</script></head><body><nav>']
+    parts += ['<a href="https://hoster.com/page{}">Page {}</a>'.format(rnd.randrange(1000), i) for i in range(links)]
+    parts.append('</nav>')
+    size = sum(len(part) for part in parts)
+    while size < page_size:
+        paragraph = '<div class="box"><p>' + ' '.join(rnd.choice(words) for _ in range(60)) + '</p></div>'
+        parts.append(paragraph)
+        size += len(paragraph)
+    parts.append('</body></html>')
+    return ''.join(parts).encode('utf-8')
+
+def run_backend(backend: str):
+    """Parse all generated pages with backend and return pages per second and peak memory"""
+    rnd = random.Random(42)
+    pages = [generate_page(rnd, args.page_size, args.links) for _ in range(args.pages)]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    for page in pages:
+        parsed = parse_page(page, 'text/html; charset=utf-8', backend)
+    seconds = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux
+    return { 'backend': backend, 'pages_per_sec': args.pages / seconds, 'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+             'rss_growth_mb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 'links': len(parsed.links), 'text_chars': len(parsed.text) }
+
+if args.backend:
+    print(json.dumps(run_backend(args.backend)))
+    exit()
+
+print('{:>12} {:>11} {:>14} {:>16} {:>8} {:>12}'.format('Backend', 'Pages/sec', 'Peak RSS MB', 'RSS growth MB', 'Links', 'Text chars'))
+for backend in PARSER_BACKENDS:
+    if not parser_available(backend):
+        print('{:>12} not installed'.format(backend))
+        continue
+
+    command = [sys.executable, os.path.abspath(__file__), '--backend', backend, '--pages', str(args.pages),
+               '--page-size', str(args.page_size), '--links', str(args.links)]
+    result = json.loads(subprocess.run(command, stdout=subprocess.PIPE, check=True).stdout)
+    print('{:>12} {:>11.1f} {:>14.1f} {:>16.1f} {:>8,} {:>12,}'.format(backend, result['pages_per_sec'], result['peak_rss_mb'],
+                                                                        result['rss_growth_mb'], result['links'], result['text_chars']))
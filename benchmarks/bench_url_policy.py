@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Micro benchmark of the link filtering: the former per link checks of scan_hosters.py and collect_urls.py with
+unifyurl, baseurl and domain compared to the batch methods of the compiled UrlPolicy.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from functions import URL_BEGINNING, BLOCKED_URL_SUBSTRINGS, UrlPolicy, unifyurl, baseurl, domain
+
+BLOCKED_URL_ENDINGS_TXT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'input', 'blocked_url_endings.txt')
+
+parser = argparse.ArgumentParser(description='Benchmark link normalization and filtering.')
+parser.add_argument('--pages', type=int, default=1000, help='Number of pages. Default is 1000.')
+parser.add_argument('--links', type=int, default=200, help='Number of links per page. Default is 200.')
+args = parser.parse_args()
+
+with open(BLOCKED_URL_ENDINGS_TXT, 'r') as file:
+    blocked_url_endings = tuple([line.strip().rstrip('/').lower() for line in file if line.strip()])
+
+def unifyurl_split(url: str):
+    """Former unifyurl with split instead of partition"""
+    return url.strip().split('?')[0].split('#')[0].rstrip('/').lower()
+
+def generate_pages(pages: int, links: int, rnd):
+    """Return list of pages with links to the same website, other websites, blocked pages and media files"""
+    paths = ['/', '/hosting', '/vps/', '/Products/Cloud?ref=nav', '/pricing#plans', '/blog/post-1', '/contact', '/logo.png', '/en/reseller']
+    hosts = ['https://www.hoster.com', 'http://hoster.com', 'https://other-hoster.net', 'https://twitter.com/hoster']
+    return [[rnd.choice(hosts) + rnd.choice(paths) + str(rnd.randrange(20)) * rnd.randrange(2) for _ in range(links)] + ['mailto:info@hoster.com']
+            for _ in range(pages)]
+
+def scan_links_with_functions(pages):
+    """Former link check of scan_hosters.py"""
+    scopes = ('https://www.hoster.com', 'https://hoster.com')
+    result = set()
+    for links in pages:
+        for link_url in links:
+            link_url = unifyurl_split(link_url)
+            if link_url.startswith(URL_BEGINNING) \
+                and link_url.startswith(scopes) \
+                and (not link_url.endswith(blocked_url_endings)) \
+                and (not any(substring in link_url for substring in BLOCKED_URL_SUBSTRINGS)):
+                result.add(link_url)
+    return result
+
+def scan_links_with_policy(pages, url_policy):
+    """Link check of scan_hosters.py with the compiled UrlPolicy"""
+    scopes = ('https://www.hoster.com', 'https://hoster.com')
+    result = set()
+    for links in pages:
+        result.update(url_policy.crawlable_links(links, scopes))
+    return result
+
+def collect_links_with_functions(pages):
+    """Former link check of collect_urls.py"""
+    scopes = ('https://www.hoster.com', 'https://hoster.com')
+    internal = set()
+    external = set()
+    for links in pages:
+        for link_url in links:
+            link_url = link_url.strip().rstrip('/').lower()
+            link_base_url = baseurl(link_url)
+            link_domain = domain(link_base_url)
+            if link_url.startswith(URL_BEGINNING) \
+                and (not link_url.endswith(blocked_url_endings)) \
+                and (not any(substring in link_url for substring in BLOCKED_URL_SUBSTRINGS)):
+                if link_url.startswith(scopes):
+                    internal.add(link_url)
+                else:
+                    external.add((link_base_url, link_domain))
+    return internal, external
+
+def collect_links_with_policy(pages, url_policy):
+    """Link check of collect_urls.py with the compiled UrlPolicy"""
+    scopes = ('https://www.hoster.com', 'https://hoster.com')
+    internal = set()
+    external = set()
+    for links in pages:
+        internal_links, external_links = url_policy.classify_links(links, scopes)
+        internal.update(internal_links)
+        external.update(external_links)
+    return internal, external
+
+def measure(function, *arguments):
+    """Return seconds needed to execute function"""
+    start = time.perf_counter()
+    function(*arguments)
+    return time.perf_counter() - start
+
+rnd = random.Random(42)
+pages = generate_pages(args.pages, args.links, rnd)
+urls = [link for links in pages for link in links]
+url_policy = UrlPolicy(blocked_url_endings, BLOCKED_URL_SUBSTRINGS)
+
+assert [unifyurl_split(url) for url in urls] == [unifyurl(url) for url in urls]
+assert scan_links_with_functions(pages) == scan_links_with_policy(pages, url_policy)
+assert collect_links_with_functions(pages) == collect_links_with_policy(pages, url_policy)
+
+print('{:,} pages with {:,} links each'.format(args.pages, args.links + 1))
+print('{:<32} {:>12} {:>12} {:>9}'.format('', 'Former ns', 'Current ns', 'Speedup'))
+for name, former, current in (
+        ('unifyurl per url', lambda: [unifyurl_split(url) for url in urls], lambda: [unifyurl(url) for url in urls]),
+        ('scan_hosters.py links per url', lambda: scan_links_with_functions(pages), lambda: scan_links_with_policy(pages, url_policy)),
+        ('collect_urls.py links per url', lambda: collect_links_with_functions(pages), lambda: collect_links_with_policy(pages, url_policy))):
+    former_ns = measure(former) * 1e9 / len(urls)
+    current_ns = measure(current) * 1e9 / len(urls)
+    print('{:<32} {:>12,.0f} {:>12,.0f} {:>8.1f}x'.format(name, former_ns, current_ns, former_ns / current_ns))
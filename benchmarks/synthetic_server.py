@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Synthetic Server serves generated hoster websites on the local machine, so the crawlers can be benchmarked
+without requests to the internet. Each hoster is served on its own port of 127.0.0.1, so each hoster is a
+separate domain for the rate control and the connection pools. One more port serves a listing site with
+paginated lists of links to all hosters for collect_urls.py.
+
+Pages are generated deterministically from the hoster number and page number: a number of links to other
+pages of the same hoster, filler text up to the page size and with the specified density random keywords
+of products.csv. Each response can be delayed and a share of the responses fails with 503.
+"""
+
+import os
+import csv
+import sys
+import time
+import random
+import argparse
+import selectors
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+PRODUCTS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'input', 'products.csv')
+FILLER_WORDS = ('hosting', 'server', 'cloud', 'domain', 'support', 'backup', 'email', 'website', 'secure', 'fast',
+                'plan', 'month', 'storage', 'traffic', 'datacenter', 'ssl', 'database', 'managed', 'reseller', 'uptime')
+LISTING_LINKS_PER_PAGE = 50
+
+class SyntheticConfig:
+    """Size and behavior of the generated websites"""
+
+    def __init__(self, hosters: int = 20, pages: int = 50, links: int = 20, page_bytes: int = 20000, keyword_density: float = 0.2,
+                 latency: float = 0.0, error_rate: float = 0.0, port: int = 18000, seed: int = 42):
+        self.hosters = hosters
+        self.pages = pages
+        self.links = links
+        self.page_bytes = page_bytes
+        self.keyword_density = keyword_density
+        self.latency = latency
+        self.error_rate = error_rate
+        self.port = port
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+def load_keywords(filename: str = PRODUCTS_CSV):
+    """Return all keywords of products.csv or a few default keywords if it does not exist"""
+    keywords = []
+    if os.path.exists(filename):
+        with open(filename, 'r') as csvfile:
+            for row in csv.reader(csvfile):
+                keywords += [keyword for keyword in row if keyword and keyword not in keywords]
+    return keywords or ['cPanel', 'Plesk', 'WordPress', 'Acronis', 'CloudLinux']
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class SyntheticWeb:
+    """Local web servers of all generated hosters and the listing site"""
+
+    def __init__(self, config: SyntheticConfig):
+        self.config = config
+        self.keywords = load_keywords()
+        self.servers = []
+        self.selector = None
+        self.thread = None
+        self.running = False
+
+    def hoster_url(self, k: int):
+        return 'http://127.0.0.1:' + str(self.config.port + 1 + k)
+
+    def listing_url(self):
+        return 'http://127.0.0.1:' + str(self.config.port)
+
+    def hosters(self):
+        """Return list of [url, name, id] of all hosters like hosters_to_be_crawled.csv"""
+        return [[self.hoster_url(k), 'Synthetic Hoster ' + str(k), 'synthetic' + str(k)] for k in range(self.config.hosters)]
+
+    def listing_page(self, page: int):
+        """Return HTML of a page of the listing site with links to hosters and the next page"""
+        start = page * LISTING_LINKS_PER_PAGE
+        links = ''.join('<li><a href="{}/">Hoster {}</a></li>'.format(self.hoster_url(k), k)
+                        for k in range(start, min(start + LISTING_LINKS_PER_PAGE, self.config.hosters)))
+        if start + LISTING_LINKS_PER_PAGE < self.config.hosters:
+            links += '<li><a href="{}/list{}">next</a></li>'.format(self.listing_url(), page + 1)
+        return '<html><head><title>Hoster list</title></head><body><ul>' + links + '</ul></body></html>'
+
+    def hoster_page(self, k: int, page: int):
+        """Return HTML of a page of hoster k"""
+        config = self.config
+        rnd = random.Random(config.seed * 1000003 + k * 10007 + page)
+        links = ''.join('<a href="{}/page{}">page {}</a> '.format(self.hoster_url(k), target, target)
+                        for target in (rnd.randrange(config.pages) for _ in range(config.links)))
+
+        text = ''
+        if rnd.random() < config.keyword_density:
+            text = ' '.join(rnd.sample(self.keywords, min(len(self.keywords), rnd.randint(1, 3)))) + ' '
+
+        html = '<html><head><title>Hoster {} page {}</title><style>body {{ margin: 0 }}</style></head><body><nav>{}</nav><p>{}'.format(k, page, links, text)
+        filler = []
+        size = len(html)
+        while size < config.page_bytes:
+            word = rnd.choice(FILLER_WORDS)
+            filler.append(word)
+            size += len(word) + 1
+        return html + ' '.join(filler) + '</p><script>var tracking = "none";</script></body></html>'
+
+    def handler(self):
+        web = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            # headers and body are written separately, so Nagle's algorithm would delay each response by 40 ms
+            disable_nagle_algorithm = True
+
+            def log_message(self, *arguments):
+                pass
+
+            def send(self, status: int, body: bytes = b'', content_type: str = 'text/html; charset=utf-8'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                config = web.config
+                port = self.server.server_address[1]
+                path = self.path.split('?')[0].rstrip('/')
+                if config.latency > 0:
+                    time.sleep(config.latency)
+
+                if path == '/robots.txt':
+                    return self.send(404)
+
+                # listing site
+                if port == config.port:
+                    page = int(path[len('/list'):]) if path.startswith('/list') and path[len('/list'):].isdigit() else 0
+                    return self.send(200, web.listing_page(page).encode('utf-8'))
+
+                k = port - config.port - 1
+                page = int(path[len('/page'):]) if path.startswith('/page') and path[len('/page'):].isdigit() else 0
+                if page >= config.pages:
+                    return self.send(404)
+                if config.error_rate > 0 and random.Random(config.seed + k * 7919 + page * 104729).random() < config.error_rate:
+                    return self.send(503)
+                return self.send(200, web.hoster_page(k, page).encode('utf-8'))
+
+        return Handler
+
+    def start(self):
+        """Start serving the listing site and all hosters in a background thread"""
+        handler = self.handler()
+        self.servers = [ThreadingServer(('127.0.0.1', self.config.port + i), handler) for i in range(self.config.hosters + 1)]
+        self.selector = selectors.DefaultSelector()
+        for server in self.servers:
+            self.selector.register(server.socket, selectors.EVENT_READ, server)
+
+        self.running = True
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        """Accept connections of all ports in one thread, each request is handled in its own thread"""
+        while self.running:
+            for key, _ in self.selector.select(timeout=0.2):
+                key.data._handle_request_noblock()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+        for server in self.servers:
+            server.server_close()
+        self.selector.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve generated hoster websites and a listing site on local ports.')
+    parser.add_argument('--hosters', type=int, default=20, help='Number of hosters. Default is 20.')
+    parser.add_argument('--pages', type=int, default=50, help='Number of pages per hoster. Default is 50.')
+    parser.add_argument('--links', type=int, default=20, help='Number of links per page. Default is 20.')
+    parser.add_argument('--page-bytes', type=int, default=20000, help='Size of each page in bytes. Default is 20000.')
+    parser.add_argument('--keyword-density', type=float, default=0.2, help='Share of pages mentioning keywords of products.csv. Default is 0.2.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds each response is delayed. Default is 0.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of pages responding with 503. Default is 0.')
+    parser.add_argument('--port', type=int, default=18000, help='Port of the listing site, hosters use the following ports. Default is 18000.')
+    args = parser.parse_args()
+
+    web = SyntheticWeb(SyntheticConfig(args.hosters, args.pages, args.links, args.page_bytes, args.keyword_density, args.latency, args.error_rate, args.port))
+    web.start()
+    writer = csv.writer(sys.stdout)
+    writer.writerow(['URL', 'CompanyName', 'HosterID'])
+    writer.writerows(web.hosters())
+    print('Listing site:', web.listing_url(), file=sys.stderr)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        web.stop()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+Circuit Breaker stops crawling a hoster that can't be reached: after a number of consecutive connection errors,
+DNS failures or timeouts the breaker trips and the remaining pages of the hoster are not requested anymore.
+
+Transient errors like timeouts and reset connections are retried with a bounded exponential backoff first, while
+DNS failures and refused connections are not retried since another attempt would fail the same way.
+"""
+
+import socket
+import random
+import asyncio
+
+DEFAULT_MAX_FAILURES = 3 # consecutive connection errors before crawling a hoster is aborted
+DEFAULT_RETRIES = 2 # retries of a request after a transient error
+RETRY_BASE_DELAY = 0.5 # seconds before the first retry, doubled for each further retry
+RETRY_MAX_DELAY = 8 # max seconds before a retry
+
+_connection_error_types = None
+
+def connection_error_types():
+    """Return tuple of exception types of requests, aiohttp and the standard library meaning a server can't be reached"""
+    global _connection_error_types
+
+    if _connection_error_types is None:
+        types = [ConnectionError, TimeoutError, asyncio.TimeoutError, socket.gaierror]
+        try:
+            import requests
+            types += [requests.exceptions.ConnectionError, requests.exceptions.Timeout]
+        except ImportError:
+            pass
+        try:
+            import aiohttp
+            types += [aiohttp.ClientConnectionError]
+        except ImportError:
+            pass
+        _connection_error_types = tuple(types)
+    return _connection_error_types
+
+def exception_chain(e):
+    """Yield exception and the exceptions it was raised from, like urllib3 and aiohttp wrap socket errors"""
+    for _ in range(10):
+        if e is None:
+            break
+        yield e
+        e = e.__cause__ or e.__context__
+
+def is_connection_error(e):
+    """Return True if the exception means the server could not be reached: DNS failure, connection error or timeout"""
+    return isinstance(e, connection_error_types())
+
+def is_unreachable(e):
+    """Return True if the domain does not resolve or the server refuses connections, so a retry would fail the same way"""
+    return any(isinstance(cause, (socket.gaierror, ConnectionRefusedError)) for cause in exception_chain(e))
+
+def is_transient(e):
+    """Return True if the exception is a timeout or connection error that may succeed on a retry"""
+    return is_connection_error(e) and not is_unreachable(e)
+
+def backoff_delay(attempt: int):
+    """Return seconds to wait before retry number attempt (starting at 0) with exponential backoff and jitter"""
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+class CircuitBreaker:
+    """Consecutive connection errors of a hoster that trip the breaker after max_failures (0 disables the breaker)"""
+
+    def __init__(self, max_failures: int = DEFAULT_MAX_FAILURES):
+        self.max_failures = max_failures
+        self.failures = 0
+        self.num_failures = 0
+        self.failure_seconds = 0.0
+        self.tripped = False
+
+    def record_success(self):
+        """Reset the consecutive failures after a response of the server"""
+        self.failures = 0
+
+    def record_failure(self, e, seconds: float = 0.0):
+        """Count a failed request that took seconds and return True only if this failure tripped the breaker"""
+        if is_connection_error(e):
+            self.failures += 1
+            self.num_failures += 1
+            self.failure_seconds += seconds
+            # requests in flight when the breaker trips fail as well, but it only trips once
+            if self.max_failures > 0 and self.failures >= self.max_failures and not self.tripped:
+                self.tripped = True
+                return True
+        return False
+
+    def average_failure_seconds(self):
+        """Return average seconds of the failed requests"""
+        return self.failure_seconds / self.num_failures if self.num_failures > 0 else 0.0
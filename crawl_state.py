@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+"""
+Crawl State stores the progress of a scan in an indexed SQLite database: crawled hosters with their keyword
+matches, crawled urls, urls with errors and the keywords found per url. "Already done?" lookups use the primary
+key index and the counters for the statistics are kept in a meta table, so resuming a scan does not read the
+whole history. All rows of a hoster are written in one transaction when the hoster is finished.
+
+The aggregated statistics are saved in the meta table with each hoster, so they are restored instead of being
+aggregated from all hosters again.
+
+Keyword matches are stored sparse as (hoster, keyword_id, count) rows for keywords found at least once with a
+dictionary of keyword names, so rows stay valid if keywords are added to or removed from the products list.
+"""
+
+import json
+import zlib
+import sqlite3
+from itertools import groupby
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS hosters (hoster_url TEXT PRIMARY KEY, hoster_name TEXT NOT NULL, hoster_id TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS hosters_hoster_id ON hosters (hoster_id);
+CREATE TABLE IF NOT EXISTS keywords (keyword_id INTEGER PRIMARY KEY, keyword TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS hoster_keywords (hoster INTEGER NOT NULL, keyword_id INTEGER NOT NULL, count INTEGER NOT NULL,
+    PRIMARY KEY (hoster, keyword_id)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS urls_crawled (url TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS urls_with_errors (url TEXT PRIMARY KEY, hoster_name TEXT NOT NULL, error TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS url_keywords (url TEXT NOT NULL, hoster_name TEXT NOT NULL, keywords TEXT NOT NULL);
+'''
+
+COUNTERS = ('num_hosters_checked', 'num_hosters_with_products', 'num_urls_crawled', 'num_crawl_errors')
+OUTPUT_COMPLETE = 'output_files_complete' # 1 if the appended output files contain all rows of the state
+STATS = 'stats' # compressed JSON of the aggregated statistics of all hosters up to a hoster rowid
+
+class CrawlState:
+    """SQLite database with the state of a scan that is written in one transaction per hoster"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        # the async engine stores finished hosters in its crawl thread
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self._migrate_dense_matches()
+        self.connection.executescript(SCHEMA)
+        self.connection.executemany('INSERT OR IGNORE INTO meta (key, value) VALUES (?, 0)', [(counter,) for counter in COUNTERS])
+        self.connection.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, 1)', (OUTPUT_COMPLETE,))
+        self.connection.commit()
+
+        self.keyword_ids = dict(self.connection.execute('SELECT keyword, keyword_id FROM keywords'))
+        self.keyword_names = {keyword_id: keyword for keyword, keyword_id in self.keyword_ids.items()}
+
+    def _migrate_dense_matches(self):
+        """Move matches stored as JSON per hoster by earlier versions into the sparse table"""
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(hosters)')]
+        if 'matches' not in columns:
+            return
+
+        rows = self.connection.execute('SELECT hoster_url, hoster_name, hoster_id, matches FROM hosters ORDER BY rowid').fetchall()
+        self.connection.execute('DROP TABLE hosters')
+        self.connection.executescript(SCHEMA)
+        self.keyword_ids = {}
+        self.keyword_names = {}
+        for hoster_url, hoster_name, hoster_id, matches in rows:
+            self._insert_hoster(hoster_url, hoster_name, hoster_id, json.loads(matches))
+        self.connection.commit()
+
+    def _keyword_id(self, keyword: str):
+        """Return id of keyword and add it to the keyword dictionary if it is new"""
+        keyword_id = self.keyword_ids.get(keyword)
+        if keyword_id is None:
+            keyword_id = self.connection.execute('INSERT INTO keywords (keyword) VALUES (?)', (keyword,)).lastrowid
+            self.keyword_ids[keyword] = keyword_id
+            self.keyword_names[keyword_id] = keyword
+        return keyword_id
+
+    def _insert_hoster(self, hoster_url: str, hoster_name: str, hoster_id: str, matches: dict):
+        """Insert hoster and its matches and return the number of inserted hosters"""
+        cursor = self.connection.execute('INSERT OR IGNORE INTO hosters (hoster_url, hoster_name, hoster_id) VALUES (?, ?, ?)',
+                                         (hoster_url, hoster_name, hoster_id))
+        if cursor.rowcount > 0:
+            self.connection.executemany('INSERT INTO hoster_keywords (hoster, keyword_id, count) VALUES (?, ?, ?)',
+                                        [(cursor.lastrowid, self._keyword_id(keyword), count) for keyword, count in matches.items() if count > 0])
+        return cursor.rowcount
+
+    def is_empty(self):
+        """Return True if neither hosters nor urls were stored yet"""
+        return self.connection.execute('SELECT 1 FROM hosters LIMIT 1').fetchone() is None \
+            and self.connection.execute('SELECT 1 FROM urls_crawled LIMIT 1').fetchone() is None
+
+    def counters(self):
+        """Return dictionary with all counters"""
+        return dict(self.connection.execute('SELECT key, value FROM meta WHERE key != ?', (STATS,)))
+
+    def _increment(self, counter: str, value: int):
+        if value:
+            self.connection.execute('UPDATE meta SET value = value + ? WHERE key = ?', (value, counter))
+
+    def is_hoster_done(self, hoster_url: str):
+        """Return True if results of hoster are stored already"""
+        return self.connection.execute('SELECT 1 FROM hosters WHERE hoster_url = ?', (hoster_url,)).fetchone() is not None
+
+    def is_hoster_id_stored(self, hoster_id: str, up_to: int = None):
+        """Return True if a hoster with hoster_id is stored already, only up to the hoster rowid up_to if specified"""
+        if up_to is None:
+            return self.connection.execute('SELECT 1 FROM hosters WHERE hoster_id = ?', (hoster_id,)).fetchone() is not None
+        return self.connection.execute('SELECT 1 FROM hosters WHERE hoster_id = ? AND rowid <= ?', (hoster_id, up_to)).fetchone() is not None
+
+    def last_hoster(self):
+        """Return rowid of the hoster stored last or 0 if no hoster is stored"""
+        return self.connection.execute('SELECT MAX(rowid) FROM hosters').fetchone()[0] or 0
+
+    def is_url_crawled(self, url: str):
+        """Return True if url was crawled already"""
+        return self.connection.execute('SELECT 1 FROM urls_crawled WHERE url = ?', (url,)).fetchone() is not None
+
+    def add_hoster(self, hoster_url: str, hoster_name: str, hoster_id: str, matches: dict):
+        """Store hoster with dictionary of matched keywords and their number of matching pages"""
+        inserted = self._insert_hoster(hoster_url, hoster_name, hoster_id, matches)
+        self._increment('num_hosters_checked', inserted)
+        self._increment('num_hosters_with_products', inserted if sum(matches.values()) > 0 else 0)
+
+    def add_urls_crawled(self, urls):
+        """Store list of crawled urls"""
+        for url in urls:
+            self._increment('num_urls_crawled', self.connection.execute('INSERT OR IGNORE INTO urls_crawled (url) VALUES (?)', (url,)).rowcount)
+
+    def add_urls_with_errors(self, errors):
+        """Store list of (url, hoster name, error message) of urls that could not be crawled"""
+        for url, hoster_name, error in errors:
+            cursor = self.connection.execute('INSERT OR IGNORE INTO urls_with_errors (url, hoster_name, error) VALUES (?, ?, ?)', (url, hoster_name, error))
+            self._increment('num_crawl_errors', cursor.rowcount)
+
+    def add_url_keywords(self, rows):
+        """Store list of (url, hoster name, list of keywords) of urls mentioning keywords"""
+        self.connection.executemany('INSERT INTO url_keywords (url, hoster_name, keywords) VALUES (?, ?, ?)',
+                                    [(url, hoster_name, json.dumps(keywords)) for url, hoster_name, keywords in rows])
+
+    def set_output_complete(self, complete: bool):
+        """Store whether the appended output files contain all rows of the state, committed with the next commit"""
+        self.connection.execute('UPDATE meta SET value = ? WHERE key = ?', (int(complete), OUTPUT_COMPLETE))
+
+    def is_output_complete(self):
+        """Return False if rows were stored whose lines may not have reached the output files, e.g. after a crash"""
+        return self.connection.execute('SELECT value FROM meta WHERE key = ?', (OUTPUT_COMPLETE,)).fetchone()[0] == 1
+
+    def set_stats(self, stats: dict):
+        """Store dictionary with the aggregated statistics, committed with the next commit"""
+        self.connection.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (STATS, zlib.compress(json.dumps(stats).encode('utf-8'))))
+
+    def stats(self):
+        """Return dictionary with the aggregated statistics stored last or None if they were not stored"""
+        row = self.connection.execute('SELECT value FROM meta WHERE key = ?', (STATS,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row is not None else None
+
+    def commit(self):
+        """Write all changes since the last commit to the database"""
+        self.connection.commit()
+
+    def hosters(self, after: int = 0):
+        """Yield (hoster url, hoster name, hoster id, dictionary of matches) of all hosters in the order they were stored, only after the hoster rowid after if specified"""
+        rows = self.connection.execute('SELECT hosters.rowid, hoster_url, hoster_name, hoster_id, keyword_id, count FROM hosters '
+                                       'LEFT JOIN hoster_keywords ON hoster_keywords.hoster = hosters.rowid WHERE hosters.rowid > ? ORDER BY hosters.rowid', (after,))
+        for (_, hoster_url, hoster_name, hoster_id), hoster_rows in groupby(rows, key=lambda row: row[:4]):
+            yield hoster_url, hoster_name, hoster_id, {self.keyword_names[row[4]]: row[5] for row in hoster_rows if row[4] is not None}
+
+    def urls_crawled(self):
+        """Yield all crawled urls in the order they were stored"""
+        for (url,) in self.connection.execute('SELECT url FROM urls_crawled ORDER BY rowid'):
+            yield url
+
+    def urls_with_errors(self):
+        """Yield (url, hoster name, error message) of all urls with errors in the order they were stored"""
+        yield from self.connection.execute('SELECT url, hoster_name, error FROM urls_with_errors ORDER BY rowid')
+
+    def url_keywords(self):
+        """Yield (url, hoster name, list of keywords) of all urls mentioning keywords in the order they were stored"""
+        for url, hoster_name, keywords in self.connection.execute('SELECT url, hoster_name, keywords FROM url_keywords ORDER BY rowid'):
+            yield url, hoster_name, json.loads(keywords)
+
+    def close(self):
+        self.connection.close()
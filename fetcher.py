@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+
+"""
+Fetcher downloads pages as stream and stops early for responses that are not worth parsing:
+responses that are no HTML page are skipped after the headers and bodies are cut off at a maximum size.
+If a ResponseCache is specified, cached pages are revalidated with a conditional request and reused
+if they did not change. If a RateController is specified, each request waits for the interval of its domain,
+uses the adaptive timeout and the response is reported back, so the rate of each domain adapts to its responses.
+The seconds spent waiting for the rate limit, until the response headers arrived and downloading the body are
+added to the timings of each Page. Sitemaps (urls ending with .xml) are downloaded as XML as well and the sitemaps
+listed in the robots.txt are passed to the RateController. Responses with 429 Too Many Requests or 503 Service
+Unavailable raise ThrottledResponse without downloading their body, so they are never processed as pages.
+The async functions access the cache in the default thread pool, so its file I/O and lock never block the event loop.
+"""
+
+import time
+import asyncio
+from http import HTTPStatus
+from collections import namedtuple
+from functions import baseurl
+from http_cache import conditional_headers
+from rate_control import parse_crawl_delay, parse_sitemaps, retry_after_seconds, THROTTLING_STATUS_CODES
+
+DEFAULT_MAX_PAGE_BYTES = 5000000 # max bytes downloaded per page
+CHUNK_SIZE = 65536
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+XML_CONTENT_TYPES = ('application/xml', 'text/xml')
+SITEMAP_PATH = '/sitemap.xml' # default location of the sitemap if the robots.txt lists none
+
+# ask for html and compressed transfer, requests and aiohttp decompress the content
+ACCEPT_HEADER = { 'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.5', 'Accept-Encoding': 'gzip, deflate' }
+
+# url is the final url after redirects, truncated is True if the content was cut off at the maximum size
+# and cached is True if the content was taken from the cache since the server responded 304 Not Modified
+# timings contains the seconds of the phases wait, connect (DNS lookup, connect and time until the response headers) and download
+Page = namedtuple('Page', ['url', 'status', 'headers', 'content', 'truncated', 'cached', 'timings'], defaults=(None,))
+
+class SkippedResponse(Exception):
+    """Response was not downloaded since it is no HTML page"""
+
+    def __init__(self, url: str, content_type: str, bytes_saved: int):
+        super().__init__(f'Skipped {url} with content type {content_type}')
+        self.url = url
+        self.content_type = content_type
+        self.bytes_saved = bytes_saved
+
+class ThrottledResponse(Exception):
+    """Server responded with 429 Too Many Requests or 503 Service Unavailable, the request should be retried later"""
+
+    def __init__(self, url: str, status: int, retry_after: float = None):
+        super().__init__(f'{status} {HTTPStatus(status).phrase}: {url}')
+        self.url = url
+        self.status = status
+        self.retry_after = retry_after
+
+def is_html(content_type: str):
+    """Return True if content type is HTML or not specified"""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    return not content_type or content_type in HTML_CONTENT_TYPES
+
+def is_accepted(url: str, content_type: str):
+    """Return True if content type is HTML or not specified or url is a sitemap in XML"""
+    return is_html(content_type) or (url.endswith('.xml') and content_type.split(';')[0].strip().lower() in XML_CONTENT_TYPES)
+
+def content_length(headers):
+    """Return value of the Content-Length header or 0 if not specified"""
+    try:
+        return int(headers.get('Content-Length', 0))
+    except ValueError:
+        return 0
+
+def request_headers(headers: dict):
+    """Return request headers including the accepted content types and encodings"""
+    return dict(ACCEPT_HEADER, **headers)
+
+def create_session(headers: dict):
+    """Return requests session with keep-alive connections and the specified headers"""
+    import requests
+
+    session = requests.Session()
+    session.headers.update(request_headers(headers))
+    return session
+
+def cached_page(cache, entry, timings: dict = None):
+    """Return Page of a cache entry that was revalidated by the server"""
+    cache.touch(entry)
+    return Page(entry.final_url, 200, { 'Content-Type': entry.content_type }, entry.content, False, True, timings)
+
+def fetch_robots(session, url: str, timeout: int):
+    """Return content of the robots.txt of the website of url or an empty string if it can't be downloaded"""
+    import requests
+
+    try:
+        with session.get(baseurl(url) + '/robots.txt', allow_redirects = True, timeout = timeout) as response:
+            if response.status_code == 200:
+                return response.text
+    except requests.exceptions.RequestException:
+        pass
+    return ''
+
+def fetch_page(session, url: str, timeout: int, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES, cache = None, rate_controller = None):
+    """Download page with requests at the rate of its domain and return Page or raise SkippedResponse if it is no HTML page"""
+    if rate_controller is None:
+        return download_page(session, url, timeout, max_page_bytes, cache)
+
+    if rate_controller.needs_robots(url):
+        robots_txt = fetch_robots(session, url, timeout)
+        rate_controller.set_crawl_delay(url, parse_crawl_delay(robots_txt))
+        rate_controller.set_sitemaps(url, parse_sitemaps(robots_txt))
+    wait = rate_controller.reserve(url)
+    time.sleep(wait)
+
+    start = time.monotonic()
+    try:
+        page = download_page(session, url, rate_controller.timeout(timeout), max_page_bytes, cache)
+    except SkippedResponse:
+        rate_controller.record(url, 200, time.monotonic() - start)
+        raise
+    except ThrottledResponse as e:
+        rate_controller.record(url, e.status, time.monotonic() - start, e.retry_after)
+        raise
+    except Exception:
+        rate_controller.record_error(url)
+        raise
+
+    rate_controller.record(url, page.status, time.monotonic() - start, retry_after_seconds(page.headers))
+    page.timings['wait'] = wait
+    return page
+
+def download_page(session, url: str, timeout: int, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES, cache = None):
+    """Download page as stream with requests and return Page or raise SkippedResponse if it is no HTML page or ThrottledResponse"""
+    entry = cache.get(url) if cache else None
+    headers = conditional_headers(entry) if entry else None
+    start = time.perf_counter()
+
+    with session.get(url, allow_redirects = True, stream = True, timeout = timeout, headers = headers) as response:
+        connected = time.perf_counter()
+        timings = { 'connect': connected - start }
+        if entry and response.status_code == 304:
+            return cached_page(cache, entry, timings)
+        if response.status_code in THROTTLING_STATUS_CODES:
+            raise ThrottledResponse(url, response.status_code, retry_after_seconds(response.headers))
+
+        content_type = response.headers.get('Content-Type', '')
+        if not is_accepted(url, content_type):
+            raise SkippedResponse(response.url, content_type, content_length(response.headers))
+
+        chunks = []
+        size = 0
+        truncated = False
+        for chunk in response.iter_content(CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_page_bytes:
+                truncated = True
+                break
+
+        content = b''.join(chunks)[:max_page_bytes]
+        timings['download'] = time.perf_counter() - connected
+        if cache and response.status_code == 200 and not truncated:
+            cache.put(url, response.url, response.headers, content)
+        return Page(response.url, response.status_code, response.headers, content, truncated, False, timings)
+
+async def fetch_robots_async(session, url: str):
+    """Return content of the robots.txt of the website of url or an empty string if it can't be downloaded"""
+    import aiohttp
+
+    try:
+        async with session.get(baseurl(url) + '/robots.txt', allow_redirects = True) as response:
+            if response.status == 200:
+                return await response.text(errors = 'replace')
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        pass
+    return ''
+
+async def fetch_page_async(session, url: str, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES, cache = None, rate_controller = None, semaphore = None):
+    """Download page with aiohttp at the rate of its domain and return Page or raise SkippedResponse if it is no HTML page
+
+    The semaphore limits the parallel requests to all domains and is not held while waiting for the interval of a domain.
+    """
+    semaphore = semaphore or asyncio.Semaphore(1)
+    if rate_controller is None:
+        async with semaphore:
+            return await download_page_async(session, url, max_page_bytes, cache)
+
+    if rate_controller.needs_robots(url):
+        async with semaphore:
+            robots_txt = await fetch_robots_async(session, url)
+        rate_controller.set_crawl_delay(url, parse_crawl_delay(robots_txt))
+        rate_controller.set_sitemaps(url, parse_sitemaps(robots_txt))
+    wait = rate_controller.reserve(url)
+    await asyncio.sleep(wait)
+
+    try:
+        async with semaphore:
+            start = time.monotonic()
+            page = await download_page_async(session, url, max_page_bytes, cache, rate_controller.timeout(session.timeout.total))
+    except SkippedResponse:
+        rate_controller.record(url, 200, time.monotonic() - start)
+        raise
+    except ThrottledResponse as e:
+        rate_controller.record(url, e.status, time.monotonic() - start, e.retry_after)
+        raise
+    except Exception:
+        rate_controller.record_error(url)
+        raise
+
+    rate_controller.record(url, page.status, time.monotonic() - start, retry_after_seconds(page.headers))
+    page.timings['wait'] = wait
+    return page
+
+async def download_page_async(session, url: str, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES, cache = None, timeout = None):
+    """Download page as stream with aiohttp within timeout seconds (the timeout of the session if None) and return Page or raise SkippedResponse if it is no HTML page or ThrottledResponse"""
+    import aiohttp
+
+    loop = asyncio.get_running_loop()
+    entry = await loop.run_in_executor(None, cache.get, url) if cache else None
+    headers = conditional_headers(entry) if entry else None
+    # aiohttp only uses the timeout of the session if no timeout is passed at all
+    options = { 'timeout': aiohttp.ClientTimeout(total = timeout) } if timeout else {}
+    start = time.perf_counter()
+
+    async with session.get(url, allow_redirects = True, headers = headers, **options) as response:
+        connected = time.perf_counter()
+        timings = { 'connect': connected - start }
+        if entry and response.status == 304:
+            return await loop.run_in_executor(None, cached_page, cache, entry, timings)
+        if response.status in THROTTLING_STATUS_CODES:
+            raise ThrottledResponse(url, response.status, retry_after_seconds(response.headers))
+
+        content_type = response.headers.get('Content-Type', '')
+        if not is_accepted(url, content_type):
+            raise SkippedResponse(str(response.url), content_type, content_length(response.headers))
+
+        chunks = []
+        size = 0
+        truncated = False
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_page_bytes:
+                truncated = True
+                break
+
+        content = b''.join(chunks)[:max_page_bytes]
+        timings['download'] = time.perf_counter() - connected
+        if cache and response.status == 200 and not truncated:
+            await loop.run_in_executor(None, cache.put, url, str(response.url), response.headers, content)
+        return Page(str(response.url), response.status, response.headers, content, truncated, False, timings)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+"""
+Fingerprints deduplicate urls by a 64 bit hash instead of keeping each url string in memory.
+
+FingerprintSet stores the fingerprints of all added urls exactly in an open addressing hash table: an array of 64 bit
+integers with linear probing that needs 12 to 24 bytes per url instead of about 70 bytes of a set of Python integers
+or more than 100 bytes of a set of url strings. The chance that two different urls have the same fingerprint is
+negligible even for billions of urls. If a filename is specified, the table is kept in a memory-mapped file, so the
+operating system can write it to disk under memory pressure instead of keeping it in the memory of the process.
+
+BloomFilter needs only about 1.8 bytes per url for an error rate of 0.1% and a fixed amount of memory, but a new url
+is reported as already added with that probability.
+"""
+
+import os
+import math
+import mmap
+import array
+import hashlib
+
+DEFAULT_ERROR_RATE = 0.001 # share of new urls a BloomFilter reports as already added
+MIN_SLOTS = 1024 # initial size of the table of a FingerprintSet, doubled whenever it is two thirds full
+
+def fingerprint(url: str):
+    """Return 64 bit hash of url that is the same in every process"""
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'little')
+
+class FingerprintSet:
+    """Set of urls that only stores the fingerprint of each url in an array, optionally in a memory-mapped file
+
+    Other threads can check urls while urls are added, since a grown table replaces the old one only once all
+    fingerprints were copied, and the memory maps of old tables are only closed by close().
+    """
+
+    def __init__(self, urls=(), filename: str = None):
+        self.filename = filename
+        self.count = 0
+        self._maps = [] # (file, mmap, table) of the current and all old tables
+        self.table = self._allocate(MIN_SLOTS)
+        self.update(urls)
+
+    def _allocate(self, num_slots: int):
+        """Return an empty table with num_slots slots, a power of two, where 0 marks an empty slot"""
+        if self.filename is None:
+            return array.array('Q', bytes(8 * num_slots))
+
+        # the new table replaces the file of the old one, which stays readable through its memory map
+        new_filename = self.filename + '.new'
+        file = open(new_filename, 'w+b')
+        file.truncate(8 * num_slots)
+        memory_map = mmap.mmap(file.fileno(), 8 * num_slots)
+        os.replace(new_filename, self.filename)
+        table = memoryview(memory_map).cast('Q')
+        self._maps.append((file, memory_map, table))
+        return table
+
+    def _grow(self):
+        """Double the size of the table and insert all fingerprints again"""
+        table = self._allocate(2 * len(self.table))
+        mask = len(table) - 1
+        for key in self.table:
+            if key:
+                i = key & mask
+                while table[i]:
+                    i = (i + 1) & mask
+                table[i] = key
+        self.table = table
+
+    def _slot(self, url: str):
+        """Return table, slot of the fingerprint of url and the fingerprint, the slot is empty if url was not added"""
+        key = fingerprint(url) or 1
+        table = self.table
+        mask = len(table) - 1
+        i = key & mask
+        while True:
+            slot_key = table[i]
+            if slot_key == key or not slot_key:
+                return table, i, key
+            i = (i + 1) & mask
+
+    def add(self, url: str):
+        """Add url and return True if it was not yet added"""
+        table, i, key = self._slot(url)
+        if table[i]:
+            return False
+        table[i] = key
+        self.count += 1
+        if 3 * self.count > 2 * len(table):
+            self._grow()
+        return True
+
+    def update(self, urls):
+        """Add all urls"""
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url: str):
+        table, i, _ = self._slot(url)
+        return table[i] != 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        """Return bytes of the table"""
+        return 8 * len(self.table)
+
+    def close(self):
+        """Remove all urls and delete the file of the table if it is memory-mapped"""
+        if self.filename is not None:
+            for file, memory_map, table in self._maps:
+                table.release()
+                memory_map.close()
+                file.close()
+            self._maps = []
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            self.filename = None
+        self.table = self._allocate(MIN_SLOTS)
+        self.count = 0
+
+class BloomFilter:
+    """Set of urls with a fixed size for capacity urls that may report a new url as already added with error_rate"""
+
+    def __init__(self, capacity: int, error_rate: float = DEFAULT_ERROR_RATE, urls=()):
+        capacity = max(1, capacity)
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        for url in urls:
+            self.add(url)
+
+    def _positions(self, url: str):
+        """Return bit positions of url with double hashing of one 128 bit hash"""
+        digest = int.from_bytes(hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=16).digest(), 'little')
+        h1 = digest & 0xFFFFFFFFFFFFFFFF
+        h2 = (digest >> 64) | 1
+        num_bits = self.num_bits
+        return [(h1 + i * h2) % num_bits for i in range(self.num_hashes)]
+
+    def add(self, url: str):
+        """Add url and return True if it was not yet added (or False if it is a false positive)"""
+        bits = self.bits
+        new = False
+        for position in self._positions(url):
+            byte = bits[position >> 3]
+            mask = 1 << (position & 7)
+            if not byte & mask:
+                bits[position >> 3] = byte | mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __contains__(self, url: str):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(url))
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """Remove all urls"""
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
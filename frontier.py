@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+Frontier of a website crawl: the queue of urls that are still to be crawled.
+
+Frontier crawls in BFS order. PriorityFrontier crawls the urls with the highest priority first, so the limited
+number of pages per hoster is spent on pages like /hosting, /pricing or /products instead of news, legal or
+navigation pages. link_priority scores a link by the tokens of its path and its anchor text, the number of product
+keywords in its anchor text, its depth and the number of keywords found on the page linking to it.
+"""
+
+import re
+import heapq
+from collections import deque
+
+TOKEN_REGEX = re.compile(r'[a-z0-9]+')
+
+# word stems in paths and anchor texts of pages that likely list products, also within compounds like webhosting
+PRODUCT_STEMS = {
+    'hosting': 3, 'host': 1, 'server': 3, 'vps': 3, 'cloud': 2, 'dedicated': 2, 'reseller': 2, 'wordpress': 2,
+    'product': 3, 'produkt': 3, 'pricing': 3, 'price': 2, 'preis': 2, 'plan': 2, 'tarif': 3, 'package': 2, 'paket': 2,
+    'offer': 1, 'angebot': 1, 'feature': 2, 'leistung': 2, 'solution': 1, 'loesung': 1, 'service': 1,
+    'domain': 1, 'mail': 1, 'ssl': 1, 'backup': 1, 'storage': 1, 'managed': 2, 'kubernetes': 2, 'webspace': 3,
+    'shop': 1, 'compare': 1, 'vergleich': 1, 'panel': 2, 'software': 1, 'app': 1,
+}
+
+# whole tokens of pages that rarely mention products
+LOW_PRIORITY_TOKENS = {
+    'news', 'press', 'presse', 'career', 'careers', 'karriere', 'job', 'jobs', 'event', 'events', 'partner', 'partners',
+    'tag', 'tags', 'category', 'author', 'archive', 'archiv', 'legal', 'imprint', 'impressum', 'privacy', 'datenschutz',
+    'terms', 'agb', 'cookie', 'cookies', 'login', 'register', 'signup', 'account', 'status', 'forum', 'community',
+    'team', 'about', 'history', 'location', 'locations', 'sitemap', 'newsletter', 'award', 'awards', 'sponsoring',
+}
+
+ANCHOR_WEIGHT = 1.5 # anchor texts describe the linked page better than its path
+KEYWORD_WEIGHT = 4 # per product keyword in the anchor text
+LOW_PRIORITY_PENALTY = 3
+DEPTH_PENALTY = 1 # per link between the landing page and the page
+YIELD_WEIGHT = 0.5 # per keyword found on the page linking to the url
+MAX_YIELD = 6
+
+def token_score(text: str):
+    """Return score of the product stems and low priority tokens in a lower case text"""
+    score = 0
+    for token in TOKEN_REGEX.findall(text):
+        if token in LOW_PRIORITY_TOKENS:
+            score -= LOW_PRIORITY_PENALTY
+        else:
+            for stem, weight in PRODUCT_STEMS.items():
+                if stem in token:
+                    score += weight
+                    break
+    return score
+
+def link_priority(url: str, anchor_text: str = '', depth: int = 1, parent_keywords: int = 0, anchor_keywords: int = 0):
+    """Return priority of a link, links with higher priority are crawled first"""
+    path = url.partition('://')[2].partition('/')[2]
+    return token_score(path) + ANCHOR_WEIGHT * token_score(anchor_text.lower()) + KEYWORD_WEIGHT * anchor_keywords \
+        + YIELD_WEIGHT * min(parent_keywords, MAX_YIELD) - DEPTH_PENALTY * depth
+
+class Frontier:
+    """Queue of urls to crawl in BFS order that accepts each url only once with constant time membership checks"""
+
+    def __init__(self, urls=()):
+        self._queue = deque()
+        self._seen = set()
+        for url in urls:
+            self.push(url)
+
+    def push(self, url: str, priority: float = 0):
+        """Append url to the end of the queue and return True if it was never queued before, the priority is ignored"""
+        if url in self._seen:
+            return False
+        self._seen.add(url)
+        self._queue.append(url)
+        return True
+
+    def pop(self):
+        """Remove and return the url at the beginning of the queue"""
+        return self._queue.popleft()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __bool__(self):
+        return len(self._queue) > 0
+
+    def __contains__(self, url: str):
+        """Return True if url is queued or was queued before, e.g. because it was crawled already"""
+        return url in self._seen
+
+class PriorityFrontier:
+    """Queue of urls to crawl in the order of their priority and then in the order they were queued
+
+    A queued url is moved up if it is pushed again with a higher priority, e.g. when another page links to it with
+    a better anchor text.
+    """
+
+    def __init__(self, urls=()):
+        self._heap = []
+        self._priorities = {} # priority of each queued url, None after it was popped
+        self._count = 0
+        self._size = 0
+        for url in urls:
+            self.push(url)
+
+    def push(self, url: str, priority: float = 0):
+        """Queue url and return True if it was never queued before or is still queued and gets a higher priority"""
+        if url in self._priorities:
+            queued = self._priorities[url]
+            if queued is None or priority <= queued:
+                return False
+        else:
+            self._size += 1
+        self._priorities[url] = priority
+        self._count += 1
+        heapq.heappush(self._heap, (-priority, self._count, url))
+        return True
+
+    def pop(self):
+        """Remove and return the url with the highest priority"""
+        while True:
+            priority, _, url = heapq.heappop(self._heap)
+            # skip entries of urls that were pushed again with a higher priority
+            if self._priorities[url] == -priority:
+                self._priorities[url] = None
+                self._size -= 1
+                return url
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __contains__(self, url: str):
+        """Return True if url is queued or was queued before, e.g. because it was crawled already"""
+        return url in self._priorities
@@ -5,6 +5,7 @@ Functions
 """
 
 import os
+import re
 import csv
 
 HTML_HEADER = { 'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36' }
@@ -23,7 +24,7 @@ BLOCKED_URLS = ('https://www.akamai.com', 'https://www.cloudflare.com', 'https:/
 
 def unifyurl(url: str):
     """Return url in unifyied form: lowercase, without parameters, anchors or trailing slash"""
-    return url.strip().split('?')[0].split('#')[0].rstrip('/').lower()
+    return url.strip().partition('?')[0].partition('#')[0].rstrip('/').lower()
 
 def baseurl(url: str):
     """Return domain name only for specified url including protocol but without trailing slash"""
@@ -39,6 +40,70 @@ def domain(url: str):
     """Return domain name only for specified url without protocol or trailing slash"""
     return url.strip().lower().replace('https://', '').replace('http://', '').split('/')[0]
 
+class UrlPolicy:
+    """Compiled url filter for blocked url endings and substrings that normalizes and classifies all links of a page at once"""
+
+    def __init__(self, blocked_url_endings=BLOCKED_URL_ENDINGS, blocked_url_substrings=BLOCKED_URL_SUBSTRINGS):
+        # endings like '/contact' or '.pdf' are looked up in a set with the part of the url after its last '/' or '.',
+        # all other endings like '/wp-admin/edit.php' are still checked with endswith
+        self.blocked_segments = set(ending for ending in blocked_url_endings if ending[:1] == '/' and '/' not in ending[1:])
+        self.blocked_extensions = set(ending for ending in blocked_url_endings if ending[:1] == '.' and '.' not in ending[1:])
+        self.other_endings = tuple(ending for ending in blocked_url_endings if ending not in self.blocked_segments and ending not in self.blocked_extensions)
+        self.substring_regex = re.compile('|'.join(re.escape(substring) for substring in blocked_url_substrings)) if blocked_url_substrings else None
+
+    def is_blocked(self, url: str):
+        """Return True if url ends with a blocked url ending or contains a blocked substring"""
+        return url[url.rfind('/'):] in self.blocked_segments \
+            or url[url.rfind('.'):] in self.blocked_extensions \
+            or (len(self.other_endings) > 0 and url.endswith(self.other_endings)) \
+            or (self.substring_regex is not None and self.substring_regex.search(url) is not None)
+
+    def crawlable_links(self, links, scopes):
+        """Return unified links of a page that start with one of the scopes and are not blocked, in the order of the page"""
+        crawlable = []
+        seen = set()
+        for link in links:
+            if link in seen:
+                continue
+            seen.add(link)
+
+            url = unifyurl(link)
+            if url.startswith(URL_BEGINNING) and url.startswith(scopes) and not self.is_blocked(url):
+                crawlable.append(url)
+        return crawlable
+
+    def classify_links(self, links, scopes):
+        """Return links of a page within the scopes and (base url, domain) of links to other websites that are not blocked
+
+        Links are only converted to lower case without trailing slash, so parameters like page numbers are kept.
+        """
+        internal = []
+        external = []
+        seen = set()
+        for link in links:
+            url = link.strip().rstrip('/').lower()
+            if url in seen:
+                continue
+            seen.add(url)
+
+            if url.startswith('https://'):
+                link_domain = url[8:].partition('/')[0]
+                base_url = 'https://' + link_domain
+            elif url.startswith('http://'):
+                link_domain = url[7:].partition('/')[0]
+                base_url = 'http://' + link_domain
+            else:
+                continue
+
+            if self.is_blocked(url):
+                continue
+
+            if url.startswith(scopes):
+                internal.append(url)
+            else:
+                external.append((base_url, link_domain))
+        return internal, external
+
 def deletefiles(filenames):
     """Delete each specified file if it exists"""
     for filename in filenames:
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+"""
+Hoster Merge normalizes, validates and deduplicates the urls of all sources of prepare_hosters.py. The rows of each
+source are read in chunks that are normalized and validated by a pool of worker processes, and the results are
+merged in the order of the chunks and sources, so the first source mentioning a domain still determines its url,
+company name and hoster ID.
+
+The merged hosters are kept in a dictionary per domain or, for sources with millions of urls, in a temporary SQLite
+database that only keeps a page cache of the specified size in memory and spills everything else to disk.
+"""
+
+import csv
+import sqlite3
+from collections import deque
+from functions import *
+
+CHUNK_ROWS = 10000 # number of rows normalized and validated at once by a worker process
+DEFAULT_MEMORY_MB = 256 # page cache of the SQLite database if the merge spills to disk
+
+def read_chunks(filename: str, chunk_rows: int = CHUNK_ROWS):
+    """Yield lists of (url, company name, hoster ID) rows of a CSV or text file without reading the whole file"""
+    chunk = []
+    with open(filename, 'r', newline='') as file:
+        if filename.lower().endswith('.csv'):
+            hosters_csv = filename.endswith('input/hosters.csv')
+            for row in csv.reader(file):
+                if hosters_csv and len(row) > 2:
+                    chunk.append((row[2], row[1], row[0]))
+                elif row and not hosters_csv:
+                    chunk.append((row[0], row[1] if len(row) > 1 else '', ''))
+                if len(chunk) >= chunk_rows:
+                    yield chunk
+                    chunk = []
+        else:
+            for line in file:
+                chunk.append((line, '', ''))
+                if len(chunk) >= chunk_rows:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+def normalize_chunk(chunk):
+    """Return number of valid urls, number of them with a company name and the first (domain, hoster) per domain"""
+    import validators
+
+    num_urls = 0
+    num_urls_with_company = 0
+    hosters = {}
+    for url, hoster_name, hoster_id in chunk:
+        url = unifyurl(url)
+        if url and validators.url(url):
+            num_urls += 1
+            hoster_name = hoster_name.strip()
+            if hoster_name == '-':
+                hoster_name = ''
+            if hoster_name:
+                num_urls_with_company += 1
+
+            d = domain(url)
+            if d not in hosters:
+
+                # use the base url without subfolders except the url contains '/en' for english
+                if '/' in url and not '/en' in url:
+                    url = baseurl(url)
+
+                hosters[d] = (url, hoster_name, hoster_id.strip())
+    return num_urls, num_urls_with_company, list(hosters.items())
+
+class DomainIndex:
+    """Merged hosters as (url, company name, hoster ID) per domain in memory"""
+
+    def __init__(self):
+        self.hosters = {}
+
+    def add(self, hosters):
+        """Add (domain, hoster) pairs whose domain was not yet added"""
+        index = self.hosters
+        for d, hoster in hosters:
+            if d not in index:
+                index[d] = hoster
+
+    def rows(self):
+        return iter(self.hosters.values())
+
+    def statistics(self):
+        """Return number of hosters with a company name, different company names and different hoster IDs"""
+        hosters = self.hosters.values()
+        return (sum(1 for hoster in hosters if hoster[1]), len(set(hoster[1] for hoster in hosters if hoster[1])),
+                len(set(hoster[2] for hoster in hosters if hoster[2])))
+
+    def __len__(self):
+        return len(self.hosters)
+
+    def close(self):
+        self.hosters = {}
+
+class SpillIndex:
+    """Merged hosters in a temporary SQLite database that uses at most memory_mb for its page cache"""
+
+    def __init__(self, filename: str, memory_mb: int = DEFAULT_MEMORY_MB):
+        self.filename = filename
+        deletefiles((filename,))
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute('PRAGMA journal_mode=OFF')
+        self.connection.execute('PRAGMA synchronous=OFF')
+        self.connection.execute(f'PRAGMA cache_size=-{max(1, memory_mb) * 1024}')
+        self.connection.execute('PRAGMA temp_store=FILE')
+        self.connection.execute('CREATE TABLE hosters (domain TEXT PRIMARY KEY, url TEXT NOT NULL, hoster_name TEXT NOT NULL, hoster_id TEXT NOT NULL)')
+
+    def add(self, hosters):
+        """Add (domain, hoster) pairs whose domain was not yet added"""
+        self.connection.executemany('INSERT OR IGNORE INTO hosters (domain, url, hoster_name, hoster_id) VALUES (?, ?, ?, ?)',
+                                    ((d,) + hoster for d, hoster in hosters))
+
+    def rows(self):
+        """Return (url, company name, hoster ID) of all hosters in the order they were added"""
+        return self.connection.execute('SELECT url, hoster_name, hoster_id FROM hosters ORDER BY rowid')
+
+    def statistics(self):
+        """Return number of hosters with a company name, different company names and different hoster IDs"""
+        return self.connection.execute("SELECT COUNT(*), COUNT(DISTINCT hoster_name), "
+                                       "(SELECT COUNT(DISTINCT hoster_id) FROM hosters WHERE hoster_id != '') "
+                                       "FROM hosters WHERE hoster_name != ''").fetchone()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM hosters').fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+        deletefiles((self.filename,))
+
+class HosterMerge:
+    """Normalizes and validates the chunks of each source in worker processes and adds them to the index in order"""
+
+    def __init__(self, index, workers: int = 1, chunk_rows: int = CHUNK_ROWS):
+        self.index = index
+        self.workers = max(1, workers)
+        self.chunk_rows = max(1, chunk_rows)
+        self.pool = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            import multiprocessing
+            self.pool = multiprocessing.Pool(self.workers)
+        return self
+
+    def __exit__(self, *exception):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def merge_file(self, filename: str):
+        """Add the hosters of a source to the index and return number of valid urls and number with a company name"""
+        counts = [0, 0]
+
+        if self.pool is None:
+            for chunk in read_chunks(filename, self.chunk_rows):
+                self._add(normalize_chunk(chunk), counts)
+            return tuple(counts)
+
+        # only read ahead two chunks per worker, so memory stays bounded, and merge the results in their order
+        pending = deque()
+        for chunk in read_chunks(filename, self.chunk_rows):
+            pending.append(self.pool.apply_async(normalize_chunk, (chunk,)))
+            while len(pending) > 2 * self.workers or (pending and pending[0].ready()):
+                self._add(pending.popleft().get(), counts)
+
+        while pending:
+            self._add(pending.popleft().get(), counts)
+        return tuple(counts)
+
+    def _add(self, result, counts):
+        num_urls, num_urls_with_company, hosters = result
+        counts[0] += num_urls
+        counts[1] += num_urls_with_company
+        self.index.add(hosters)
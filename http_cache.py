@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+"""
+HTTP Cache stores downloaded pages on disk, so re-scans can send conditional requests (If-None-Match and
+If-Modified-Since) and reuse the stored page if the server responds with 304 Not Modified.
+
+Each page is stored as two files named after the hash of its unified url: the page content (.body) and
+its metadata (.json). Entries that were not stored or revalidated within the maximum age are dropped and
+the least recently used entries are evicted as soon as the cache grows beyond its maximum size.
+
+Worker processes share the cache folder and its maximum size: the size of all entries is kept in a file of the
+folder that is only changed while holding an exclusive lock of it, and only one process prunes the cache at a time.
+"""
+
+import os
+import json
+import time
+import hashlib
+from contextlib import contextmanager
+from collections import namedtuple
+from functions import unifyurl
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None # e.g. on Windows the cache size is not locked, so processes sharing the cache may exceed it
+
+SIZE_FILE = 'cache.size' # size of all entries in bytes, also the lock of the cache folder
+
+CacheEntry = namedtuple('CacheEntry', ['url', 'final_url', 'content_type', 'etag', 'last_modified', 'stored_at', 'content'])
+
+class ResponseCache:
+    """On-disk cache of pages keyed by their unified url with a maximum size in bytes and a maximum age in seconds"""
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_age: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.size = 0 # size of all entries of all processes sharing the cache folder when it was changed last by this process
+        self.size_file = os.path.join(cache_dir, SIZE_FILE)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.prune()
+
+    @contextmanager
+    def _locked(self):
+        """Lock the size file of the cache folder exclusively and yield its file descriptor"""
+        fd = os.open(self.size_file, os.O_RDWR | os.O_CREAT)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield fd
+        finally:
+            # closing the file releases the lock
+            os.close(fd)
+
+    def _write_size(self, fd: int, size: int):
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, str(size).encode('ascii'))
+        self.size = size
+
+    def _change_size(self, delta: int):
+        """Add delta to the size of all entries shared by the processes using the cache folder and return the new size"""
+        with self._locked() as fd:
+            try:
+                size = int(os.read(fd, 32) or 0)
+            except ValueError:
+                size = 0
+            self._write_size(fd, max(0, size + delta))
+        return self.size
+
+    def _path(self, url: str):
+        """Return path of the cache files without extension for url"""
+        key = hashlib.sha1(unifyurl(url).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _remove(self, path: str):
+        """Remove cache files of an entry if they exist and return the bytes removed"""
+        try:
+            size = os.path.getsize(path + '.body')
+        except OSError:
+            size = 0
+
+        # other worker processes may share the cache folder and remove the same entry
+        for extension in ('.body', '.json'):
+            try:
+                os.remove(path + extension)
+            except OSError:
+                pass
+        return size
+
+    def get(self, url: str):
+        """Return CacheEntry for url or None if it is not cached or expired"""
+        path = self._path(url)
+        try:
+            if time.time() - os.path.getmtime(path + '.body') > self.max_age:
+                self._change_size(-self._remove(path))
+                return None
+
+            with open(path + '.json', 'r') as file:
+                meta = json.load(file)
+            with open(path + '.body', 'rb') as file:
+                content = file.read()
+        except (OSError, ValueError):
+            return None
+
+        return CacheEntry(meta['url'], meta['final_url'], meta['content_type'], meta['etag'], meta['last_modified'], meta['stored_at'], content)
+
+    def touch(self, entry: CacheEntry):
+        """Mark entry as revalidated, so its age starts again and it is evicted last"""
+        try:
+            os.utime(self._path(entry.url) + '.body')
+        except OSError:
+            pass
+
+    def put(self, url: str, final_url: str, headers, content: bytes):
+        """Store page if the server sent an ETag or Last-Modified header to revalidate it later"""
+        etag = headers.get('ETag', '')
+        last_modified = headers.get('Last-Modified', '')
+        if not etag and not last_modified:
+            return
+
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        removed = self._remove(path)
+
+        meta = { 'url': unifyurl(url), 'final_url': final_url, 'content_type': headers.get('Content-Type', ''),
+                 'etag': etag, 'last_modified': last_modified, 'stored_at': time.time() }
+
+        # write to temporary files first, so an interrupted run never leaves a partial entry
+        with open(path + '.body.tmp', 'wb') as file:
+            file.write(content)
+        with open(path + '.json.tmp', 'w') as file:
+            json.dump(meta, file)
+        os.replace(path + '.body.tmp', path + '.body')
+        os.replace(path + '.json.tmp', path + '.json')
+
+        if self._change_size(len(content) - removed) > self.max_bytes:
+            self.prune()
+
+    def prune(self):
+        """Remove expired entries and the least recently used entries until the cache is below 90% of its maximum size"""
+        with self._locked() as fd:
+            # measure the whole folder, since other processes sharing it may have added or removed entries
+            entries = []
+            size = 0
+            now = time.time()
+            for folder in os.scandir(self.cache_dir):
+                if folder.is_dir():
+                    for file in os.scandir(folder.path):
+                        if file.name.endswith('.body'):
+                            try:
+                                stat = file.stat()
+                            except OSError:
+                                # replaced by another process in the meantime
+                                continue
+                            path = file.path[:-len('.body')]
+                            if now - stat.st_mtime > self.max_age:
+                                self._remove(path)
+                            else:
+                                entries.append((stat.st_mtime, stat.st_size, path))
+                                size += stat.st_size
+
+            if size > self.max_bytes:
+                for _, _, path in sorted(entries):
+                    size -= self._remove(path)
+                    if size <= self.max_bytes * 0.9:
+                        break
+
+            self._write_size(fd, size)
+
+def conditional_headers(entry: CacheEntry):
+    """Return request headers to revalidate a cached page"""
+    headers = {}
+    if entry.etag:
+        headers['If-None-Match'] = entry.etag
+    if entry.last_modified:
+        headers['If-Modified-Since'] = entry.last_modified
+    return headers
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+Keyword Matcher finds all keywords of a keyword list in a page text with a single pass over the text
+instead of searching the text once for each keyword.
+
+The pyahocorasick module is used if it is installed (pip install pyahocorasick). Otherwise the keywords
+are compiled into one regular expression in form of a trie, so the text is scanned by the re module
+and only positions where a keyword starts are handled in Python.
+"""
+
+import re
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+MATCHER_BACKENDS = ('auto', 'ahocorasick', 're')
+
+def _trie_regex(words):
+    """Return regular expression matching the longest of the specified words at a position"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def node_regex(node):
+        alternatives = [re.escape(char) + node_regex(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ''
+        regex = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+        return '(?:' + regex + ')?' if '' in node else regex
+
+    return node_regex(trie)
+
+class KeywordMatcher:
+    """Compiled matcher for a list of keywords, matching case insensitive substrings like 'keyword.lower() in text.lower()'"""
+
+    def __init__(self, keywords, backend: str = 'auto'):
+        if backend not in MATCHER_BACKENDS:
+            raise ValueError(f'Unknown matcher backend {backend}, use one of {", ".join(MATCHER_BACKENDS)}')
+        if backend == 'ahocorasick' and ahocorasick is None:
+            raise ImportError('The ahocorasick backend requires the pyahocorasick module: pip install pyahocorasick')
+
+        self.keywords = list(keywords)
+
+        # different keywords may have the same lower case spelling, so each term maps to a list of keyword indices
+        self.term_to_indices = {}
+        for i, keyword in enumerate(self.keywords):
+            if keyword:
+                self.term_to_indices.setdefault(keyword.lower(), []).append(i)
+        terms = list(self.term_to_indices.keys())
+
+        if backend == 'auto':
+            backend = 'ahocorasick' if ahocorasick is not None else 're'
+        self.backend = backend
+
+        if backend == 'ahocorasick':
+            self._automaton = ahocorasick.Automaton()
+            for term in terms:
+                self._automaton.add_word(term, (len(term), self.term_to_indices[term]))
+            if terms:
+                self._automaton.make_automaton()
+        else:
+            # the regex only finds the longest term starting at a position, so remember all shorter terms
+            # that are a prefix of it since they start at the same position as well
+            self._regex = re.compile(_trie_regex(terms)) if terms else None
+            self._prefix_indices = {}
+            for term in terms:
+                self._prefix_indices[term] = [i for j in range(1, len(term) + 1) if term[:j] in self.term_to_indices
+                                              for i in self.term_to_indices[term[:j]]]
+
+    def find_all(self, text: str):
+        """Yield (position in lower case text, keyword index) for each occurrence of each keyword, overlapping ones included"""
+        text = text.lower()
+
+        if self.backend == 'ahocorasick':
+            if not self.term_to_indices:
+                return
+            for end, (length, indices) in self._automaton.iter(text):
+                for i in indices:
+                    yield end - length + 1, i
+        elif self._regex is not None:
+            search = self._regex.search
+            prefix_indices = self._prefix_indices
+            match = search(text)
+            while match:
+                position = match.start()
+                for i in prefix_indices[match.group()]:
+                    yield position, i
+                match = search(text, position + 1)
+
+    def match(self, text: str):
+        """Return sorted list of indices of all keywords that are mentioned in text"""
+        return sorted(set(i for _, i in self.find_all(text)))
+
+    def count(self, text: str):
+        """Return dictionary with the index of each keyword mentioned in text as key and its number of occurrences as value"""
+        counts = {}
+        for _, i in self.find_all(text):
+            counts[i] = counts.get(i, 0) + 1
+        return counts
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+
+"""
+Listing Collector crawls listing websites linking to many hosting companies, collects all those urls, unifies them
+in style and deduplicates them. The result list can be used as hosters.csv for scan_hosters.py. collect_urls.py is
+the command line interface of the Listing Collector.
+
+Like the Scanner the Listing Collector can be embedded in other programs with separate load, crawl and report
+methods and a replaceable fetcher and parser, and requests and bs4 are only imported when pages are crawled.
+
+Several listing sites are crawled concurrently in threads, each with its own session and the pages of one listing
+site one after another. The found urls of a finished listing site are deduplicated in the main thread in the order
+of the listing sites, so the output files are the same as if the listing sites were crawled one after another.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from functions import *
+from frontier import Frontier
+from page_parser import parse_page, parser_available
+from rate_control import RateController, DEFAULT_MAX_DELAY
+from metrics import Metrics, NullMetrics, phase, DEFAULT_EXPORT_INTERVAL
+from fetcher import fetch_page, content_length, SkippedResponse, ThrottledResponse, DEFAULT_MAX_PAGE_BYTES
+from circuit_breaker import DEFAULT_RETRIES
+from fingerprints import FingerprintSet, BloomFilter
+from output_writer import OutputWriter, DEFAULT_FLUSH_INTERVAL
+from scanner import ScanError
+
+DEFAULT_CONCURRENCY = 8 # number of listing sites crawled at the same time
+
+class CollectOptions:
+    """Options of collecting urls with the same names and defaults as the command line options of collect_urls.py"""
+
+    DEFAULTS = {
+        'max_depth': 500,
+        'concurrency': DEFAULT_CONCURRENCY,
+        'bloom_filter': 0,
+        'mmap_dir': '',
+        'flush_interval': DEFAULT_FLUSH_INTERVAL,
+        'fsync_every': 0,
+        'parser': 'bs4',
+        'max_page_bytes': DEFAULT_MAX_PAGE_BYTES,
+        'max_crawl_delay': DEFAULT_MAX_DELAY,
+        'metrics': '',
+        'metrics_interval': DEFAULT_EXPORT_INTERVAL,
+        'reset': False,
+        'import_urls': '',
+        'listing_sites': '',
+        'blocked_url_endings': '',
+        'debug': False,
+        'print_errors': False,
+        'print_sites': False
+    }
+
+    def __init__(self, **options):
+        for name, value in self.DEFAULTS.items():
+            setattr(self, name, options.pop(name, value))
+        if options:
+            raise TypeError('Unknown collect options: ' + ', '.join(options))
+
+def listing_site_domains(listing_sites):
+    """Return set with the domains of all listing sites and their parent domains, like www.example.com and example.com"""
+    domains = set()
+    for listing_site_url in listing_sites:
+        labels = domain(listing_site_url).split('.')
+        for i in range(len(labels) - 1):
+            domains.add('.'.join(labels[i:]))
+    return domains
+
+class ListingSiteCrawl:
+    """Crawled urls, urls with errors, found links and counters of one listing site, merged after it is finished"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.urls_crawled_new = []
+        self.urls_with_errors_new = []
+        self.errors = []
+        self.external_links = {}
+        self.timings = []
+        self.num_pages_skipped_no_html = 0
+        self.num_pages_truncated = 0
+        self.num_bytes_not_downloaded = 0
+
+class ListingCollector:
+    """Crawls listing sites and collects the urls of the websites they link to as possible hoster urls
+
+    fetcher is called like fetcher.fetch_page(session, url, timeout, max_page_bytes, rate_controller=rate_controller)
+    and parser like parse_page(content, content_type, timings).
+    """
+
+    def __init__(self, options: CollectOptions = None, fetcher = None, parser = None):
+        options = options or CollectOptions()
+        self.options = options
+
+        # Define the input file paths, changed if specified by the options
+        self.listing_sites_txt = options.listing_sites if options.listing_sites and os.path.exists(options.listing_sites) else 'input/listing_sites.txt'
+        self.blocked_url_endings_txt = options.blocked_url_endings if options.blocked_url_endings and os.path.exists(options.blocked_url_endings) else 'input/blocked_url_endings.txt'
+
+        # Define the output file paths
+        self.error_log = 'output/crawling_errors.log'
+        self.urls_crawled_txt = 'output/listing_site_urls_crawled.txt'
+        self.urls_with_errors_txt = 'output/listing_site_urls_with_errors.txt'
+        self.urls_found_txt = 'output/possible_hoster_urls_found.txt'
+
+        # Number of links to crawl (default = 30)
+        self.num_links_to_crawl = options.max_depth
+        self.debug = options.debug
+        self.print_errors = options.debug or options.print_errors
+        self.print_sites = options.debug or options.print_sites
+        self.parser_backend = options.parser
+        self.max_page_bytes = max(1, options.max_page_bytes)
+        self.concurrency = max(1, options.concurrency)
+        self.local = threading.local()
+
+        # Replaceable components for downloading and parsing
+        self.fetcher = fetcher or fetch_page
+        self.parser = parser or self.parse_page
+
+        # Append the urls of each finished listing site to the output files in a background thread
+        self.writer = OutputWriter(options.flush_interval, options.fsync_every)
+
+        # Measure the seconds of each phase per page only if metrics are specified
+        self.metrics = Metrics(options.metrics, 'collect_urls', options.metrics_interval) if options.metrics else NullMetrics()
+
+        # Adapt intervals between requests to the responses of each listing site
+        self.rate_controller = RateController(1, max(0, options.max_crawl_delay))
+
+        # List of listing website that should be crawled and their domains, which are no possible hoster urls
+        self.listing_sites = []
+        self.listing_site_domains = set()
+        self.url_policy = None
+
+        # Crawled and found urls are only deduplicated by their fingerprints, optionally in memory-mapped files, or
+        # with a Bloom filter of the expected number of urls, the urls themselves are only written to the text files
+        self.urls_crawled = FingerprintSet(filename=self.mmap_file('listing_site_urls_crawled'))
+        self.possible_hoster_urls = BloomFilter(options.bloom_filter) if options.bloom_filter > 0 else FingerprintSet(filename=self.mmap_file('possible_hoster_urls'))
+        self.num_listing_sites_checked = 0
+        self.num_urls_crawled = 0
+        self.num_crawl_errors = 0
+        self.num_possible_hoster_urls_found = 0
+        self.num_pages_skipped_no_html = 0
+        self.num_pages_truncated = 0
+        self.num_bytes_not_downloaded = 0
+
+    def mmap_file(self, name: str):
+        """Return path of the memory-mapped file of a fingerprint set or None if they are kept in memory"""
+        if not self.options.mmap_dir:
+            return None
+        if not os.path.exists(self.options.mmap_dir):
+            os.makedirs(self.options.mmap_dir)
+        return os.path.join(self.options.mmap_dir, f'{name}.{os.getpid()}.fingerprints')
+
+    def parse_page(self, content: bytes, content_type: str, timings: dict = None):
+        """Parse a page with the parser backend of the options"""
+        return parse_page(content, content_type, self.parser_backend, timings)
+
+    def load_listing_sites(self):
+        """Load list of listing sites from text file"""
+        if os.path.exists(self.listing_sites_txt):
+            with open(self.listing_sites_txt, 'r') as file:
+                self.listing_sites = [line.strip().rstrip('/').lower() for line in file if line.strip()]
+        self.listing_site_domains = listing_site_domains(self.listing_sites)
+
+    def list_sites(self):
+        """Print all listing sites"""
+        for listing_site_url in self.listing_sites:
+            print(domain(listing_site_url), '(' + listing_site_url + ')')
+
+        print()
+        print('{:>7,}'.format(len(self.listing_sites)), 'listing sites imported from', self.listing_sites_txt)
+
+    def load(self):
+        """Check the parser, load listing sites, blocked url endings and the results of previous runs"""
+        if self.parser == self.parse_page and not parser_available(self.parser_backend):
+            raise ScanError(f'The {self.parser_backend} parser requires the {self.parser_backend} module: pip install {self.parser_backend}')
+
+        # Make sure the output folder exists
+        if not os.path.exists('output'):
+            os.makedirs('output')
+
+        if self.options.reset:
+            deletefiles((self.urls_crawled_txt, self.urls_with_errors_txt, self.urls_found_txt, self.error_log))
+
+        # Load list of blocked url endings from text file
+        blocked_url_endings = BLOCKED_URL_ENDINGS
+        if os.path.exists(self.blocked_url_endings_txt):
+            with open(self.blocked_url_endings_txt, 'r') as file:
+                blocked_url_endings = tuple([line.strip().rstrip('/').lower() for line in file if line.strip()])
+
+        # Compile blocked url endings and substrings into one url filter
+        self.url_policy = UrlPolicy(blocked_url_endings, BLOCKED_URL_SUBSTRINGS)
+
+        self.load_listing_sites()
+        self.import_existing_data()
+
+    def import_existing_data(self):
+        """Import crawled urls, urls with errors and found urls of previous runs and the urls of the import file"""
+
+        # Import crawled urls
+        if os.path.exists(self.urls_crawled_txt):
+            with open(self.urls_crawled_txt, 'r') as urls_crawled_file:
+                for line in urls_crawled_file:
+                    if line.strip():
+                        self.urls_crawled.add(line.strip())
+                        self.num_urls_crawled += 1
+
+        # Import urls with errors
+        if os.path.exists(self.urls_with_errors_txt):
+            with open(self.urls_with_errors_txt, 'r') as urls_with_errors_file:
+                self.num_crawl_errors = sum(1 for line in urls_with_errors_file)
+
+        # Import urls with errors
+        if os.path.exists(self.urls_found_txt):
+            with open(self.urls_found_txt, 'r') as urls_found_file:
+                for line in urls_found_file:
+                    if line.strip():
+                        self.possible_hoster_urls.add(line.strip())
+                        self.num_possible_hoster_urls_found += 1
+
+        # Import list of hoster urls if specified
+        if self.options.import_urls and os.path.exists(self.options.import_urls):
+            with open(self.options.import_urls, 'r') as import_urls_file:
+                for line in import_urls_file.readlines():
+                    hoster_url = unifyurl(line)
+                    if hoster_url.startswith(URL_BEGINNING):
+                       self.possible_hoster_urls.add(hoster_url)
+
+    def thread_session(self):
+        """Return the session of the current thread, since sessions can't be shared between threads"""
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            from fetcher import create_session
+            session = self.local.session = create_session(HTML_HEADER)
+        return session
+
+    def crawl(self):
+        """Crawl all listing sites that were not yet crawled, several listing sites at the same time"""
+
+        # only crawl if listing site is a real url and was not yet crawled
+        listing_sites = [listing_site_url for listing_site_url in self.listing_sites
+                         if listing_site_url.startswith(URL_BEGINNING) and listing_site_url not in self.urls_crawled]
+
+        if self.concurrency == 1 or len(listing_sites) <= 1:
+            for listing_site_url in listing_sites:
+                self.finish_listing_site(self.crawl_listing_site(listing_site_url))
+        else:
+            # finish the listing sites in their order while later listing sites are still crawled
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(listing_sites))) as executor:
+                for site in executor.map(self.crawl_listing_site, listing_sites):
+                    self.finish_listing_site(site)
+
+        # Write all queued urls, so the output files are complete
+        self.writer.flush()
+
+    def crawl_listing_site(self, listing_site_url: str):
+        """Crawl all pages of a listing site up to the maximum depth and return them as ListingSiteCrawl
+
+        This only reads the shared state of the collector, so several listing sites can be crawled in threads.
+        """
+        import requests
+
+        session = self.thread_session()
+        collect_timings = self.metrics.enabled
+        urls_crawled = self.urls_crawled
+        parsed_listing_site_url = urlparse(listing_site_url).netloc
+        listing_site_base_url = baseurl(listing_site_url)
+        frontier = Frontier([listing_site_url])
+        site = ListingSiteCrawl(listing_site_url)
+        external_links = site.external_links
+        visited = set()
+        crawled = set()
+        throttled = deque() # visited urls that are requested again after 429 or 503 responses
+        throttled_attempts = {}
+
+        if self.print_sites:
+            print(listing_site_url)
+
+        # Loop over all pages of this website to crawl, throttled urls wait for the interval of the listing site
+        while throttled or (frontier and len(visited) < self.num_links_to_crawl):
+            url = throttled.popleft() if throttled else frontier.pop()
+            if url not in visited or url in throttled_attempts:
+                visited.add(url)
+
+                if self.debug:
+                    print('      ', url)
+
+                # Download page HTML
+                try:
+                    page = self.fetcher(session, url, HTTP_GET_TIMEOUT, self.max_page_bytes, rate_controller=self.rate_controller)
+                except SkippedResponse as e:
+                    site.num_pages_skipped_no_html += 1
+                    site.num_bytes_not_downloaded += e.bytes_saved
+                    continue
+                except ThrottledResponse as e:
+                    if throttled_attempts.get(url, 0) < DEFAULT_RETRIES:
+                        throttled_attempts[url] = throttled_attempts.get(url, 0) + 1
+                        throttled.append(url)
+                        continue
+                    if self.print_errors:
+                        print(f'Error downloading page {url} from {listing_site_url}: {e}')
+                    site.urls_with_errors_new.append(url)
+                    site.errors.append(f"Error downloading page {url} from {listing_site_url}: {e}\n")
+                    continue
+                except requests.exceptions.RequestException as e:
+                    if self.print_errors:
+                        print(f'Error downloading page {url} from {listing_site_url}: {e}')
+                    site.urls_with_errors_new.append(url)
+                    site.errors.append(f"Error downloading page {url} from {listing_site_url}: {e}\n")
+                    continue
+
+                if page.truncated:
+                    site.num_pages_truncated += 1
+                    site.num_bytes_not_downloaded += max(0, content_length(page.headers) - self.max_page_bytes)
+
+                # Parse HTML into visible text and links
+                timings = page.timings if collect_timings else None
+                parsed = self.parser(page.content, page.headers.get('Content-Type', ''), timings)
+
+                # document that we crawled this url already
+                crawled.add(url)
+                site.urls_crawled_new.append(url)
+
+                # also document if the response url is different than the initial one due to redirects
+                response_url = unifyurl(page.url)
+                response_base_url = baseurl(response_url)
+                if (parsed_listing_site_url not in response_url) and (response_url not in urls_crawled) and (response_url not in crawled):
+                    crawled.add(response_url)
+                    site.urls_crawled_new.append(response_url)
+
+                # Find possible hoster links and add links from same domain to the queue for further crawling
+                # Only crawl subpage if it belongs to the listing website and was not yet crawled
+                # only accept links starting with http(s):// and not ending with a media file extension
+                # remove the trailing slash for consistency and prevent duplicate crawls
+                # don't crawl blog articles since they don't really matter for this topic
+                # take lower case url and remove trailing '/'
+                with phase(timings, 'links'):
+                    internal_links, page_external_links = self.url_policy.classify_links(parsed.links, (listing_site_base_url, response_base_url))
+
+                    # if url is from the same listing site, add to queue for crawling
+                    for link_url in internal_links:
+                        if link_url not in frontier:
+                            frontier.push(link_url)
+
+                    # else remember url as possible hoster url in the order it was found
+                    for link_base_url, link_domain in page_external_links:
+                        if link_base_url not in external_links:
+                            external_links[link_base_url] = link_domain
+
+                if timings is not None:
+                    site.timings.append(timings)
+
+        if self.debug:
+            print('      ', 'rate of', domain(listing_site_url) + ':', self.rate_controller.describe(listing_site_url))
+
+        return site
+
+    def discover(self, external_links):
+        """Return new possible hoster urls of (base url, domain) links that don't belong to a listing site"""
+        possible_hoster_urls = self.possible_hoster_urls
+        listing_site_domains = self.listing_site_domains
+        new_urls = []
+        for link_base_url, link_domain in external_links:
+            if link_domain not in listing_site_domains and possible_hoster_urls.add(link_base_url):
+                new_urls.append(link_base_url)
+        self.num_possible_hoster_urls_found += len(new_urls)
+        return new_urls
+
+    def finish_listing_site(self, site: ListingSiteCrawl):
+        """Deduplicate the found urls of a crawled listing site and append them and the crawled urls to the output files"""
+        metrics = self.metrics
+        self.num_listing_sites_checked += 1
+        self.num_pages_skipped_no_html += site.num_pages_skipped_no_html
+        self.num_pages_truncated += site.num_pages_truncated
+        self.num_bytes_not_downloaded += site.num_bytes_not_downloaded
+
+        for timings in site.timings:
+            metrics.add(site.url, timings)
+        metrics.count('pages', len(site.timings))
+        metrics.count('errors', len(site.errors))
+
+        start = time.perf_counter()
+        possible_hoster_urls_new = self.discover(site.external_links.items())
+
+        # Append all crawled urls to the crawler log file
+        writer = self.writer
+        self.urls_crawled.update(site.urls_crawled_new)
+        self.num_urls_crawled += len(site.urls_crawled_new)
+        writer.write_lines(self.urls_crawled_txt, site.urls_crawled_new)
+
+        # Append all urls with errors to the error log file and document the errors
+        self.num_crawl_errors += len(site.urls_with_errors_new)
+        writer.write_lines(self.urls_with_errors_txt, site.urls_with_errors_new)
+        writer.write_lines(self.error_log, [error.rstrip('\n') for error in site.errors])
+
+        # Append all found possible hoster urls to output text file
+        writer.write_lines(self.urls_found_txt, possible_hoster_urls_new)
+
+        if metrics.enabled:
+            metrics.add(site.url, { 'write': time.perf_counter() - start })
+            metrics.finish_hoster(site.url)
+
+    def print_statistics(self):
+        """Print general statistics and the seconds spent in each phase if metrics are specified"""
+        if self.num_urls_crawled > 0 and self.num_crawl_errors > 0:
+            perc_crawl_errors = '{:.1%}'.format(self.num_crawl_errors / self.num_urls_crawled)
+        else:
+            perc_crawl_errors = '0.0%'
+
+        # Print general statistics
+        print('{:>7,}'.format(self.num_listing_sites_checked), 'listing sites crawled from', self.listing_sites_txt)
+        print('{:>7,}'.format(self.num_urls_crawled), 'URLs crawled and saved to', self.urls_crawled_txt)
+        print('{:>7,}'.format(self.num_crawl_errors), 'URLs skipped (' + perc_crawl_errors + ') due to crawling errors and saved to', self.urls_with_errors_txt)
+        print('{:>7,}'.format(self.num_pages_skipped_no_html), 'URLs skipped since they are no HTML pages')
+        print('{:>7,}'.format(self.num_pages_truncated), 'pages truncated to', '{:,}'.format(self.max_page_bytes), 'bytes')
+        print('{:>7,.1f}'.format(self.num_bytes_not_downloaded / 1000000), 'MB not downloaded due to skipped and truncated pages')
+        print('{:>7,}'.format(self.num_possible_hoster_urls_found), 'possible Hoster URLs found and saved to', self.urls_found_txt)
+
+        # Print seconds spent in each phase if metrics are specified
+        if self.metrics.enabled:
+            self.metrics.export()
+            print()
+            print('Seconds spent in each phase of crawling a page, exported to', self.options.metrics)
+            for line in self.metrics.summary():
+                print(line)
+
+    def close(self):
+        """Write all queued urls, release the fingerprints of crawled and found urls and delete their memory-mapped files"""
+        self.writer.close()
+        self.urls_crawled.close()
+        self.possible_hoster_urls.close()
+
+    def run(self):
+        """Load all inputs, crawl all listing sites and print the statistics like collect_urls.py"""
+        self.load()
+        try:
+            self.crawl()
+        finally:
+            self.close()
+        self.print_statistics()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+"""
+Metrics measure the time spent in each phase of the per-page loop, like waiting for the rate limit, connecting
+and receiving the response headers, downloading the body, parsing the HTML, extracting the text, matching the
+keywords, filtering the links and writing the output files.
+
+The seconds of each phase are aggregated in latency histograms per phase and per hoster. The histograms per
+phase are exported periodically to a Prometheus textfile (file name ending with .prom) or appended as JSON line
+to a metrics file, which also gets one line with the histograms of each finished hoster. If metrics are disabled,
+NullMetrics and a phase without timings dictionary do nothing, so the per-page loop is not slowed down.
+"""
+
+import os
+import json
+import time
+import heapq
+from bisect import bisect_left
+
+# upper bounds in seconds of the histogram buckets, the last bucket counts everything above
+BUCKET_BOUNDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DEFAULT_EXPORT_INTERVAL = 60 # seconds between two exports of the metrics file
+SLOWEST_HOSTERS = 5 # number of hosters with the most seconds listed in the summary
+
+class phase:
+    """Context manager adding the seconds of a phase to a timings dictionary, does nothing if timings is None"""
+
+    __slots__ = ('timings', 'name', 'start')
+
+    def __init__(self, timings: dict, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        if self.timings is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        if self.timings is not None:
+            self.timings[self.name] = self.timings.get(self.name, 0.0) + time.perf_counter() - self.start
+
+class Histogram:
+    """Number of observed seconds per bucket, their sum and maximum"""
+
+    __slots__ = ('buckets', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.buckets[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float):
+        """Return upper bound of the bucket containing the q-th percentile, at most the maximum"""
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket in enumerate(self.buckets):
+            cumulative += bucket
+            if bucket > 0 and cumulative >= rank:
+                return min(BUCKET_BOUNDS[i], self.max) if i < len(BUCKET_BOUNDS) else self.max
+        return 0.0
+
+    def merge(self, other: dict):
+        """Add the values of a histogram saved with to_dict"""
+        self.buckets = [a + b for a, b in zip(self.buckets, other['buckets'])]
+        self.count += other['count']
+        self.sum += other['sum']
+        self.max = max(self.max, other['max'])
+
+    def to_dict(self):
+        return { 'count': self.count, 'sum': round(self.sum, 6), 'max': round(self.max, 6),
+                 'p50': self.percentile(0.5), 'p95': self.percentile(0.95), 'p99': self.percentile(0.99), 'buckets': self.buckets }
+
+class Metrics:
+    """Histograms of the seconds per phase and per hoster, counters and their periodic export to filename"""
+
+    enabled = True
+
+    def __init__(self, filename: str, prefix: str = 'hoster_scan', interval: float = DEFAULT_EXPORT_INTERVAL):
+        self.filename = filename
+        self.prefix = prefix
+        self.interval = interval
+        self.prometheus = filename.endswith('.prom')
+        self.phases = {}
+        self.hosters = {}
+        self.counters = {}
+        self.slowest = []
+        self.next_export = time.monotonic() + interval
+
+    def add(self, hoster: str, timings: dict):
+        """Add the seconds of each phase in timings to the histograms of the phase and of the hoster"""
+        hoster_phases = self.hosters.get(hoster)
+        if hoster_phases is None:
+            hoster_phases = self.hosters[hoster] = {}
+
+        for name, seconds in timings.items():
+            histogram = self.phases.get(name)
+            if histogram is None:
+                histogram = self.phases[name] = Histogram()
+            histogram.observe(seconds)
+
+            histogram = hoster_phases.get(name)
+            if histogram is None:
+                histogram = hoster_phases[name] = Histogram()
+            histogram.observe(seconds)
+
+        if time.monotonic() >= self.next_export:
+            self.export()
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def finish_hoster(self, hoster: str):
+        """Remove the histograms of a finished hoster, append them to a JSON lines file and remember the slowest hosters"""
+        hoster_phases = self.hosters.pop(hoster, None)
+        if not hoster_phases:
+            return
+
+        seconds = sum(histogram.sum for histogram in hoster_phases.values())
+        if len(self.slowest) < SLOWEST_HOSTERS:
+            heapq.heappush(self.slowest, (seconds, hoster))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, hoster))
+
+        if not self.prometheus:
+            self._append({ 'time': round(time.time(), 3), 'type': 'hoster', 'hoster': hoster, 'seconds': round(seconds, 6),
+                           'phases': { name: histogram.to_dict() for name, histogram in hoster_phases.items() } })
+
+    def export(self):
+        """Write the histograms per phase and the counters to the Prometheus textfile or append them to the JSON lines file"""
+        self.next_export = time.monotonic() + self.interval
+        if self.prometheus:
+            # write to a temporary file first, so the textfile collector never reads a partial file
+            with open(self.filename + '.tmp', 'w') as file:
+                file.write(self.prometheus_text())
+            os.replace(self.filename + '.tmp', self.filename)
+        else:
+            self._append({ 'time': round(time.time(), 3), 'type': 'phases', 'counters': self.counters,
+                           'phases': { name: histogram.to_dict() for name, histogram in self.phases.items() } })
+
+    def prometheus_text(self):
+        """Return histograms per phase and counters in the Prometheus text format"""
+        name = self.prefix + '_phase_seconds'
+        lines = [f'# HELP {name} Seconds spent in each phase of crawling a page', f'# TYPE {name} histogram']
+        for phase_name, histogram in sorted(self.phases.items()):
+            cumulative = 0
+            for bound, bucket in zip(BUCKET_BOUNDS + ('+Inf',), histogram.buckets):
+                cumulative += bucket
+                lines.append(f'{name}_bucket{{phase="{phase_name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{phase="{phase_name}"}} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{{phase="{phase_name}"}} {histogram.count}')
+
+        for counter, value in sorted(self.counters.items()):
+            lines.append(f'# TYPE {self.prefix}_{counter}_total counter')
+            lines.append(f'{self.prefix}_{counter}_total {value}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """Return lines with the seconds, share and percentiles of each phase and the slowest hosters for the statistics"""
+        total = sum(histogram.sum for histogram in self.phases.values())
+        if total <= 0:
+            return []
+
+        lines = ['{:<12} {:>9} {:>11} {:>7} {:>9} {:>9} {:>9}'.format('Phase', 'Count', 'Seconds', '%', 'p50 ms', 'p95 ms', 'p99 ms')]
+        for name, histogram in sorted(self.phases.items(), key=lambda item: item[1].sum, reverse=True):
+            lines.append('{:<12} {:>9,} {:>11,.1f} {:>7.1%} {:>9,.1f} {:>9,.1f} {:>9,.1f}'.format(
+                name, histogram.count, histogram.sum, histogram.sum / total,
+                histogram.percentile(0.5) * 1000, histogram.percentile(0.95) * 1000, histogram.percentile(0.99) * 1000))
+
+        if self.slowest:
+            lines.append('')
+            lines.append('Slowest websites: ' + ', '.join('{} ({:,.1f}s)'.format(hoster, seconds) for seconds, hoster in sorted(self.slowest, reverse=True)))
+        return lines
+
+    def save(self, filename: str):
+        """Save histograms per phase, counters and slowest hosters as JSON, so worker processes can be merged"""
+        with open(filename, 'w') as file:
+            json.dump({ 'phases': { name: histogram.to_dict() for name, histogram in self.phases.items() },
+                        'counters': self.counters, 'slowest': self.slowest }, file)
+
+    def merge(self, filename: str):
+        """Add histograms, counters and slowest hosters saved by another process"""
+        with open(filename, 'r') as file:
+            saved = json.load(file)
+
+        for name, values in saved['phases'].items():
+            self.phases.setdefault(name, Histogram()).merge(values)
+        for counter, value in saved['counters'].items():
+            self.count(counter, value)
+        self.slowest = heapq.nlargest(SLOWEST_HOSTERS, self.slowest + [tuple(item) for item in saved['slowest']])
+        heapq.heapify(self.slowest)
+
+    def _append(self, record: dict):
+        with open(self.filename, 'a+') as file:
+            file.write(json.dumps(record) + '\n')
+
+class NullMetrics:
+    """Metrics that are disabled and don't measure anything"""
+
+    enabled = False
+
+    def add(self, hoster: str, timings: dict):
+        pass
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+    def finish_hoster(self, hoster: str):
+        pass
+
+    def export(self):
+        pass
+
+    def summary(self):
+        return []
+
+    def save(self, filename: str):
+        pass
+
+    def merge(self, filename: str):
+        pass
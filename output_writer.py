@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+"""
+Output Writer owns the output files that are appended to while crawling, like urls_crawled.txt, crawling_errors.log
+or hosters_with_keywords.csv, and writes them in a background thread instead of opening and closing each file for
+every hoster in the crawl loop.
+
+Records are passed over a queue and written in batches: all records that arrive within the flush interval are joined
+per file and written with one write call, so the files only contain complete records even if the process is killed.
+With fsync_every the written files are also synced to disk after that number of records, otherwise this is left to
+the operating system. flush waits until all queued records are written and closes the files, so they can be read,
+replaced or deleted, and close additionally syncs them and stops the thread, also at exit of the program.
+"""
+
+import io
+import os
+import csv
+import time
+import queue
+import atexit
+import threading
+
+DEFAULT_FLUSH_INTERVAL = 1.0 # seconds between two writes of the queued records
+MAX_QUEUED_RECORDS = 10000 # adding records waits while the writer is that far behind
+
+def csv_line(row):
+    """Return row formatted as line of a CSV file without line break"""
+    line = io.StringIO()
+    csv.writer(line, lineterminator='').writerow(row)
+    return line.getvalue()
+
+class OutputWriter:
+    """Appends records to output files in batches in a background thread, optionally with fsync after fsync_every records"""
+
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL, fsync_every: int = 0):
+        self.flush_interval = max(0.0, flush_interval)
+        self.fsync_every = max(0, fsync_every)
+        self.queue = queue.Queue(MAX_QUEUED_RECORDS)
+        self.thread = None
+        self.error = None
+        self.files = {}
+        self.num_records = 0
+        self.num_writes = 0
+        self.num_fsyncs = 0
+
+    def write_lines(self, filename: str, lines):
+        """Append lines to a file as one record, does nothing if there are no lines"""
+        text = ''.join(f"{line}\n" for line in lines)
+        if text:
+            self.put((filename, text.encode('utf-8', 'surrogatepass')))
+
+    def write_row(self, filename: str, row):
+        """Append row to a CSV file as one record"""
+        self.put((filename, (csv_line(row) + '\r\n').encode('utf-8', 'surrogatepass')))
+
+    def put(self, record):
+        """Queue a record of the file name and its bytes and start the writer thread with the first record"""
+        self.raise_error()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='output-writer', daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+        self.queue.put(record)
+
+    def flush(self):
+        """Wait until all queued records are written and close the files"""
+        self.wait('flush')
+
+    def close(self):
+        """Write all queued records, sync and close the files and stop the writer thread"""
+        if self.thread is not None:
+            try:
+                self.wait('close')
+            finally:
+                self.thread.join()
+                self.thread = None
+                atexit.unregister(self.close)
+
+    def wait(self, command: str):
+        """Send a command to the writer thread and wait until it is done"""
+        if self.thread is None:
+            return
+        done = threading.Event()
+        self.queue.put((command, done))
+        done.wait()
+        self.raise_error()
+
+    def raise_error(self):
+        """Raise the last error of the writer thread once"""
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def run(self):
+        """Collect the queued records per file and write them once per flush interval or on a command"""
+        pending = {}
+        pending_records = 0
+        unsynced_records = 0
+        unsynced_files = set()
+        last_write = time.monotonic()
+        while True:
+            timeout = last_write + self.flush_interval - time.monotonic() if pending else None
+            try:
+                record = self.queue.get(timeout=max(0.0, timeout) if timeout is not None else None)
+            except queue.Empty:
+                record = None
+
+            command = record[0] if record is not None and isinstance(record[1], threading.Event) else None
+            if record is not None and command is None:
+                filename, data = record
+                pending.setdefault(filename, []).append(data)
+                pending_records += 1
+                # keep collecting while more records are queued and the flush interval is not over
+                if time.monotonic() - last_write < self.flush_interval:
+                    continue
+
+            batch, pending = pending, {}
+            try:
+                for filename, chunks in batch.items():
+                    self.write(filename, b''.join(chunks))
+                    unsynced_files.add(filename)
+                self.num_records += pending_records
+                unsynced_records += pending_records
+                pending_records = 0
+
+                # sync before the files are closed if fsync is enabled and always before the writer stops
+                if unsynced_files and (command == 'close' or (self.fsync_every and (command or unsynced_records >= self.fsync_every))):
+                    for filename in unsynced_files:
+                        os.fsync(self.files[filename].fileno())
+                    self.num_fsyncs += 1
+                    unsynced_records = 0
+                    unsynced_files = set()
+                if command is not None:
+                    for file in self.files.values():
+                        file.close()
+                    self.files = {}
+                    unsynced_files = set()
+            except OSError as e:
+                # the records of the batch are lost, the error is raised by the next call of the writer
+                self.error = e
+                pending_records = 0
+            last_write = time.monotonic()
+
+            if command is not None:
+                record[1].set()
+                if command == 'close':
+                    return
+
+    def write(self, filename: str, data: bytes):
+        """Append data to a file with unbuffered writes, so a batch is never split by a buffer"""
+        file = self.files.get(filename)
+        if file is None:
+            file = self.files[filename] = open(filename, 'ab', buffering=0)
+        view = memoryview(data)
+        while view:
+            view = view[file.write(view):]
+        self.num_writes += 1
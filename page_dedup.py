@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+"""
+Page Dedup avoids crawling and processing the same content again.
+
+language_variant_key collapses the language variants of a url like /en/hosting, /de/hosting and /hosting into one
+key, so only the first variant of a page is crawled. simhash fingerprints the visible text of a page, so near-duplicate
+pages of a hoster, e.g. the same template with another headline, can be detected by a small hamming distance.
+ContentMemo remembers the keywords and links of the last analyzed pages by the hash of their content and is shared by
+all hosters, e.g. resellers running identical white-label templates.
+
+simhash uses the hash function of Python, so fingerprints can only be compared within the same process.
+"""
+
+import re
+import zlib
+from collections import OrderedDict, namedtuple
+
+DEFAULT_MEMO_SIZE = 10000 # pages whose analysis is remembered by the content memo
+NEAR_DUPLICATE_DISTANCE = 3 # max different bits of the simhash of near-duplicate pages
+MIN_SHINGLES = 16 # pages with less different word 3-grams are too short to compare their simhash
+
+LANGUAGE_CODES = {
+    'ar', 'bg', 'cs', 'cz', 'da', 'de', 'el', 'en', 'es', 'et', 'fi', 'fr', 'he', 'hi', 'hr', 'hu', 'id', 'it', 'ja',
+    'jp', 'ko', 'lt', 'lv', 'ms', 'nb', 'nl', 'no', 'pl', 'pt', 'ro', 'ru', 'sk', 'sl', 'sr', 'sv', 'th', 'tr', 'uk',
+    'vi', 'zh',
+}
+LANGUAGE_SEGMENT_REGEX = re.compile(r'([a-z]{2})(?:[-_][a-z]{2,4})?')
+WORD_REGEX = re.compile(r'\w+')
+HASH_MASK = (1 << 64) - 1
+
+# analysis of the content of a page: hash of its text (only for incremental scans), simhash of its text (only if
+# dedup is enabled), keywords, all link targets and the anchor text of each link (only for the priority frontier)
+AnalyzedContent = namedtuple('AnalyzedContent', ['text_hash', 'simhash', 'keywords', 'links', 'anchors'])
+
+def language_variant_key(url: str):
+    """Return unified url without a language code like /en, /de-de or /pt_br as first path segment"""
+    scheme, separator, rest = url.partition('://')
+    host, slash, path = rest.partition('/')
+    segment, _, remainder = path.partition('/')
+    match = LANGUAGE_SEGMENT_REGEX.fullmatch(segment)
+    if match and match.group(1) in LANGUAGE_CODES:
+        return scheme + separator + host + ('/' + remainder if remainder else '')
+    return url
+
+def simhash(text: str):
+    """Return 64 bit simhash of the word 3-grams of a text, similar texts have hashes with few different bits, or None if the text is too short"""
+    words = WORD_REGEX.findall(text.lower())
+    hashes = [format(hash(shingle) & HASH_MASK, '064b') for shingle in set(zip(words, words[1:], words[2:]))]
+    if len(hashes) < MIN_SHINGLES:
+        return None
+    threshold = len(hashes) / 2
+    value = 0
+    for bits in zip(*hashes):
+        value = (value << 1) | (bits.count('1') > threshold)
+    return value
+
+def hamming_distance(a: int, b: int):
+    """Return number of different bits of two hashes"""
+    return bin(a ^ b).count('1')
+
+class ContentMemo:
+    """Analysis of the last max_entries pages by the hash of their content (0 disables the memo)"""
+
+    def __init__(self, max_entries: int = DEFAULT_MEMO_SIZE):
+        self.max_entries = max(0, max_entries)
+        self.enabled = self.max_entries > 0
+        self.entries = OrderedDict()
+
+    def get(self, key: bytes):
+        """Return AnalyzedContent of a page with the content hash key or None if it is not remembered"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        text_hash, page_simhash, keywords, links, anchors = entry
+        links = zlib.decompress(links).decode('utf-8', 'surrogatepass')
+        return AnalyzedContent(text_hash, page_simhash, keywords, links.split('\0') if links else [], anchors)
+
+    def put(self, key: bytes, analyzed: AnalyzedContent):
+        """Remember the analysis of a page and forget the least recently used page if the memo is full"""
+        if not self.enabled:
+            return
+        links = zlib.compress('\0'.join(analyzed.links).encode('utf-8', 'surrogatepass'))
+        self.entries[key] = analyzed._replace(links=links)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+"""
+Page Parser extracts the visible text and all link targets of a downloaded HTML page.
+
+The default backend bs4 builds a BeautifulSoup tree and detects the charset of the raw bytes. The fast backends
+lxml and selectolax decode the page with the charset of the HTTP header or the meta tag and only extract text and
+links without building a BeautifulSoup tree. They fall back to bs4 if the charset is unknown or parsing fails.
+If a timings dictionary is passed, the seconds of parsing the page and of extracting its text are added to it.
+If anchors is True, the text of each link is extracted as well, e.g. to prioritize the links to crawl.
+parse_sitemap extracts the page urls or, for a sitemap index, the child sitemaps of an XML sitemap.
+"""
+
+import re
+import html
+import codecs
+from collections import namedtuple
+from metrics import phase
+
+PARSER_BACKENDS = ('bs4', 'lxml', 'selectolax')
+
+# tags whose content is not visible text, like BeautifulSoup.get_text() ignores them
+INVISIBLE_TAGS = ('script', 'style', 'template')
+
+CHARSET_HEADER_REGEX = re.compile(r'charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+CHARSET_META_REGEX = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+SITEMAP_LOC_REGEX = re.compile(rb'<(?:\w+:)?loc>\s*(.*?)\s*</(?:\w+:)?loc>', re.IGNORECASE | re.DOTALL)
+SITEMAP_INDEX_REGEX = re.compile(rb'<(?:\w+:)?sitemapindex[\s>]', re.IGNORECASE)
+
+# anchors is None or the list of the texts of the links
+ParsedPage = namedtuple('ParsedPage', ['text', 'links', 'anchors'], defaults=(None,))
+
+def parser_available(backend: str):
+    """Return True if the python module required by the specified backend is installed"""
+    try:
+        if backend == 'lxml':
+            import lxml.html
+        elif backend == 'selectolax':
+            import selectolax
+        else:
+            import bs4
+    except ImportError:
+        return False
+    return True
+
+def detect_encoding(content: bytes, content_type: str = ''):
+    """Return valid charset name of the HTTP Content-Type header or the meta tag of the page or None if not specified"""
+    match = CHARSET_HEADER_REGEX.search(content_type or '') or CHARSET_META_REGEX.search(content[:4096])
+    if match:
+        encoding = match.group(1)
+        if isinstance(encoding, bytes):
+            encoding = encoding.decode('ascii', 'ignore')
+        try:
+            return codecs.lookup(encoding).name
+        except LookupError:
+            return None
+    return None
+
+def decode_page(content: bytes, content_type: str = ''):
+    """Return page content as string decoded with the specified charset, assuming utf-8 otherwise, or None if decoding fails"""
+    encoding = detect_encoding(content, content_type)
+    try:
+        if encoding:
+            return content.decode(encoding, errors='replace')
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+def parsed_page(text: str, links, anchor_texts=None):
+    """Return ParsedPage without the links that have no target"""
+    if anchor_texts is None:
+        return ParsedPage(text, [link for link in links if link is not None])
+    pairs = [(link, anchor_text) for link, anchor_text in zip(links, anchor_texts) if link is not None]
+    return ParsedPage(text, [link for link, _ in pairs], [anchor_text for _, anchor_text in pairs])
+
+def parse_with_bs4(content: bytes, timings: dict = None, anchors: bool = False):
+    """Parse page with BeautifulSoup including its charset detection"""
+    from bs4 import BeautifulSoup
+
+    with phase(timings, 'parse'):
+        soup = BeautifulSoup(content, 'html.parser')
+        tags = soup.find_all('a')
+        links = [link.get('href') for link in tags]
+        anchor_texts = [link.get_text(' ') for link in tags] if anchors else None
+    with phase(timings, 'text'):
+        text = soup.get_text()
+    return parsed_page(text, links, anchor_texts)
+
+def parse_with_lxml(html: str, timings: dict = None, anchors: bool = False):
+    """Parse page text and links with lxml"""
+    import lxml.html
+    from lxml import etree
+
+    with phase(timings, 'parse'):
+        try:
+            document = lxml.html.document_fromstring(html)
+        except etree.ParserError as e:
+            raise ValueError(e)
+        tags = list(document.iter('a'))
+        links = [link.get('href') for link in tags]
+        anchor_texts = [link.text_content() for link in tags] if anchors else None
+    with phase(timings, 'text'):
+        etree.strip_elements(document, *INVISIBLE_TAGS, with_tail=False)
+        text = document.text_content()
+    return parsed_page(text, links, anchor_texts)
+
+def parse_with_selectolax(html: str, timings: dict = None, anchors: bool = False):
+    """Parse page text and links with selectolax, preferring its lexbor engine"""
+    try:
+        from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    except ImportError:
+        from selectolax.parser import HTMLParser
+
+    with phase(timings, 'parse'):
+        tree = HTMLParser(html)
+        nodes = tree.css('a')
+        links = [node.attributes.get('href') for node in nodes]
+        anchor_texts = [node.text(separator=' ') for node in nodes] if anchors else None
+    with phase(timings, 'text'):
+        tree.strip_tags(list(INVISIBLE_TAGS))
+        text = tree.root.text(separator='') if tree.root is not None else ''
+    return parsed_page(text, links, anchor_texts)
+
+def parse_page(content: bytes, content_type: str = '', backend: str = 'bs4', timings: dict = None, anchors: bool = False):
+    """Return ParsedPage with visible text and all link targets (href) of a page and optionally the texts of the links"""
+    if backend in ('lxml', 'selectolax'):
+        with phase(timings, 'parse'):
+            html = decode_page(content, content_type)
+        if html is not None:
+            try:
+                if backend == 'lxml':
+                    return parse_with_lxml(html, timings, anchors)
+                return parse_with_selectolax(html, timings, anchors)
+            except (ValueError, LookupError, AttributeError):
+                # e.g. empty documents or xml encoding declarations, which the bs4 path handles
+                pass
+
+    return parse_with_bs4(content, timings, anchors)
+
+def parse_sitemap(content: bytes):
+    """Return (page urls, child sitemaps) of an XML sitemap, only one of them is not empty"""
+    urls = [html.unescape(loc.decode('utf-8', 'replace')) for loc in SITEMAP_LOC_REGEX.findall(content)]
+    if SITEMAP_INDEX_REGEX.search(content[:4096]):
+        return [], urls
+    return urls, []
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+"""
+Page Store remembers what each crawled page looked like in the last scan, so an incremental re-scan only parses and
+matches pages that changed: the hash of the downloaded content, the hash of the normalized visible text, the keywords
+found on the page, its crawlable links and their anchor texts for the priority frontier. Per hoster it stores the hash of the sitemap, so hosters whose landing page
+and sitemap did not change can reuse all results of the last scan without crawling their other pages.
+
+The page store is kept in its own SQLite database that is not deleted by --reset. It is cleared automatically if the
+keywords, the parser or the crawl settings changed, since the stored keywords and links would no longer be valid.
+"""
+
+import json
+import zlib
+import sqlite3
+import hashlib
+from collections import namedtuple
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS hosters (hoster_url TEXT PRIMARY KEY, sitemap_hash BLOB);
+CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, hoster_url TEXT NOT NULL, response_url TEXT NOT NULL,
+    content_hash BLOB NOT NULL, text_hash BLOB NOT NULL, keywords TEXT NOT NULL, links BLOB NOT NULL, anchors BLOB);
+CREATE INDEX IF NOT EXISTS pages_by_hoster ON pages (hoster_url);
+'''
+
+# content_hash and text_hash are 16 byte digests, keywords is the list of keywords found on the page in the order
+# they were matched, links is the list of crawlable links of the page and anchors the dictionary with the anchor text
+# of each link or None if anchors were not parsed
+StoredPage = namedtuple('StoredPage', ['url', 'response_url', 'content_hash', 'text_hash', 'keywords', 'links', 'anchors'], defaults=(None,))
+
+def content_hash(content: bytes):
+    """Return hash of the downloaded content of a page"""
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+def text_hash(text: str):
+    """Return hash of the visible text of a page ignoring differences in whitespace"""
+    return hashlib.blake2b(' '.join(text.split()).encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+def settings_key(*settings):
+    """Return key of the settings the stored pages depend on, like the keywords and the parser"""
+    return hashlib.blake2b(json.dumps(settings).encode('utf-8'), digest_size=16).hexdigest()
+
+class PageStore:
+    """SQLite database with the hashes, keywords and links of the pages of the last scan"""
+
+    enabled = True
+
+    def __init__(self, filename: str, key: str):
+        self.filename = filename
+        # the async engine looks up and stores pages in its crawl thread
+        self.connection = sqlite3.connect(filename, timeout=60, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        if 'anchors' not in [row[1] for row in self.connection.execute('PRAGMA table_info(pages)')]:
+            # pages stored by earlier versions have no anchor texts
+            self.connection.execute('ALTER TABLE pages ADD COLUMN anchors BLOB')
+
+        # forget all pages if they were stored with other keywords or settings
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'settings'").fetchone()
+        if row is None or row[0] != key:
+            self.connection.execute('DELETE FROM pages')
+            self.connection.execute('DELETE FROM hosters')
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('settings', ?)", (key,))
+        self.connection.commit()
+
+    def _page(self, row):
+        url, response_url, page_content_hash, page_text_hash, keywords, links, anchors = row
+        links = zlib.decompress(links).decode('utf-8', 'surrogatepass')
+        anchors = json.loads(zlib.decompress(anchors)) if anchors is not None else None
+        return StoredPage(url, response_url, page_content_hash, page_text_hash, json.loads(keywords), links.split('\n') if links else [], anchors)
+
+    def page(self, url: str):
+        """Return StoredPage of url or None if it was not stored"""
+        row = self.connection.execute('SELECT url, response_url, content_hash, text_hash, keywords, links, anchors FROM pages WHERE url = ?', (url,)).fetchone()
+        return self._page(row) if row else None
+
+    def sitemap_hash(self, hoster_url: str):
+        """Return (True, sitemap hash or None) if the last scan of a hoster completed, else (False, None)"""
+        row = self.connection.execute('SELECT sitemap_hash FROM hosters WHERE hoster_url = ?', (hoster_url,)).fetchone()
+        return (True, row[0]) if row else (False, None)
+
+    def hoster_pages(self, hoster_url: str):
+        """Return StoredPage of all pages of a hoster in the order they were crawled"""
+        rows = self.connection.execute('SELECT url, response_url, content_hash, text_hash, keywords, links, anchors FROM pages WHERE hoster_url = ? ORDER BY rowid', (hoster_url,))
+        return [self._page(row) for row in rows]
+
+    def replace_hoster(self, hoster_url: str, pages, complete: bool, sitemap_hash: bytes = None):
+        """Replace the stored pages of a hoster in one transaction, only complete scans can be reused for the whole hoster"""
+        self.connection.execute('DELETE FROM pages WHERE hoster_url = ?', (hoster_url,))
+        self.connection.executemany('INSERT OR REPLACE INTO pages (url, hoster_url, response_url, content_hash, text_hash, keywords, links, anchors) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                    [(page.url, hoster_url, page.response_url, page.content_hash, page.text_hash, json.dumps(page.keywords),
+                                      zlib.compress('\n'.join(page.links).encode('utf-8', 'surrogatepass')),
+                                      zlib.compress(json.dumps(page.anchors).encode('utf-8')) if page.anchors is not None else None) for page in pages])
+        if complete:
+            self.connection.execute('INSERT OR REPLACE INTO hosters (hoster_url, sitemap_hash) VALUES (?, ?)', (hoster_url, sitemap_hash))
+        else:
+            self.connection.execute('DELETE FROM hosters WHERE hoster_url = ?', (hoster_url,))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+class NullPageStore:
+    """Page store that is disabled and doesn't store anything"""
+
+    enabled = False
+
+    def close(self):
+        pass
@@ -1,14 +1,15 @@
 #!/usr/bin/env python3
 """
 Import and merge all known urls and prepare the hosters.csv input file as source for the
-scan_hosters.py script.
+scan_hosters.py script. The urls of each source are normalized and validated in parallel by worker
+processes and deduplicated by domain in memory or, with --spill-to-disk, in a temporary SQLite database.
 """
 
 import csv
 import os
+import time
 import argparse
-import validators
-from functions import *
+from hoster_merge import HosterMerge, DomainIndex, SpillIndex, CHUNK_ROWS, DEFAULT_MEMORY_MB
 
 # Define the input file paths
 HOSTERS_CSV = 'input/hosters.csv'
@@ -21,90 +22,55 @@ URLS_CRAWLED_TXT = 'output/urls_crawled.txt'
 
 # Define the output file paths
 OUTPUT_CSV = 'input/hosters_to_be_crawled.csv'
-
-# Store all urls as key and [CompanyName, HosterId] as value if specified
-output_dict = {}
-
-num_urls_imported = 0
-num_urls_with_company_imported = 0
-num_urls_final = 0
-num_urls_with_company_final = 0
-
-companies = set()
-hoster_ids = set()
-
-# Loop over all known files that contain urls to be crawled
-for file in (HOSTERS_CSV, CPANEL_HOSTERS_CSV, SALESFORCE_ACCOUNTS_CSV, URLS_TXT, URLS_FOUND_TXT, URLS_CRAWLED_TXT, WHMCS_USERS_CSV):
-    if os.path.exists(file):
-        print('Import urls from', file)
-
-        # Import and merge CSV files
-        if file.lower().endswith('.csv'):
-            with open(file, 'r') as csvfile:
-                reader = csv.reader(csvfile)
-                for row in reader:
-                    if row and len(row) > 0:
-                        if file.endswith('input/hosters.csv'):
-                            url = unifyurl(row[2])
-                            hoster_name = row[1].strip()
-                            hoster_id = row[0].strip()
-                        else:
-                            url = unifyurl(row[0])
-                            hoster_name = row[1].strip() if len(row) > 1 else ''
-                            hoster_id = ''
-
-                        if url and validators.url(url):
-                            num_urls_imported += 1
-                            if hoster_name == '-':
-                                hoster_name = ''
-
-                            if hoster_name:
-                                num_urls_with_company_imported += 1
-
-                            d = domain(url)
-                            if d not in output_dict:
-
-                                # use the base url without subfolders except the url contains '/en' for english
-                                if '/' in url and not '/en' in url:
-                                    url = baseurl(url)
-
-                                output_dict[d] = [url, hoster_name, hoster_id]
-                                num_urls_final += 1
-                                if hoster_name:
-                                    num_urls_with_company_final += 1
-                                if hoster_name and hoster_name not in companies:
-                                    companies.add(hoster_name)
-                                if hoster_id and hoster_id not in hoster_ids:
-                                    hoster_ids.add(hoster_id)
-
-        # Import and merge text files containing only one url per line
-        else:
-            with open(file, 'r') as url_file:
-                for url in url_file.readlines():
-                    url = unifyurl(url)
-                    if url and validators.url(url):
-                        num_urls_imported += 1
-                        d = domain(url)
-                        if d not in output_dict:
-
-                            # use the base url without subfolders except the url contains '/en' for english
-                            if '/' in url and not '/en' in url:
-                                url = baseurl(url)
-
-                            output_dict[d] = [url, '', '']
-                            num_urls_final += 1
-
-# Write to output CSV
-with open(OUTPUT_CSV, 'w', newline='') as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(['URL', 'CompanyName', 'HosterID'])
-    for url, data in output_dict.items():
-        writer.writerow([data[0], data[1], data[2]])
-
-print('{:>7,}'.format(num_urls_imported), 'urls imported in total')
-print('{:>7,}'.format(num_urls_with_company_imported), 'urls imported mentioned a company name')
-print()
-print('{:>7,}'.format(len(output_dict.keys())), 'urls exported in total')
-print('{:>7,}'.format(num_urls_with_company_final), 'urls exported mentioned a company name')
-print('{:>7,}'.format(len(companies)), 'companies exported in total')
-print('{:>7,}'.format(len(hoster_ids)), 'companies exported having a hosterID in total')
+SPILL_DB = 'input/hosters_to_be_crawled.sqlite'
+
+def main():
+    # Define the argument parser
+    parser = argparse.ArgumentParser(description='Import and merge all known urls into the Hoster CSV file to be crawled.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='The number of processes normalizing and validating urls. Default is the number of CPUs.')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help=f'The number of rows a worker process validates at once. Default is {CHUNK_ROWS}.')
+    parser.add_argument('--spill-to-disk', action='store_true', help='Deduplicate the urls in a temporary SQLite database instead of memory, for sources with millions of urls')
+    parser.add_argument('--memory-mb', type=int, default=DEFAULT_MEMORY_MB, help=f'The memory in MB the SQLite database may use with --spill-to-disk. Default is {DEFAULT_MEMORY_MB}.')
+    args = parser.parse_args()
+
+    # Store all urls per domain with [CompanyName, HosterId] if specified, the first source wins
+    index = SpillIndex(SPILL_DB, args.memory_mb) if args.spill_to_disk else DomainIndex()
+
+    num_urls_imported = 0
+    num_urls_with_company_imported = 0
+    start = time.perf_counter()
+
+    # Loop over all known files that contain urls to be crawled
+    with HosterMerge(index, args.workers, args.chunk_rows) as merge:
+        for file in (HOSTERS_CSV, CPANEL_HOSTERS_CSV, SALESFORCE_ACCOUNTS_CSV, URLS_TXT, URLS_FOUND_TXT, URLS_CRAWLED_TXT, WHMCS_USERS_CSV):
+            if os.path.exists(file):
+                print('Import urls from', file)
+                file_start = time.perf_counter()
+                num_urls, num_urls_with_company = merge.merge_file(file)
+                num_urls_imported += num_urls
+                num_urls_with_company_imported += num_urls_with_company
+                print('{:>7,}'.format(num_urls), 'urls imported in', '{:,.1f}'.format(time.perf_counter() - file_start), 'seconds')
+
+    # Write to output CSV
+    with open(OUTPUT_CSV, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['URL', 'CompanyName', 'HosterID'])
+        writer.writerows(index.rows())
+
+    num_urls_final = len(index)
+    num_urls_with_company_final, num_companies, num_hoster_ids = index.statistics()
+    index.close()
+
+    print()
+    print('{:>7,}'.format(num_urls_imported), 'urls imported in total')
+    print('{:>7,}'.format(num_urls_with_company_imported), 'urls imported mentioned a company name')
+    print()
+    print('{:>7,}'.format(num_urls_final), 'urls exported in total')
+    print('{:>7,}'.format(num_urls_with_company_final), 'urls exported mentioned a company name')
+    print('{:>7,}'.format(num_companies), 'companies exported in total')
+    print('{:>7,}'.format(num_hoster_ids), 'companies exported having a hosterID in total')
+    print('{:>7,.1f}'.format(time.perf_counter() - start), 'seconds to merge all urls')
+
+# Only run in the main process, since worker processes may import this script again
+if __name__ == '__main__':
+    main()
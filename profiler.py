@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+"""
+Profiler runs the processing of every n-th downloaded page (parsing, keyword matching and link filtering) under
+cProfile, so pathological hosters with huge pages or thousands of links can be analyzed in long production runs.
+Optionally tracemalloc measures the peak memory of each sampled page and the allocations it retains.
+
+At the end of a run the profile is dumped for pstats or snakeviz and a report lists the hot functions, the slowest
+sampled pages and the lines allocating most memory. NullProfiler does nothing if profiling is disabled.
+"""
+
+import io
+import time
+import heapq
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+DEFAULT_TOP = 30 # number of functions, pages and allocations listed in the report
+
+class Profiler:
+    """cProfile and tracemalloc statistics of every n-th page"""
+
+    enabled = True
+
+    def __init__(self, every: int = 1, trace_memory: bool = False, top: int = DEFAULT_TOP):
+        self.every = max(1, every)
+        self.trace_memory = trace_memory
+        self.top = top
+        self.profile = cProfile.Profile()
+        self.num_pages = 0
+        self.num_sampled = 0
+        self.seconds = 0.0
+        self.slowest_pages = []
+        self.allocations = {}
+
+    @contextmanager
+    def page(self, url: str):
+        """Profile the code within the context if it processes every n-th page"""
+        self.num_pages += 1
+        if (self.num_pages - 1) % self.every != 0:
+            yield
+            return
+
+        self.num_sampled += 1
+        peak = 0
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+            seconds = time.perf_counter() - start
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                self.add_allocations(tracemalloc.take_snapshot())
+                tracemalloc.stop()
+
+            self.seconds += seconds
+            if len(self.slowest_pages) < self.top:
+                heapq.heappush(self.slowest_pages, (seconds, peak, url))
+            elif seconds > self.slowest_pages[0][0]:
+                heapq.heapreplace(self.slowest_pages, (seconds, peak, url))
+
+    def add_allocations(self, snapshot):
+        """Add the memory still allocated after a page per line of code, ignoring the profiler itself"""
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)))
+        for stat in snapshot.statistics('lineno'):
+            frame = stat.traceback[0]
+            allocation = self.allocations.get((frame.filename, frame.lineno))
+            if allocation is None:
+                allocation = self.allocations[(frame.filename, frame.lineno)] = [0, 0]
+            allocation[0] += stat.size
+            allocation[1] += stat.count
+
+    def report(self):
+        """Return report with the hot functions, the slowest sampled pages and the lines allocating most memory"""
+        lines = ['Profile of {:,} of {:,} pages (one of every {:,} pages) taking {:,.1f} seconds'.format(self.num_sampled, self.num_pages, self.every, self.seconds), '']
+
+        for sort_key, title in (('cumulative', 'Functions with most cumulative time'), ('tottime', 'Functions with most own time')):
+            stream = io.StringIO()
+            if self.num_sampled > 0:
+                pstats.Stats(self.profile, stream=stream).strip_dirs().sort_stats(sort_key).print_stats(self.top)
+            lines += [title + ':', stream.getvalue().strip(), '']
+
+        lines.append('Slowest pages:')
+        for seconds, peak, url in sorted(self.slowest_pages, reverse=True):
+            memory = ' {:>9,.1f} MB peak'.format(peak / 1000000) if self.trace_memory else ''
+            lines.append('{:>9,.1f} ms{} {}'.format(seconds * 1000, memory, url))
+
+        if self.trace_memory:
+            lines += ['', 'Lines with most memory still allocated after processing a page:']
+            for (filename, lineno), (size, count) in heapq.nlargest(self.top, self.allocations.items(), key=lambda item: item[1][0]):
+                lines.append('{:>9,.1f} KB {:>9,} blocks {}:{}'.format(size / 1000, count, filename, lineno))
+        return lines
+
+    def dump(self, filename: str):
+        """Write the cProfile statistics, which can be loaded with pstats or snakeviz"""
+        if self.num_sampled > 0:
+            self.profile.dump_stats(filename)
+
+class NullProfiler:
+    """Profiler that is disabled and doesn't profile anything"""
+
+    enabled = False
+
+    def page(self, url: str):
+        return nullcontext()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+"""
+Rate Control adapts the request rate per domain with AIMD (additive increase, multiplicative decrease):
+the number of parallel requests to a domain grows by one per round of healthy responses and is halved as
+soon as the domain responds with 429 Too Many Requests or 503 Service Unavailable, times out or refuses the
+connection. The minimum interval between two requests starts at the Crawl-delay of the robots.txt of the
+domain, is doubled on 429 and 503 responses and shrinks again while responses are healthy. A Retry-After header pauses
+all requests to the domain for the specified time. The sitemaps listed in the robots.txt are kept per domain as well.
+
+Each url slows its domain down only once: a page that keeps responding with 503 while the other pages of the domain
+are fine is broken rather than a sign of an overloaded server. After a number of healthy responses in a row the
+interval is reset to the Crawl-delay, so a domain recovers quickly from a few throttled responses.
+
+The timeout of each request is a multiple of the 99th percentile of the latencies of the recent responses of all
+domains, so requests to servers that hang fail long before the fixed maximum timeout.
+"""
+
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from functions import domain
+
+THROTTLING_STATUS_CODES = (429, 503)
+DEFAULT_MAX_DELAY = 30 # max seconds of Crawl-delay, Retry-After and intervals between requests
+LATENCY_FACTOR = 3 # responses are healthy while the average latency is below this multiple of the fastest response
+MIN_THROTTLED_INTERVAL = 1.0 # seconds between requests after the first throttling signal
+RECOVERY_RESPONSES = 5 # healthy responses in a row that reset the interval to the Crawl-delay
+LATENCY_WINDOW = 1000 # number of recent responses used for the timeout percentile
+TIMEOUT_PERCENTILE = 0.99
+TIMEOUT_FACTOR = 4 # timeout is this multiple of the latency percentile
+MIN_TIMEOUT = 5 # min seconds of the adaptive timeout
+MIN_TIMEOUT_SAMPLES = 50 # responses needed before the timeout adapts
+
+def parse_crawl_delay(robots_txt: str, user_agent: str = '*'):
+    """Return Crawl-delay in seconds of a robots.txt for user agent or 0 if not specified
+
+    Unlike urllib.robotparser this also accepts fractional delays like 'Crawl-delay: 0.5'.
+    """
+    applies = False
+    in_user_agents = False
+    for line in robots_txt.splitlines():
+        line = line.split('#')[0].strip()
+        if ':' not in line:
+            continue
+        field, value = [part.strip() for part in line.split(':', 1)]
+        field = field.lower()
+
+        # a group starts with one or more User-agent lines followed by its rules
+        if field == 'user-agent':
+            if not in_user_agents:
+                applies = False
+            in_user_agents = True
+            applies = applies or value == '*' or value.lower() == user_agent.lower()
+        else:
+            in_user_agents = False
+            if field == 'crawl-delay' and applies:
+                try:
+                    return max(0.0, float(value))
+                except ValueError:
+                    pass
+    return 0.0
+
+def parse_sitemaps(robots_txt: str):
+    """Return urls of all Sitemap lines of a robots.txt, which apply to all user agents"""
+    sitemaps = []
+    for line in robots_txt.splitlines():
+        line = line.split('#')[0].strip()
+        if line[:8].lower() == 'sitemap:':
+            url = line[8:].strip()
+            if url.startswith(('https://', 'http://')):
+                sitemaps.append(url)
+    return sitemaps
+
+def retry_after_seconds(headers):
+    """Return seconds of the Retry-After header as number or HTTP date or None if not specified"""
+    value = (headers.get('Retry-After') or '').strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class HostRate:
+    """Rate limits and measured latency of a single domain"""
+
+    def __init__(self):
+        self.limit = 1.0
+        self.interval = 0.0
+        self.crawl_delay = None
+        self.sitemaps = []
+        self.next_start = 0.0
+        self.latency = None
+        self.min_latency = None
+        self.throttled = 0
+        self.throttled_urls = set() # urls that slowed the domain down and did not respond healthy since
+        self.healthy = 0 # healthy responses since the domain was throttled last
+
+class RateController:
+    """Parallel requests and interval between requests per domain, adapted to the responses of each domain"""
+
+    def __init__(self, max_concurrency: int = 1, max_delay: float = DEFAULT_MAX_DELAY):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_delay = max_delay
+        self.hosts = {}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.latency_percentile = None
+        self.num_responses = 0
+
+    def host(self, url: str):
+        """Return HostRate of the domain of url"""
+        key = domain(url)
+        host = self.hosts.get(key)
+        if host is None:
+            host = self.hosts[key] = HostRate()
+        return host
+
+    def needs_robots(self, url: str):
+        """Return True only once per domain, so the robots.txt of each domain is requested once"""
+        host = self.host(url)
+        if host.crawl_delay is None:
+            host.crawl_delay = 0.0
+            return True
+        return False
+
+    def set_crawl_delay(self, url: str, crawl_delay: float):
+        """Use the Crawl-delay of the robots.txt as minimum interval between requests to the domain of url"""
+        host = self.host(url)
+        host.crawl_delay = min(max(0.0, crawl_delay), self.max_delay)
+        host.interval = max(host.interval, host.crawl_delay)
+
+    def set_sitemaps(self, url: str, sitemaps):
+        """Remember the sitemaps of the robots.txt of the domain of url"""
+        self.host(url).sitemaps = list(sitemaps)
+
+    def sitemaps(self, url: str):
+        """Return the sitemaps of the robots.txt of the domain of url, which is empty if it was not requested yet"""
+        return self.host(url).sitemaps
+
+    def concurrency(self, url: str):
+        """Return number of parallel requests currently allowed for the domain of url"""
+        return min(int(self.host(url).limit), self.max_concurrency)
+
+    def delay(self, url: str):
+        """Return the seconds until the next request to the domain of url may start without reserving it"""
+        return max(0.0, self.host(url).next_start - time.monotonic())
+
+    def is_healthy(self, url: str):
+        """Return True if the domain of url responded healthy since it was throttled last"""
+        return self.host(url).healthy > 0
+
+    def reserve(self, url: str):
+        """Reserve the next start time of a request to the domain of url and return the seconds to wait until then"""
+        host = self.host(url)
+        now = time.monotonic()
+        start = max(now, host.next_start)
+        host.next_start = start + host.interval
+        return start - now
+
+    def record(self, url: str, status: int, latency: float, retry_after: float = None):
+        """Adapt the rates of the domain of url to a response with status code and latency in seconds"""
+        host = self.host(url)
+        if status in THROTTLING_STATUS_CODES:
+            # retries of the same url don't slow the domain down again
+            if url not in host.throttled_urls:
+                host.throttled_urls.add(url)
+                self._decrease(host)
+            if retry_after is not None:
+                host.next_start = max(host.next_start, time.monotonic() + min(retry_after, self.max_delay))
+            return
+
+        # recalculate the percentile of the timeout only every few responses
+        self.latencies.append(latency)
+        self.num_responses += 1
+        if self.num_responses % MIN_TIMEOUT_SAMPLES == 0:
+            self.latency_percentile = sorted(self.latencies)[int(TIMEOUT_PERCENTILE * (len(self.latencies) - 1))]
+
+        host.latency = latency if host.latency is None else 0.8 * host.latency + 0.2 * latency
+        host.min_latency = latency if host.min_latency is None else min(host.min_latency, latency)
+        host.throttled_urls.discard(url)
+
+        # only speed up while the domain responds as fast as before
+        if host.latency <= max(LATENCY_FACTOR * host.min_latency, 0.5):
+            host.healthy += 1
+            host.limit = min(host.limit + 1 / host.limit, self.max_concurrency)
+            if host.healthy >= RECOVERY_RESPONSES:
+                host.interval = host.crawl_delay or 0.0
+            else:
+                host.interval = max(host.crawl_delay or 0.0, host.interval * 0.8 if host.interval > 0.01 else 0.0)
+
+    def timeout(self, max_timeout: float):
+        """Return seconds until the next request times out: a multiple of the latency percentile, at most max_timeout"""
+        if self.latency_percentile is None:
+            return max_timeout
+        return min(max_timeout, max(MIN_TIMEOUT, TIMEOUT_FACTOR * self.latency_percentile))
+
+    def record_error(self, url: str):
+        """Reduce the parallel requests to the domain of url after a timeout or connection error, retries wait on their own"""
+        host = self.host(url)
+        host.throttled += 1
+        host.limit = max(1.0, host.limit / 2)
+
+    def _decrease(self, host: HostRate):
+        host.throttled += 1
+        host.healthy = 0
+        host.limit = max(1.0, host.limit / 2)
+        host.interval = min(max(host.interval * 2, MIN_THROTTLED_INTERVAL, host.crawl_delay or 0.0), self.max_delay)
+
+    def describe(self, url: str):
+        """Return current rates of the domain of url for debug output"""
+        host = self.host(url)
+        latency = '{:.0f} ms'.format(host.latency * 1000) if host.latency is not None else '-'
+        return '{} parallel, {:.2f}s interval, {:.1f}s crawl-delay, {} latency, throttled {}x'.format(
+            self.concurrency(url), host.interval, host.crawl_delay or 0.0, latency, host.throttled)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+"""
+Keyword Saturation stops crawling a hoster once its pages stop adding new keywords: the results only record whether
+a keyword is mentioned by a hoster, so pages that only repeat keywords already found don't change them.
+
+The crawl of a hoster stops once the last pages found no new keyword or, with a minimum yield, fewer new keywords
+per page than the minimum yield. The remaining pages up to the maximum number of pages are not requested anymore.
+"""
+
+from collections import deque
+
+class KeywordSaturation:
+    """New keywords of the last pages of a hoster that stop its crawl if they are saturated (0 pages disables it)"""
+
+    def __init__(self, pages: int = 0, min_yield: float = 0.0):
+        self.pages = pages
+        self.min_yield = min_yield
+        self.window = deque()
+        self.window_keywords = 0
+        self.num_pages = 0
+        self.num_keywords = 0
+        self.stopped = False
+
+    def record(self, new_keywords: int):
+        """Count a crawled page with the number of keywords it added to its hoster and return True if the crawl should stop"""
+        if self.pages <= 0 or self.stopped:
+            return self.stopped
+
+        self.num_pages += 1
+        self.num_keywords += new_keywords
+        self.window.append(new_keywords)
+        self.window_keywords += new_keywords
+        if len(self.window) > self.pages:
+            self.window_keywords -= self.window.popleft()
+
+        # yield of the last pages in new keywords per page
+        if len(self.window) == self.pages and (self.window_keywords == 0 or self.window_keywords < self.min_yield * self.pages):
+            self.stopped = True
+        return self.stopped
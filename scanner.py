@@ -0,0 +1,1444 @@
+#!/usr/bin/env python3
+
+"""
+Scanner researches which products or services are offered by hosters: it loads the hosters and the product catalog,
+crawls the website of each hoster up to a maximum number of pages, searches each page for the keywords of the products
+and writes the results and statistics to the output folder. scan_hosters.py is the command line interface of the Scanner.
+
+The Scanner can be embedded in other programs: load, crawl and report are separate methods, the loaded product
+catalog can be reused to crawl several batches of hosters and the fetcher, parser and keyword matcher can be replaced.
+Modules that are slow to import like requests, aiohttp, bs4 and prettytable are only imported when they are needed.
+
+    scanner = Scanner(ScanOptions(max_depth=20, engine='async'))
+    scanner.load()
+    scanner.open_state()
+    scanner.crawl()
+    scanner.finish()
+"""
+
+import csv
+import os
+import sys
+import json
+import time
+import heapq
+import shutil
+import subprocess
+from urllib.parse import urlparse
+from functions import *
+from keyword_matcher import KeywordMatcher
+from analysis_pool import analyze_page, create_analysis_pool
+from collections import deque
+from frontier import Frontier, PriorityFrontier, link_priority
+from page_parser import parse_page, parse_sitemap, parser_available
+from crawl_state import CrawlState
+from rate_control import RateController, DEFAULT_MAX_DELAY
+from circuit_breaker import CircuitBreaker, is_transient, backoff_delay, DEFAULT_MAX_FAILURES, DEFAULT_RETRIES
+from saturation import KeywordSaturation
+from stats_aggregator import StatsAggregator
+from page_dedup import ContentMemo, AnalyzedContent, language_variant_key, simhash, hamming_distance, NEAR_DUPLICATE_DISTANCE, DEFAULT_MEMO_SIZE
+from metrics import Metrics, NullMetrics, phase, DEFAULT_EXPORT_INTERVAL
+from output_writer import OutputWriter, DEFAULT_FLUSH_INTERVAL
+from profiler import Profiler, NullProfiler, DEFAULT_TOP
+from page_store import PageStore, NullPageStore, StoredPage, content_hash, text_hash, settings_key
+from fetcher import fetch_page, content_length, Page, SkippedResponse, ThrottledResponse, DEFAULT_MAX_PAGE_BYTES, SITEMAP_PATH
+
+MAX_SITEMAP_URLS = 10000 # urls of each sitemap queued by the priority frontier
+MAX_CHILD_SITEMAPS = 3 # sitemaps of a sitemap index requested by the priority frontier
+MAX_BLOCKING_WAIT = 1.0 # seconds the sync engine waits for the interval of a domain instead of crawling other hosters meanwhile
+
+SCAN_HOSTERS_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scan_hosters.py')
+
+class ScanError(Exception):
+    """Scan can't be started, e.g. since a required module is not installed"""
+
+class ScanOptions:
+    """Options of a scan with the same names and defaults as the command line options of scan_hosters.py"""
+
+    DEFAULTS = {
+        'max_depth': 50,
+        'max_hosters': 5,
+        'start_at': 0,
+        'stop_at': 10000,
+        'reset': False,
+        'full_scan': False,
+        'engine': 'sync',
+        'concurrency': 200,
+        'per_host': 4,
+        'parse_processes': 0,
+        'parser': 'bs4',
+        'frontier': 'bfs',
+        'max_page_bytes': DEFAULT_MAX_PAGE_BYTES,
+        'cache_dir': '',
+        'cache_max_gb': 10,
+        'cache_max_age': 90,
+        'max_crawl_delay': DEFAULT_MAX_DELAY,
+        'retries': DEFAULT_RETRIES,
+        'max_failures': DEFAULT_MAX_FAILURES,
+        'saturation_pages': 0,
+        'saturation_yield': 0.0,
+        'flush_interval': DEFAULT_FLUSH_INTERVAL,
+        'fsync_every': 0,
+        'metrics': '',
+        'metrics_interval': DEFAULT_EXPORT_INTERVAL,
+        'profile': False,
+        'profile_every': 1,
+        'profile_memory': False,
+        'profile_top': DEFAULT_TOP,
+        'incremental': False,
+        'dedup': False,
+        'memo_size': DEFAULT_MEMO_SIZE,
+        'workers': 1,
+        'output_dir': 'output',
+        'hosters': '',
+        'products': '',
+        'blocked_url_endings': '',
+        'debug': False,
+        'print_errors': False,
+        'print_hosters': False
+    }
+
+    def __init__(self, **options):
+        for name, value in self.DEFAULTS.items():
+            setattr(self, name, options.pop(name, value))
+        if options:
+            raise TypeError('Unknown scan options: ' + ', '.join(options))
+
+    def arguments(self, skipped=()):
+        """Return command line arguments of scan_hosters.py for all options that differ from the defaults"""
+        arguments = []
+        for name, default in self.DEFAULTS.items():
+            value = getattr(self, name)
+            if name in skipped or value == default:
+                continue
+            option = '--' + name.replace('_', '-')
+            if isinstance(value, bool):
+                arguments.append(option)
+            else:
+                arguments += [option, str(value)]
+        return arguments
+
+class HosterCrawl:
+    """Crawl state of a single hoster website: queue of pages to crawl, visited pages and keyword matches
+
+    In incremental scans the sitemap is requested right after the landing page. If both did not change since the
+    last scan, the results of all stored pages of the hoster are reused instead of crawling its other pages.
+    With the priority frontier the sitemap is requested as well and its urls are queued with the links of the landing
+    page, so the pages with the highest priority are crawled first even if they are not linked from the landing page.
+    """
+
+    def __init__(self, scanner, hoster_url: str, hoster_name: str, hoster_id: str):
+        self.scanner = scanner
+        self.hoster_url = hoster_url
+        self.hoster_name = hoster_name
+        self.hoster_id = hoster_id
+        self.parsed_hoster_url = urlparse(hoster_url).netloc
+        self.frontier = PriorityFrontier([hoster_url]) if scanner.priority else Frontier([hoster_url])
+        self.depths = {hoster_url: 0} # number of links between the landing page and each queued url
+        self.language_variants = set() # urls crawled without language code, only if dedup is enabled
+        self.simhashes = [] # simhashes of the crawled pages, only if dedup is enabled
+        self.visited = set()
+        self.throttled = deque() # visited urls that are requested again after 429 or 503 responses
+        self.throttled_attempts = {}
+        self.breaker = CircuitBreaker(scanner.max_failures)
+        self.saturation = KeywordSaturation(scanner.saturation_pages, scanner.saturation_yield)
+        self.urls_crawled_new = []
+        self.urls_crawled_new_with_keywords = []
+        self.urls_with_errors_new = []
+        self.errors_new = []
+        self.url_keywords_new = []
+        self.keywords_for_this_hoster = set()
+
+        # Initialize list to store matches for this hoster
+        self.matches = [0] * len(scanner.keywords)
+
+        # Pages of this scan, the sitemap and the deferred landing page for the page store of incremental scans
+        # and for the priority frontier, which also queues the urls of child sitemaps of a sitemap index
+        self.pages_new = []
+        self.sitemap_url = None
+        self.sitemap_urls = set()
+        self.sitemaps_to_request = deque()
+        self.sitemap_scopes = ()
+        self.sitemap_hash = None
+        self.landing_page = None
+        self.unchanged = False
+
+    def next_url(self):
+        """Return the next url to crawl or None if the queue is empty, the maximum number of pages is reached or the hoster can't be reached"""
+        # sitemaps don't count as crawled pages
+        if self.sitemaps_to_request:
+            return self.sitemaps_to_request.popleft()
+
+        while self.frontier and len(self.visited) < self.scanner.num_links_to_crawl and not self.breaker.tripped and not self.saturation.stopped:
+            url = self.frontier.pop()
+            if url not in self.visited:
+
+                # only crawl the first language variant of a page, the others don't count as crawled pages
+                if self.scanner.dedup:
+                    key = language_variant_key(url)
+                    if key in self.language_variants:
+                        self.scanner.run_counters['urls_language_variants'] += 1
+                        continue
+                    self.language_variants.add(key)
+
+                self.visited.add(url)
+
+                if self.scanner.debug:
+                    print('      ', url)
+
+                return url
+
+        # throttled urls are already visited and retried after the other pages, so the domain can recover in the meantime
+        if self.throttled and not self.breaker.tripped and not self.saturation.stopped:
+            return self.throttled.popleft()
+
+        return None
+
+    def add_error(self, url: str, e, seconds: float = 0.0):
+        """Document a url that could not be downloaded within seconds"""
+        scanner = self.scanner
+        if url in self.sitemap_urls:
+            self.add_sitemap(url, None)
+            return
+
+        if scanner.print_errors:
+            print(f'Error downloading page {url} from {self.hoster_name}: {e}')
+        self.urls_with_errors_new.append(url)
+        self.errors_new.append((url, self.hoster_name, str(e)))
+        scanner.num_crawl_errors += 1
+        scanner.metrics.count('errors')
+        if scanner.metrics.enabled:
+            scanner.metrics.add(self.hoster_url, { 'error': seconds })
+
+        if self.breaker.record_failure(e, seconds) and (scanner.debug or scanner.print_errors):
+            print(f'Aborted {self.hoster_name} after {self.breaker.failures} consecutive connection errors')
+
+    def add_retry(self, url: str, e):
+        """Document a request that is retried after a transient error"""
+        self.scanner.run_counters['requests_retried'] += 1
+        self.scanner.metrics.count('retries')
+
+        if self.scanner.debug:
+            print('      ', 'retry', url, 'after', e)
+
+    def add_throttled(self, url: str, e: ThrottledResponse):
+        """Queue a url again after a 429 or 503 response or document it as error once all retries were throttled
+
+        A url that is throttled again while the other pages of its domain respond healthy is broken, so it is not retried.
+        """
+        attempts = self.throttled_attempts.get(url, 0)
+        if attempts >= self.scanner.retries or (attempts > 0 and self.scanner.rate_controller.is_healthy(url)):
+            self.add_error(url, e)
+            return
+
+        self.throttled_attempts[url] = attempts + 1
+        self.scanner.run_counters['requests_throttled'] += 1
+        self.add_retry(url, e)
+        if url in self.sitemap_urls:
+            self.sitemaps_to_request.append(url)
+        else:
+            self.throttled.append(url)
+
+    def add_skipped(self, url: str, e: SkippedResponse):
+        """Document a url that was not downloaded since it is no HTML page"""
+        if url in self.sitemap_urls:
+            self.add_sitemap(url, None)
+            return
+
+        self.scanner.run_counters['pages_skipped_no_html'] += 1
+        self.scanner.run_counters['bytes_not_downloaded'] += e.bytes_saved
+
+        if self.scanner.debug:
+            print('      ', 'skipped', url, 'with content type', e.content_type)
+
+    def analysis_job(self, url: str, page: Page):
+        """Return (function, arguments) analyzing a downloaded page in the analysis pool or None if it is processed without parsing"""
+        scanner = self.scanner
+        if url in self.sitemap_urls:
+            return None
+
+        # pages with the content of an analyzed page or of the last scan are not parsed again
+        if scanner.content_memo.enabled or scanner.page_store.enabled:
+            page_content_hash = content_hash(page.content)
+            if scanner.content_memo.get(page_content_hash) is not None:
+                return None
+            stored = scanner.page_store.page(url) if scanner.page_store.enabled else None
+            if stored is not None and stored.content_hash == page_content_hash:
+                return None
+
+        return analyze_page, page.content, page.headers.get('Content-Type', ''), scanner.metrics.enabled
+
+    def add_page(self, url: str, page: Page, prepared = None):
+        """Process a downloaded page, profiled if it is sampled by --profile, with the result of its analysis job if it was analyzed already"""
+        if url in self.sitemap_urls:
+            self.add_sitemap(url, page)
+            return
+
+        with self.scanner.profiler.page(url):
+            self.process_page(url, page, prepared)
+
+    def process_page(self, url: str, page: Page, prepared = None):
+        """Parse a downloaded page, search it for keywords and add its links to the queue"""
+        scanner = self.scanner
+        run_counters = scanner.run_counters
+        metrics = scanner.metrics
+        response_url = unifyurl(page.url)
+
+        if page.cached:
+            run_counters['cache_hits'] += 1
+            run_counters['cache_bytes_saved'] += len(page.content)
+        elif scanner.cache:
+            run_counters['cache_misses'] += 1
+
+        if page.truncated:
+            run_counters['pages_truncated'] += 1
+            run_counters['bytes_not_downloaded'] += max(0, content_length(page.headers) - scanner.max_page_bytes)
+
+        # Parse HTML into visible text and links and search for matches in page text, unless it did not change
+        timings = page.timings if metrics.enabled else None
+        if scanner.page_store.enabled:
+            keywords_for_this_url, links, anchors, reused = self.analyze_incremental(url, response_url, page, timings, prepared)
+        else:
+            keywords_for_this_url, links, anchors = self.analyze(response_url, page, timings, prepared)
+            reused = False
+        self.breaker.record_success()
+        metrics.count('pages')
+        run_counters['pages_processed'] += 1
+
+        # defer the landing page until the sitemap tells whether the hoster changed or which urls it lists
+        if (scanner.page_store.enabled or scanner.priority) and url == self.hoster_url and self.sitemap_url is None:
+            sitemaps = scanner.rate_controller.sitemaps(url)
+            self.sitemap_url = sitemaps[0] if sitemaps else baseurl(self.hoster_url) + SITEMAP_PATH
+            self.sitemap_urls.add(self.sitemap_url)
+            self.sitemaps_to_request.append(self.sitemap_url)
+            self.sitemap_scopes = (self.hoster_url, response_url)
+            self.landing_page = (url, response_url, keywords_for_this_url, links, anchors, reused)
+        else:
+            self.add_results(url, response_url, keywords_for_this_url, links, timings, anchors)
+
+        if timings is not None:
+            metrics.add(self.hoster_url, timings)
+
+    def analyze(self, response_url: str, page: Page, timings: dict = None, prepared = None):
+        """Return keywords found in a downloaded page, its links that should be crawled and their anchor texts"""
+        scanner = self.scanner
+        analyzed = self.analyze_content(content_hash(page.content) if scanner.content_memo.enabled else None, page, timings, None, prepared)
+        return analyzed.keywords, self.crawlable_links(analyzed, response_url, timings), analyzed.anchors
+
+    def analyze_incremental(self, url: str, response_url: str, page: Page, timings: dict = None, prepared = None):
+        """Return keywords, links, anchor texts and True if the page did not change, parsing and matching only what changed since the last scan"""
+        scanner = self.scanner
+        page_content_hash = content_hash(page.content)
+        stored = scanner.page_store.page(url)
+
+        if stored is not None and stored.content_hash == page_content_hash:
+            # reuse keywords and links of a page that is byte-identical to the last scan
+            scanner.run_counters['pages_reused'] += 1
+            self.pages_new.append(stored._replace(response_url=response_url))
+            return stored.keywords, stored.links, stored.anchors, True
+
+        analyzed = self.analyze_content(page_content_hash, page, timings, stored, prepared)
+        links = self.crawlable_links(analyzed, response_url, timings)
+        # only the anchor texts of the crawlable links are needed to queue them again
+        anchors = {link: analyzed.anchors[link] for link in links if link in analyzed.anchors} if analyzed.anchors is not None else None
+        self.pages_new.append(StoredPage(url, response_url, page_content_hash, analyzed.text_hash, analyzed.keywords, links, anchors))
+        return analyzed.keywords, links, analyzed.anchors, False
+
+    def analyze_content(self, page_content_hash: bytes, page: Page, timings: dict = None, stored: StoredPage = None, prepared = None):
+        """Return AnalyzedContent of a page, reusing the analysis of a page with the same content of any hoster
+
+        prepared is (parsed page, indices of the matched keywords, timings) if the page was analyzed in the analysis pool.
+        """
+        scanner = self.scanner
+        run_counters = scanner.run_counters
+        analyzed = scanner.content_memo.get(page_content_hash) if page_content_hash is not None else None
+        if analyzed is not None:
+            run_counters['pages_same_content'] += 1
+            return analyzed
+
+        matched = None
+        if prepared is not None:
+            parsed, matched, prepared_timings = prepared
+            if timings is not None and prepared_timings:
+                for name, seconds in prepared_timings.items():
+                    timings[name] = timings.get(name, 0.0) + seconds
+        else:
+            parsed = scanner.parser(page.content, page.headers.get('Content-Type', ''), timings)
+        page_text_hash = text_hash(parsed.text) if scanner.page_store.enabled else None
+        if stored is not None and stored.text_hash == page_text_hash:
+            # only the markup changed, so the visible text contains the same keywords
+            run_counters['pages_reparsed'] += 1
+            keywords_for_this_url = stored.keywords
+        else:
+            if scanner.page_store.enabled:
+                run_counters['pages_reprocessed'] += 1
+
+            # Search for matches in page text
+            with phase(timings, 'match'):
+                keywords_for_this_url = [scanner.keywords[j] for j in (matched if matched is not None else scanner.matcher.match(parsed.text))]
+
+        analyzed = AnalyzedContent(page_text_hash, simhash(parsed.text) if scanner.dedup else None, keywords_for_this_url, parsed.links, link_anchors(parsed))
+        if page_content_hash is not None:
+            scanner.content_memo.put(page_content_hash, analyzed)
+        return analyzed
+
+    def crawlable_links(self, analyzed: AnalyzedContent, response_url: str, timings: dict = None):
+        """Return links of an analyzed page that should be crawled or none if the page is a near-duplicate of another page of this hoster"""
+        if analyzed.simhash is not None:
+            if any(hamming_distance(analyzed.simhash, other) <= NEAR_DUPLICATE_DISTANCE for other in self.simhashes):
+                self.scanner.run_counters['pages_near_duplicate'] += 1
+                return []
+            self.simhashes.append(analyzed.simhash)
+
+        # Only crawl subpage if it belongs to the hosters website and was not yet crawled
+        # only accept links starting with http(s):// and not ending with a media file extension
+        # remove the trailing slash for consistency and prevent duplicate crawls
+        # don't crawl blog articles since they don't really matter for this topic
+        # take lower case url and remove everything after '?' or '#' as well as trailing '/'
+        with phase(timings, 'links'):
+            return list(self.scanner.url_policy.crawlable_links(analyzed.links, (self.hoster_url, response_url)))
+
+    def add_results(self, url: str, response_url: str, keywords_for_this_url, links, timings: dict = None, anchors: dict = None):
+        """Document a crawled url with its keywords and add its links to the queue"""
+        scanner = self.scanner
+
+        # document that we crawled this url already
+        self.urls_crawled_new.append(url)
+        scanner.num_urls_crawled += 1
+
+        # also document if the response url is different than the initial one due to redirects
+        if (self.parsed_hoster_url not in response_url) and (response_url not in self.urls_crawled_new) and not scanner.state.is_url_crawled(response_url):
+            self.urls_crawled_new.append(response_url)
+            scanner.num_urls_crawled += 1
+
+        for keyword in keywords_for_this_url:
+            j = scanner.keyword_index.get(keyword)
+            if j is not None:
+                self.matches[j] += 1
+            if scanner.debug:
+                print('      ', keyword, 'at', self.hoster_name, '(' + response_url + ')')
+
+        # document keywords for specific url
+        num_keywords = len(self.keywords_for_this_hoster)
+        if len(keywords_for_this_url) > 0:
+            for keyword in keywords_for_this_url:
+                if keyword not in self.keywords_for_this_hoster:
+                    self.keywords_for_this_hoster.add(keyword)
+            self.urls_crawled_new_with_keywords.append(response_url + ',' + self.hoster_name + ',' + ','.join(keywords_for_this_url).rstrip(','))
+            self.url_keywords_new.append((response_url, self.hoster_name, keywords_for_this_url))
+
+        # stop crawling this hoster once its pages no longer add new keywords
+        if not self.unchanged and self.saturation.record(len(self.keywords_for_this_hoster) - num_keywords) and scanner.debug:
+            print('      ', 'keywords saturated after', self.saturation.num_pages, 'pages')
+
+        # Add links to the queue for further crawling
+        with phase(timings, 'links'):
+            if scanner.priority:
+                self.push_links(links, self.depths.get(url, 0) + 1, len(keywords_for_this_url), anchors)
+            else:
+                for link_url in links:
+                    if link_url not in self.frontier:
+                        self.frontier.push(link_url)
+
+    def push_links(self, links, depth: int, parent_keywords: int = 0, anchors: dict = None):
+        """Add links to the priority frontier, the more keywords their anchor text contains the higher their priority"""
+        matcher = self.scanner.matcher
+        for link_url in links:
+            if link_url in self.visited:
+                continue
+            anchor_text = anchors.get(link_url, '') if anchors else ''
+            anchor_keywords = len(matcher.match(anchor_text)) if anchor_text else 0
+            if self.frontier.push(link_url, link_priority(link_url, anchor_text, depth, parent_keywords, anchor_keywords)):
+                self.depths.setdefault(link_url, depth)
+
+    def add_sitemap(self, url: str, page: Page):
+        """Process a downloaded sitemap or None if it could not be downloaded"""
+        if url == self.sitemap_url:
+            self.check_sitemap(page)
+        if self.scanner.priority and not self.unchanged and page is not None and page.status == 200:
+            self.seed_from_sitemap(page)
+
+    def seed_from_sitemap(self, page: Page):
+        """Queue the urls of a sitemap, as if the landing page linked to them, and the child sitemaps of a sitemap index"""
+        scanner = self.scanner
+        urls, sitemaps = parse_sitemap(page.content)
+        for sitemap_url in sitemaps:
+            sitemap_url = unifyurl(sitemap_url)
+            if len(self.sitemap_urls) > MAX_CHILD_SITEMAPS:
+                break
+            if sitemap_url.endswith('.xml') and sitemap_url.startswith(URL_BEGINNING) and sitemap_url not in self.sitemap_urls:
+                self.sitemap_urls.add(sitemap_url)
+                self.sitemaps_to_request.append(sitemap_url)
+
+        links = scanner.url_policy.crawlable_links(urls[:MAX_SITEMAP_URLS], self.sitemap_scopes)
+        self.push_links(links, 1)
+
+        if scanner.debug:
+            print('      ', 'sitemap', page.url, 'with', len(links), 'crawlable urls and', len(sitemaps), 'sitemaps')
+
+    def check_sitemap(self, page: Page):
+        """Reuse the results of the last scan if landing page and sitemap did not change, else crawl the deferred landing page"""
+        scanner = self.scanner
+        self.sitemap_hash = content_hash(page.content) if page is not None and page.status == 200 else None
+        url, response_url, keywords_for_this_url, links, anchors, reused = self.landing_page
+        if not scanner.page_store.enabled:
+            self.add_results(url, response_url, keywords_for_this_url, links, None, anchors)
+            return
+
+        stored, stored_sitemap_hash = scanner.page_store.sitemap_hash(self.hoster_url)
+
+        if reused and stored and self.sitemap_hash == stored_sitemap_hash:
+            self.unchanged = True
+            scanner.run_counters['hosters_unchanged'] += 1
+            for stored_page in scanner.page_store.hoster_pages(self.hoster_url):
+                if stored_page.url != url:
+                    scanner.run_counters['pages_reused'] += 1
+                self.add_results(stored_page.url, stored_page.response_url, stored_page.keywords, ())
+
+            if scanner.debug:
+                print('      ', 'landing page and sitemap unchanged, reused', len(self.urls_crawled_new), 'urls of the last scan')
+        else:
+            self.add_results(url, response_url, keywords_for_this_url, links, None, anchors)
+
+def link_anchors(parsed):
+    """Return dictionary with the anchor text of each unified link of a parsed page or None if anchors were not parsed"""
+    if getattr(parsed, 'anchors', None) is None:
+        return None
+    anchors = {}
+    for link, anchor_text in zip(parsed.links, parsed.anchors):
+        anchor_text = ' '.join(anchor_text.split())
+        if anchor_text:
+            url = unifyurl(link)
+            anchors[url] = anchors[url] + ' ' + anchor_text if url in anchors else anchor_text
+    return anchors
+
+class Scanner:
+    """Loads hosters and products, crawls the hoster websites for keywords and writes the results to the output folder
+
+    fetcher is called like fetcher.fetch_page(session, url, timeout, max_page_bytes, cache, rate_controller) by the sync engine,
+    parser like parse_page(content, content_type, timings) and matcher.match(text) returns the indices of the keywords in text.
+    """
+
+    def __init__(self, options: ScanOptions = None, fetcher = None, parser = None, matcher = None):
+        options = options or ScanOptions()
+        self.options = options
+
+        # Define the input file paths, changed if specified by the options
+        self.hosters_csv = options.hosters if options.hosters and os.path.exists(options.hosters) else 'input/hosters_to_be_crawled.csv'
+        self.products_csv = options.products if options.products and os.path.exists(options.products) else 'input/products.csv'
+        self.blocked_hosters_txt = 'input/blocked_hosters.txt'
+        self.blocked_url_endings_txt = options.blocked_url_endings if options.blocked_url_endings and os.path.exists(options.blocked_url_endings) else 'input/blocked_url_endings.txt'
+
+        # Define the output file paths
+        output_dir = options.output_dir.rstrip('/') or 'output'
+        self.output_dir = output_dir
+        self.output_csv = output_dir + '/products_mentioned_by_hosters.csv'
+        self.error_log = output_dir + '/crawling_errors.log'
+        self.products_txt = output_dir + '/products.txt'
+        self.keywords_txt = output_dir + '/keywords.txt'
+        self.hosters_with_keywords_csv = output_dir + '/hosters_with_keywords.csv'
+        self.hosters_aborted_csv = output_dir + '/hosters_aborted.csv'
+        self.hosters_saturated_csv = output_dir + '/hosters_saturated.csv'
+        self.urls_crawled_with_keywords_csv = output_dir + '/urls_crawled_with_keywords.csv'
+        self.urls_crawled_txt = output_dir + '/urls_crawled.txt'
+        self.urls_with_errors_txt = output_dir + '/urls_with_errors.txt'
+        self.statistics_txt = output_dir + '/statistics.txt'
+        self.run_counters_json = output_dir + '/run_counters.json'
+        self.run_metrics_json = output_dir + '/run_metrics.json'
+        self.state_db = output_dir + '/crawl_state.sqlite'
+        self.page_store_db = options.incremental if isinstance(options.incremental, str) and options.incremental else output_dir + '/page_store.sqlite'
+        self.profile_prefix = output_dir + '/profile-'
+        self.shards_dir = output_dir + '/shards'
+
+        # Number of links to crawl (default = 30)
+        self.num_links_to_crawl = 100 if options.full_scan else options.max_depth
+        self.debug = options.debug
+        self.print_errors = options.debug or options.print_errors
+        self.print_hosters = options.debug or options.print_hosters
+        self.start_at = options.start_at
+        self.stop_at = options.stop_at
+        self.top_user_limit = options.max_hosters
+        self.engine = options.engine
+        self.concurrency = max(1, options.concurrency)
+        self.per_host = max(1, options.per_host)
+        self.workers = max(1, options.workers)
+        self.parse_processes = max(0, options.parse_processes) or max(1, (os.cpu_count() or 1) // self.workers)
+        self.parser_backend = options.parser
+        self.priority = options.frontier == 'priority'
+        self.dedup = options.dedup
+        self.max_page_bytes = max(1, options.max_page_bytes)
+        self.retries = max(0, options.retries)
+        self.max_failures = max(0, options.max_failures)
+        self.saturation_pages = max(0, options.saturation_pages)
+        self.saturation_yield = max(0.0, options.saturation_yield)
+        self.cache = None
+        self.session = None
+        self.state = None
+        self.analysis_pool = None
+        self.output_complete = True
+
+        # Pages of the last scan that are not parsed and matched again if they did not change, only in incremental scans
+        self.page_store = NullPageStore()
+
+        # Keywords and links of the last pages by their content hash, shared by all hosters of this process
+        self.content_memo = ContentMemo(options.memo_size)
+
+        # Replaceable components for downloading, parsing and keyword matching
+        self.fetcher = fetcher or fetch_page
+        self.parser = parser or self.parse_page
+        self.matcher = matcher
+
+        # Append the results of each finished hoster to the output files in a background thread
+        self.writer = OutputWriter(options.flush_interval, options.fsync_every)
+
+        # Measure the seconds of each phase per page only if metrics are specified
+        self.metrics = Metrics(options.metrics, 'hoster_scan', options.metrics_interval) if options.metrics else NullMetrics()
+
+        # Profile every n-th page only if profile is specified, the hosters can be selected with start_at and stop_at
+        self.profiler = Profiler(options.profile_every, options.profile_memory, options.profile_top) if options.profile else NullProfiler()
+
+        # Adapt parallel requests and intervals between requests to the responses of each hoster
+        self.rate_controller = RateController(self.per_host if self.engine == 'async' else 1, max(0, options.max_crawl_delay))
+
+        # Loaded hosters, products and keywords
+        self.blocked_urls = BLOCKED_URLS
+        self.hosters = []
+        self.hoster_dict = {} # hoster_dict contains all hoster entries with the hoster id as key
+        self.products = [] # products is a string list containing only the official name of each product
+        self.keywords = [] # keywords is a string list containing all keywords to search
+        self.product_to_variations_dict = {} # all official names as key and its variations as string list as value
+        self.keyword_to_product_dict = {} # each keyword as key and the related parent product as value
+        self.keyword_index = {}
+        self.product_keywords = []
+        self.url_policy = None
+        self.blocked_url_endings = BLOCKED_URL_ENDINGS
+
+        # Initialize aggregated statistics and counters to store results
+        self.stats_aggregator = None
+        self.stats_key = None
+        self.num_hosters_checked = 0
+        self.num_hosters_with_products = 0
+        self.num_hosters_with_products_last = 0
+        self.num_urls_crawled = 0
+        self.num_crawl_errors = 0
+
+        # Counters of the current run that can't be restored from the output files, summed up over all worker processes
+        self.run_counters = {
+            'pages_skipped_no_html': 0,
+            'pages_truncated': 0,
+            'bytes_not_downloaded': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'cache_bytes_saved': 0,
+            'requests_retried': 0,
+            'requests_throttled': 0,
+            'hosters_aborted': 0,
+            'seconds_saved_by_aborting': 0,
+            'hosters_saturated': 0,
+            'pages_saved_by_saturation': 0,
+            'hosters_unchanged': 0,
+            'pages_reused': 0,
+            'pages_reparsed': 0,
+            'pages_reprocessed': 0,
+            'pages_processed': 0,
+            'pages_same_content': 0,
+            'pages_near_duplicate': 0,
+            'urls_language_variants': 0
+        }
+
+    @property
+    def num_hosters(self):
+        return len(self.hosters)
+
+    def parse_page(self, content: bytes, content_type: str, timings: dict = None):
+        """Parse a page with the parser backend of the options"""
+        return parse_page(content, content_type, self.parser_backend, timings, self.priority)
+
+    def check_requirements(self):
+        """Raise ScanError if a module required by the engine or the parser is not installed"""
+        if self.engine == 'async':
+            from async_engine import ASYNC_ENGINE_AVAILABLE
+            if not ASYNC_ENGINE_AVAILABLE:
+                raise ScanError('The async engine requires the aiohttp module: pip install aiohttp')
+
+        if self.parser == self.parse_page and not parser_available(self.parser_backend):
+            raise ScanError(f'The {self.parser_backend} parser requires the {self.parser_backend} module: pip install {self.parser_backend}')
+
+    def load(self):
+        """Check the required modules, load hosters, products and blocked url endings and create the output folder"""
+        self.check_requirements()
+        self.load_hosters()
+        self.load_products()
+        self.load_url_policy()
+
+        # Make sure the output folder exists
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir)
+
+    def load_hosters(self, filename: str = None):
+        """Load list of hosting companies and their URLs from CSV file, e.g. another batch of hosters
+
+        Entries without a url and hosters that are on the block list are excluded.
+        """
+        if filename:
+            self.hosters_csv = filename
+
+        # Load list of blocked hoster urls from text file
+        if os.path.exists(self.blocked_hosters_txt):
+            with open(self.blocked_hosters_txt, 'r') as file:
+                self.blocked_urls = tuple([line.strip().rstrip('/').lower() for line in file if line.strip()])
+
+        self.hosters = []
+        self.hoster_dict = {}
+        urls_added = set()
+        with open(self.hosters_csv, 'r') as csvfile:
+            reader = csv.reader(csvfile)
+            for row in reader:
+                hoster_url = row[0].strip().rstrip('/').lower()
+                hoster_name = row[1].strip().replace(',','').replace('"','').replace('\'','')
+                hoster_id = row[2].strip().lower()
+                if hoster_url.startswith(URL_BEGINNING) \
+                    and hoster_url not in self.blocked_urls \
+                    and hoster_url not in urls_added:
+
+                    if not hoster_id:
+                        hoster_id = domain(hoster_url).replace('www.', '').replace('.', '')
+                    if not hoster_name:
+                        hoster_name = domain(hoster_url).replace('www.', '')
+
+                    self.hosters.append([hoster_url, hoster_name, hoster_id])
+                    self.hoster_dict[hoster_id] = hoster_name
+                    urls_added.add(hoster_url)
+
+    def load_products(self):
+        """Import list of products and their variations from csv file and compile the keyword matcher"""
+        with open(self.products_csv, 'r') as csvfile:
+            reader = csv.reader(csvfile)
+            for row in reader:
+                product = row[0].strip()
+                if product and product not in self.products:
+                    self.products.append(product)
+                    variations = []
+                    for keyword in row:
+                        if keyword and keyword not in self.keywords:
+                            self.keywords.append(keyword)
+                            self.keyword_to_product_dict[keyword] = product
+                            if keyword != product:
+                                variations.append(keyword)
+                    self.product_to_variations_dict[product] = variations
+
+        # Index of each keyword and indices of the keywords of each product including the official product name
+        self.keyword_index = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self.product_keywords = [[i for i, keyword in enumerate(self.keywords) if keyword == product or keyword in self.product_to_variations_dict[product]]
+                                 for product in self.products]
+        self.stats_aggregator = StatsAggregator(len(self.keywords), self.product_keywords, self.top_user_limit)
+        self.stats_key = settings_key(self.keywords, self.product_keywords, self.top_user_limit)
+
+        # Compile all keywords into one matcher that searches each page text in a single pass
+        if self.matcher is None:
+            self.matcher = KeywordMatcher(self.keywords)
+
+    def load_url_policy(self):
+        """Load list of blocked url endings from text file and compile them with the blocked substrings into one url filter"""
+        blocked_url_endings = BLOCKED_URL_ENDINGS
+        if os.path.exists(self.blocked_url_endings_txt):
+            with open(self.blocked_url_endings_txt, 'r') as file:
+                blocked_url_endings = tuple([line.strip().rstrip('/').lower() for line in file if line.strip()])
+
+        self.blocked_url_endings = blocked_url_endings
+        self.url_policy = UrlPolicy(blocked_url_endings, BLOCKED_URL_SUBSTRINGS)
+
+    def list_hosters(self):
+        """Print all hosters within the index range"""
+        for i, hoster in enumerate(self.hosters):
+            if i >= self.start_at and i <= self.stop_at:
+                print(hoster[1], '(' + domain(hoster[0]) + ')')
+
+        print()
+        print('{:>7,}'.format(self.num_hosters), 'hosters imported from', self.hosters_csv)
+
+    def list_products(self):
+        """Print all products within the index range with their variations"""
+        for i, product in enumerate(self.products):
+            if i >= self.start_at and i <= self.stop_at:
+                variations = self.product_to_variations_dict[product]
+                if len(variations) == 0:
+                    print(product)
+                else:
+                    print(product, '(' + ', '.join(variations).rstrip(', ') + ')')
+
+        print()
+        print('{:>7,}'.format(len(self.products)), 'products in', self.products_csv)
+        print('{:>7,}'.format(len(self.keywords)), 'search terms for those products in total')
+
+    def write_keyword_lists(self):
+        """Generate products.txt and keywords.txt files, also if the output folder was not created by load"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        write_list_to_file(self.products_txt, 'w', self.products)
+        write_list_to_file(self.keywords_txt, 'w', self.keywords)
+
+    def matches_to_dict(self, matches):
+        """Return dictionary with each matched keyword and its number of matching pages"""
+        return {keyword: matches[j] for j, keyword in enumerate(self.keywords) if matches[j] > 0}
+
+    def matches_from_dict(self, matches_dict: dict):
+        """Return list with the number of matching pages for each keyword"""
+        return [matches_dict.get(keyword, 0) for keyword in self.keywords]
+
+    def sparse_matches(self, matches_dict: dict):
+        """Return dictionary with the index of each matched keyword that is still in the keywords list and its number of matching pages"""
+        return {self.keyword_index[keyword]: count for keyword, count in matches_dict.items() if keyword in self.keyword_index}
+
+    def open_state(self):
+        """Delete previous data if reset, open the crawl state and import the data of previous runs"""
+
+        # Write CSV header to CSV file if it does not yet exist
+        if self.options.reset or not os.path.exists(self.output_csv):
+            write_csv_to_file(self.output_csv, 'w', ['URL', 'Company Name', 'HosterID', 'Number of Matched Technologies'] + self.keywords)
+
+            if self.options.reset:
+                deletefiles((self.urls_crawled_txt, self.urls_with_errors_txt, self.error_log, self.hosters_with_keywords_csv,
+                             self.urls_crawled_with_keywords_csv, self.hosters_aborted_csv, self.hosters_saturated_csv, self.state_db, self.state_db + '-wal', self.state_db + '-shm'))
+                if os.path.exists(self.shards_dir):
+                    shutil.rmtree(self.shards_dir)
+
+        # Open the crawl state and import the output files once if they were written by a version without crawl state
+        state_exists = os.path.exists(self.state_db)
+        self.state = CrawlState(self.state_db)
+        if not state_exists and self.state.is_empty():
+            self.import_output_files()
+
+        # Merge shard files left over by an interrupted multi-process scan before importing the existing data set
+        self.merge_shards()
+        self.complete_output_files()
+        self.import_existing_data()
+
+        # Open the page store of incremental scans, which is kept by reset, with the settings its pages depend on
+        if self.options.incremental and not self.page_store.enabled:
+            key = settings_key(self.keywords, self.parser_backend, self.num_links_to_crawl, list(self.blocked_url_endings), self.options.frontier,
+                               self.saturation_pages, self.saturation_yield)
+            self.page_store = PageStore(self.page_store_db, key)
+
+    def close(self):
+        self.writer.close()
+        if self.state:
+            self.state.close()
+            self.state = None
+        self.page_store.close()
+        self.page_store = NullPageStore()
+
+    def import_output_files(self):
+        """Import results, crawled urls and urls with errors of previous runs from the output files into the crawl state"""
+        state = self.state
+
+        # Import crawled urls
+        if os.path.exists(self.urls_crawled_txt):
+            with open(self.urls_crawled_txt, 'r') as urls_crawled_file:
+                state.add_urls_crawled([line.strip() for line in urls_crawled_file if line.strip()])
+
+        # Import urls with errors
+        if os.path.exists(self.urls_with_errors_txt):
+            with open(self.urls_with_errors_txt, 'r') as urls_with_errors_file:
+                state.add_urls_with_errors([(line.strip(), '', '') for line in urls_with_errors_file if line.strip()])
+
+        # Import urls with keywords
+        if os.path.exists(self.urls_crawled_with_keywords_csv):
+            with open(self.urls_crawled_with_keywords_csv, 'r') as csvfile:
+                state.add_url_keywords([(row[0], row[1], row[2:]) for row in csv.reader(csvfile) if len(row) > 2])
+
+        # Import results from output csv, using the keywords of its header
+        if os.path.exists(self.output_csv):
+            with open(self.output_csv, 'r') as csvfile:
+                reader = csv.reader(csvfile)
+                header_keywords = []
+                for row in reader:
+                    hoster_url = row[0].strip().rstrip('/').lower()
+                    if hoster_url.startswith(URL_BEGINNING):
+                        hoster_name = row[1]
+                        hoster_id = row[2]
+                        matches_dict = {keyword: int(value) for keyword, value in zip(header_keywords, row[4:]) if value and int(value) > 0}
+                        state.add_hoster(hoster_url, hoster_name, hoster_id, matches_dict)
+                    elif row and row[0] == 'URL':
+                        header_keywords = row[4:]
+
+        state.commit()
+
+    def import_existing_data(self):
+        """Import counters and results of previous runs from the crawl state"""
+        counters = self.state.counters()
+        self.num_hosters_checked = counters['num_hosters_checked']
+        self.num_hosters_with_products = counters['num_hosters_with_products']
+        self.num_urls_crawled = counters['num_urls_crawled']
+        self.num_crawl_errors = counters['num_crawl_errors']
+
+        self.stats_aggregator = self.load_stats()
+
+    def load_stats(self, full: bool = False):
+        """Return the aggregated statistics saved with the last hoster and add the hosters stored after them, of all hosters if full"""
+        aggregator = StatsAggregator(len(self.keywords), self.product_keywords, self.top_user_limit)
+        saved = self.state.stats() if not full else None
+        last_hoster = 0
+        if saved is not None and saved['key'] == self.stats_key:
+            aggregator.restore(saved['aggregator'])
+            last_hoster = saved['last_hoster']
+
+        # e.g. hosters merged from the shards of worker processes
+        added = set()
+        for hoster_url, hoster_name, hoster_id, matches_dict in self.state.hosters(last_hoster):
+            if not aggregator.complete and (hoster_id in added or self.state.is_hoster_id_stored(hoster_id, last_hoster)):
+                # a restored aggregator can't replace the matches of a hoster with the same id
+                return self.load_stats(True)
+            aggregator.add(hoster_id, hoster_name, self.sparse_matches(matches_dict))
+            added.add(hoster_id)
+
+        if added or saved is None:
+            self.save_stats(aggregator)
+            self.state.commit()
+        return aggregator
+
+    def save_stats(self, aggregator: StatsAggregator):
+        """Store the aggregated statistics of all stored hosters in the crawl state, committed with the next commit"""
+        self.state.set_stats({'key': self.stats_key, 'last_hoster': self.state.last_hoster(), 'aggregator': aggregator.snapshot()})
+
+    def write_output_csv(self):
+        """Write the output CSV file with one column per keyword for each hoster with the sparse matches of the crawl state"""
+        write_csv_to_file(self.output_csv, 'w', ['URL', 'Company Name', 'HosterID', 'Number of Matched Technologies'] + self.keywords)
+
+        with open(self.output_csv, 'a+', newline='') as output_csv:
+            output_writer = csv.writer(output_csv)
+            for hoster_url, hoster_name, hoster_id, matches_dict in self.state.hosters():
+                matches = self.matches_from_dict(matches_dict)
+                output_writer.writerow([hoster_url, hoster_name, hoster_id, sum(matches)] + matches)
+
+    def export(self):
+        """Write all output files with the data of the crawl state"""
+        keywords = self.keywords
+        self.write_output_csv()
+        deletefiles((self.urls_crawled_txt, self.urls_with_errors_txt, self.error_log, self.hosters_with_keywords_csv, self.urls_crawled_with_keywords_csv))
+
+        with open(self.hosters_with_keywords_csv, 'w', newline='') as hosters_with_keywords_csv:
+            hosters_with_keywords_writer = csv.writer(hosters_with_keywords_csv)
+            for hoster_url, hoster_name, hoster_id, matches_dict in self.state.hosters():
+                if any(keyword in matches_dict for keyword in keywords):
+                    hosters_with_keywords_writer.writerow([hoster_url, hoster_name, hoster_id] + [keyword for keyword in keywords if keyword in matches_dict])
+
+        write_list_to_file(self.urls_crawled_txt, 'w', self.state.urls_crawled())
+        write_list_to_file(self.urls_crawled_with_keywords_csv, 'w', (url + ',' + hoster_name + ',' + ','.join(keywords_for_url) for url, hoster_name, keywords_for_url in self.state.url_keywords()))
+
+        with open(self.urls_with_errors_txt, 'w') as urls_with_errors_file, open(self.error_log, 'w') as error_file:
+            for url, hoster_name, error in self.state.urls_with_errors():
+                urls_with_errors_file.write(f"{url}\n")
+                if error:
+                    error_file.write(f"Error downloading page {url} from {hoster_name}: {error}\n")
+
+    def complete_output_files(self):
+        """Rewrite the output files from the crawl state if lines of stored hosters did not reach them, e.g. after a crash"""
+        self.output_complete = self.state.is_output_complete()
+        if not self.output_complete:
+            print('Output files were not completely written by the last run and are rewritten from', self.state_db)
+            self.export()
+            self.state.set_output_complete(True)
+            self.state.commit()
+            self.output_complete = True
+
+    def merge_shards(self):
+        """Merge the shard files written by worker processes into the output files and delete the shards
+
+        Rows of hosters are sorted by the position of the hoster in the hosters list and all other lines
+        are sorted alphabetically, so the merged output is the same for any number of workers above one.
+        A scan without workers writes the lines in the order the pages were crawled.
+        """
+        shards_dir = self.shards_dir
+        if not os.path.exists(shards_dir):
+            return
+
+        hoster_index = {unifyurl(hoster[0]): i for i, hoster in enumerate(self.hosters)}
+        def hoster_order(row):
+            return (hoster_index.get(unifyurl(row[0]), self.num_hosters), row[0])
+
+        for filename in (self.hosters_with_keywords_csv, self.hosters_aborted_csv, self.hosters_saturated_csv):
+            rows = []
+            for shard_dir in sorted(os.listdir(shards_dir)):
+                shard_file = os.path.join(shards_dir, shard_dir, os.path.basename(filename))
+                if os.path.exists(shard_file):
+                    with open(shard_file, 'r') as csvfile:
+                        rows += [row for row in csv.reader(csvfile) if row and row[0].startswith(URL_BEGINNING)]
+            if rows:
+                with open(filename, 'a+', newline='') as csvfile:
+                    csv.writer(csvfile).writerows(sorted(rows, key=hoster_order))
+
+        for filename in (self.urls_crawled_txt, self.urls_with_errors_txt, self.urls_crawled_with_keywords_csv, self.error_log):
+            lines = []
+            for shard_dir in sorted(os.listdir(shards_dir)):
+                shard_file = os.path.join(shards_dir, shard_dir, os.path.basename(filename))
+                if os.path.exists(shard_file):
+                    with open(shard_file, 'r') as file:
+                        lines += [line.rstrip('\n') for line in file if line.strip()]
+            if lines:
+                write_list_to_file(filename, 'a+', sorted(lines))
+
+        # merge the crawl states of all shards in the same order into the crawl state
+        shard_hosters = []
+        shard_urls_crawled = []
+        shard_urls_with_errors = []
+        shard_url_keywords = []
+        for shard_dir in sorted(os.listdir(shards_dir)):
+            shard_file = os.path.join(shards_dir, shard_dir, os.path.basename(self.state_db))
+            if os.path.exists(shard_file):
+                shard_state = CrawlState(shard_file)
+                if not shard_state.is_output_complete():
+                    self.state.set_output_complete(False)
+                shard_hosters += shard_state.hosters()
+                shard_urls_crawled += shard_state.urls_crawled()
+                shard_urls_with_errors += shard_state.urls_with_errors()
+                shard_url_keywords += shard_state.url_keywords()
+                shard_state.close()
+
+        for hoster_url, hoster_name, hoster_id, matches_dict in sorted(shard_hosters, key=hoster_order):
+            self.state.add_hoster(hoster_url, hoster_name, hoster_id, matches_dict)
+        self.state.add_urls_crawled(sorted(shard_urls_crawled))
+        self.state.add_urls_with_errors(sorted(shard_urls_with_errors))
+        self.state.add_url_keywords(sorted(shard_url_keywords))
+        self.state.commit()
+
+        for shard_dir in sorted(os.listdir(shards_dir)):
+            shard_file = os.path.join(shards_dir, shard_dir, os.path.basename(self.run_counters_json))
+            if os.path.exists(shard_file):
+                with open(shard_file, 'r') as file:
+                    for key, value in json.load(file).items():
+                        self.run_counters[key] = self.run_counters.get(key, 0) + value
+
+            shard_file = os.path.join(shards_dir, shard_dir, os.path.basename(self.run_metrics_json))
+            if os.path.exists(shard_file):
+                self.metrics.merge(shard_file)
+
+            # keep the profiles of each worker
+            for filename in os.listdir(os.path.join(shards_dir, shard_dir)):
+                if filename.startswith(os.path.basename(self.profile_prefix)):
+                    name, extension = os.path.splitext(filename)
+                    shutil.move(os.path.join(shards_dir, shard_dir, filename), self.output_dir + '/' + name + '-' + shard_dir + extension)
+
+        shutil.rmtree(shards_dir)
+
+    def get_top_users(self, p: int):
+        """Return names of the hosters mentioning the product with index p most often"""
+        top = []
+        for hoster_id, hoster_name in self.stats_aggregator.top_hosters(p):
+            hoster_name = self.hoster_dict.get(hoster_id, hoster_name)
+            if hoster_name not in top:
+                top.append(hoster_name)
+        return top
+
+    def print_statistics(self, to_shell=False):
+        """Print statistics with summary table for keywords and products as well as metrics summary"""
+        from prettytable import PrettyTable
+
+        stats = []
+        run_counters = self.run_counters
+        num_hosters_with_products = self.num_hosters_with_products
+
+        # --- print keyword summary table ---
+        table = PrettyTable(field_names=['Keyword', 'Hosters', '%'])
+        #table.field_names = ['Keyword', 'Hosters', '%']
+        table.align['Keyword'] = 'l'
+        table.align['Hosters'] = 'r'
+        table.align['%'] = 'c'
+
+        # Calculate how many hosters use each keyword and their percentage
+        for i, keyword in enumerate(self.keywords):
+            # Number of hosters mentioning this keyword
+            num_hosters_with_this_keyword = self.stats_aggregator.keyword_counts[i]
+
+            # Only add a keyword to the table if there is at least one hoster mentioning it
+            if num_hosters_with_this_keyword > 0:
+                percentage = '{:.1%}'.format(num_hosters_with_this_keyword / num_hosters_with_products)
+                table.add_row([keyword, num_hosters_with_this_keyword, percentage])
+
+        # Sort and print table
+        stats.append(table.get_string(sortby='Hosters', reversesort=True))
+        stats.append('')
+
+        # --- print product summary table ---
+        table = PrettyTable(field_names=['Product', 'Hosters', '%', 'Examples'])
+        #table.field_names = ['Product', 'Hosters', '%', 'Examples']
+        table.align['Product'] = 'l'
+        table.align['Hosters'] = 'r'
+        table.align['%'] = 'c'
+        table.align['Examples'] = 'l'
+
+        # Calculate how many hosters use each product and their percentage
+        for p, product in enumerate(self.products):
+            # Number of hosters mentioning this product
+            num_hosters_with_this_product = self.stats_aggregator.product_counts[p]
+
+            # Only add a product to the table if there is at least one hoster mentioning it
+            if num_hosters_with_this_product > 0:
+                top_hosters_with_this_product = self.get_top_users(p)
+                percentage = '{:.1%}'.format(num_hosters_with_this_product / num_hosters_with_products)
+                table.add_row([product, num_hosters_with_this_product, percentage, ', '.join(top_hosters_with_this_product).rstrip(', ')])
+
+        # Sort and print table
+        stats.append(table.get_string(sortby='Hosters', reversesort=True))
+        stats.append('')
+
+        # Calculate percentage values
+        if self.num_hosters > 0 and self.num_hosters_checked > 0 and num_hosters_with_products > 0:
+            perc_hosters_checked = '{:.1%}'.format(self.num_hosters_checked / self.num_hosters)
+            perc_hosters_with_products = '{:.1%}'.format(num_hosters_with_products / self.num_hosters_checked)
+        else:
+            perc_hosters_checked = '0.0%'
+            perc_hosters_with_products = '0.0%'
+
+        if self.num_urls_crawled > 0 and self.num_crawl_errors > 0:
+            perc_crawl_errors = '{:.1%}'.format(self.num_crawl_errors / self.num_urls_crawled)
+        else:
+            perc_crawl_errors = '0.0%'
+
+        # Print general statistics
+        stats.append('{:>7,}'.format(len(self.products)) + ' products in ' + self.products_csv)
+        stats.append('{:>7,}'.format(len(self.keywords)) + ' search terms for those products in total')
+        stats.append('')
+        stats.append('{:>7,}'.format(self.num_hosters) + ' hosters imported from ' + self.hosters_csv)
+        stats.append('{:>7,}'.format(self.num_hosters_checked) + ' hosters checked (' + perc_hosters_checked + ')')
+        stats.append('{:>7,}'.format(num_hosters_with_products) + ' hosters mentioning at least one of the products (' + perc_hosters_with_products + ') saved to ' + self.output_csv)
+        stats.append('')
+        stats.append('{:>7,}'.format(self.num_urls_crawled) + ' URLs crawled saved to ' + self.urls_crawled_txt)
+        stats.append('{:>7,}'.format(self.num_crawl_errors) + ' URLs skipped due to crawling errors (' + perc_crawl_errors + ') saved to ' + self.urls_with_errors_txt)
+        stats.append('')
+        stats.append('{:>7,}'.format(run_counters['pages_skipped_no_html']) + ' URLs skipped in this run since they are no HTML pages')
+        stats.append('{:>7,}'.format(run_counters['pages_truncated']) + ' pages truncated in this run to ' + '{:,}'.format(self.max_page_bytes) + ' bytes')
+        stats.append('{:>7,.1f}'.format(run_counters['bytes_not_downloaded'] / 1000000) + ' MB not downloaded in this run due to skipped and truncated pages')
+
+        if run_counters['cache_hits'] > 0 or run_counters['cache_misses'] > 0:
+            perc_cache_hits = '{:.1%}'.format(run_counters['cache_hits'] / (run_counters['cache_hits'] + run_counters['cache_misses']))
+            stats.append('')
+            stats.append('{:>7,}'.format(run_counters['cache_hits']) + ' pages in this run not modified and taken from the cache (' + perc_cache_hits + ')')
+            stats.append('{:>7,}'.format(run_counters['cache_misses']) + ' pages in this run downloaded since they were not cached or modified')
+            stats.append('{:>7,.1f}'.format(run_counters['cache_bytes_saved'] / 1000000) + ' MB not downloaded in this run due to cached pages')
+
+        stats.append('')
+        stats.append('{:>7,}'.format(run_counters['requests_retried']) + ' requests retried in this run after timeouts, lost connections or throttling')
+        stats.append('{:>7,}'.format(run_counters['requests_throttled']) + ' requests retried in this run after 429 or 503 responses')
+        stats.append('{:>7,}'.format(run_counters['hosters_aborted']) + ' hosters aborted in this run after ' + str(self.max_failures) + ' consecutive connection errors saved to ' + self.hosters_aborted_csv)
+        stats.append('{:>7,.0f}'.format(run_counters['seconds_saved_by_aborting']) + ' seconds saved in this run by aborting hosters (estimated)')
+
+        if self.saturation_pages > 0:
+            stats.append('')
+            stats.append('{:>7,}'.format(run_counters['hosters_saturated']) + ' hosters stopped in this run after their last ' + str(self.saturation_pages) + ' pages added no new keywords'
+                         + (' or less than ' + str(self.saturation_yield) + ' per page' if self.saturation_yield > 0 else '') + ' saved to ' + self.hosters_saturated_csv)
+            stats.append('{:>7,}'.format(run_counters['pages_saved_by_saturation']) + ' pages not crawled in this run since the keywords of their hoster were saturated (estimated)')
+
+        if self.options.incremental:
+            stats.append('')
+            stats.append('{:>7,}'.format(run_counters['hosters_unchanged']) + ' hosters in this run with unchanged landing page and sitemap reused from ' + self.page_store_db)
+            stats.append('{:>7,}'.format(run_counters['pages_reused']) + ' pages in this run unchanged and reused without parsing and matching')
+            stats.append('{:>7,}'.format(run_counters['pages_reparsed']) + ' pages in this run parsed again but with unchanged text and keywords')
+            stats.append('{:>7,}'.format(run_counters['pages_reprocessed']) + ' pages in this run new or changed, parsed and matched')
+
+        if self.content_memo.enabled or self.dedup:
+            num_pages = max(1, run_counters['pages_processed'])
+            stats.append('')
+            stats.append('{:>7,}'.format(run_counters['pages_same_content']) + ' pages in this run with the same content as a page analyzed before, not parsed and matched again ('
+                         + '{:.1%}'.format(run_counters['pages_same_content'] / num_pages) + ')')
+            if self.dedup:
+                num_urls = max(1, run_counters['pages_processed'] + run_counters['urls_language_variants'])
+                stats.append('{:>7,}'.format(run_counters['pages_near_duplicate']) + ' pages in this run near-duplicates of another page of their hoster, their links were not queued ('
+                             + '{:.1%}'.format(run_counters['pages_near_duplicate'] / num_pages) + ')')
+                stats.append('{:>7,}'.format(run_counters['urls_language_variants']) + ' URLs not crawled in this run since they are language variants of a crawled url ('
+                             + '{:.1%}'.format(run_counters['urls_language_variants'] / num_urls) + ')')
+
+        metrics_summary = self.metrics.summary()
+        if metrics_summary:
+            stats.append('')
+            stats.append('Seconds spent in each phase of crawling a page in this run, exported to ' + self.options.metrics)
+            stats += metrics_summary
+
+        write_list_to_file(self.statistics_txt, 'w', stats)
+        with open(self.run_counters_json, 'w') as file:
+            json.dump(run_counters, file)
+
+        if to_shell:
+            for line in stats:
+                print(line)
+
+    def is_pending(self, i: int, hoster_url: str):
+        """Return True if hoster is within specified index range, is a real url and was not yet crawled or blocked"""
+        return i >= self.start_at and i <= self.stop_at \
+            and hoster_url.startswith(URL_BEGINNING) \
+            and not self.state.is_url_crawled(hoster_url) \
+            and not self.state.is_hoster_done(hoster_url) \
+            and hoster_url not in self.blocked_urls
+
+    def hosters_to_crawl(self):
+        """Yield a HosterCrawl for each hoster that is within the specified index range and was not yet crawled or blocked"""
+        for i, hoster in enumerate(self.hosters):
+            hoster_url = unifyurl(hoster[0])
+
+            if self.is_pending(i, hoster_url):
+                hoster_name = hoster[1]
+                hoster_id = hoster[2]
+                self.num_hosters_checked += 1
+
+                if self.print_hosters:
+                    print(hoster_name, '(' + hoster_url + ')')
+
+                yield HosterCrawl(self, hoster_url, hoster_name, hoster_id)
+
+    def fetch_with_retries(self, crawl: HosterCrawl, url: str):
+        """Download page and retry transient errors with exponential backoff, return Page or None if it failed or was skipped"""
+        import requests
+
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                return self.fetcher(self.session, url, HTTP_GET_TIMEOUT, self.max_page_bytes, self.cache, self.rate_controller)
+            except SkippedResponse as e:
+                crawl.add_skipped(url, e)
+                return None
+            except ThrottledResponse as e:
+                crawl.add_throttled(url, e)
+                return None
+            except requests.exceptions.RequestException as e:
+                if attempt < self.retries and is_transient(e):
+                    crawl.add_retry(url, e)
+                    time.sleep(backoff_delay(attempt))
+                    attempt += 1
+                else:
+                    crawl.add_error(url, e, time.monotonic() - start)
+                    return None
+
+    def crawl_hoster(self, crawl: HosterCrawl, url: str = None):
+        """Download the pages of a hoster website one after another starting with url if specified
+
+        Return (time, url) to continue the hoster at that time if its domain backs off longer than MAX_BLOCKING_WAIT, else None once it is done.
+        """
+        while True:
+            if url is None:
+                url = crawl.next_url()
+                if url is None:
+                    return None
+
+            # crawl other hosters meanwhile instead of sleeping until the domain may be requested again
+            delay = self.rate_controller.delay(url)
+            if delay > MAX_BLOCKING_WAIT:
+                return time.monotonic() + delay, url
+
+            # Download page HTML
+            page = self.fetch_with_retries(crawl, url)
+            if page is not None:
+                crawl.add_page(url, page)
+            url = None
+
+    def crawl_hosters(self):
+        """Crawl the pending hosters one after another, hosters whose domain backs off are continued after the next hosters"""
+        crawls = self.hosters_to_crawl()
+        waiting = [] # heap of (time, order, crawl, url) of hosters waiting for their domain
+        order = 0
+        while True:
+            crawl = None
+            if waiting and waiting[0][0] <= time.monotonic():
+                _, _, crawl, url = heapq.heappop(waiting)
+            else:
+                crawl = next(crawls, None)
+                url = None
+                if crawl is None:
+                    if not waiting:
+                        break
+                    # only hosters waiting for their domain are left
+                    time.sleep(max(0.0, waiting[0][0] - time.monotonic()))
+                    continue
+
+            resume = self.crawl_hoster(crawl, url)
+            if resume is None:
+                self.finish_hoster(crawl)
+            else:
+                heapq.heappush(waiting, (resume[0], order, crawl, resume[1]))
+                order += 1
+
+    def finish_hoster(self, crawl: HosterCrawl):
+        """Store results of a crawled hoster and append them to the output files"""
+        hoster_url = crawl.hoster_url
+        hoster_name = crawl.hoster_name
+        hoster_id = crawl.hoster_id
+        matches = crawl.matches
+
+        # Add hoster to the aggregated statistics, a restored aggregator needs all hosters to replace a hoster with the same id
+        if not self.stats_aggregator.complete and self.state.is_hoster_id_stored(hoster_id):
+            self.stats_aggregator = self.load_stats(True)
+        self.stats_aggregator.add(hoster_id, hoster_name, {j: count for j, count in enumerate(matches) if count > 0})
+        if sum(matches) > 0:
+            self.num_hosters_with_products += 1
+
+        if self.debug:
+            print('      ', 'rate of', domain(hoster_url) + ':', self.rate_controller.describe(hoster_url))
+
+        # Store hoster with all its urls in one transaction of the crawl state
+        start = time.perf_counter()
+        self.state.add_hoster(hoster_url, hoster_name, hoster_id, self.matches_to_dict(matches))
+        self.state.add_urls_crawled(crawl.urls_crawled_new)
+        self.state.add_urls_with_errors(crawl.errors_new)
+        self.state.add_url_keywords(crawl.url_keywords_new)
+        if self.output_complete:
+            # the lines of this hoster are appended by the output writer later, so a crash before can lose them
+            self.state.set_output_complete(False)
+            self.output_complete = False
+        self.save_stats(self.stats_aggregator)
+        self.state.commit()
+
+        # Store the pages of a changed hoster for the next incremental scan, only complete scans can be reused for the whole hoster
+        if self.page_store.enabled and not crawl.unchanged:
+            self.page_store.replace_hoster(hoster_url, crawl.pages_new, not crawl.breaker.tripped and not crawl.errors_new, crawl.sitemap_hash)
+
+        # Append all crawled urls to the crawler log file
+        writer = self.writer
+        writer.write_lines(self.urls_crawled_txt, crawl.urls_crawled_new)
+
+        # Append all urls with errors to the error log file
+        writer.write_lines(self.urls_with_errors_txt, crawl.urls_with_errors_new)
+
+        # Append all errors of this hoster to the error log file at once
+        if len(crawl.errors_new) > 0:
+            writer.write_lines(self.error_log, [f"Error downloading page {url} from {hoster_name}: {error}" for url, _, error in crawl.errors_new])
+
+        # Document aborted hoster with the estimated time saved by not requesting its remaining pages
+        if crawl.breaker.tripped:
+            urls_not_crawled = min(len(crawl.frontier), self.num_links_to_crawl - len(crawl.visited))
+            seconds_saved = urls_not_crawled * crawl.breaker.average_failure_seconds()
+            self.run_counters['hosters_aborted'] += 1
+            self.run_counters['seconds_saved_by_aborting'] += seconds_saved
+            writer.write_row(self.hosters_aborted_csv, [hoster_url, hoster_name, hoster_id, crawl.breaker.failures, urls_not_crawled, '{:.1f}'.format(seconds_saved)])
+
+        # Document hoster whose crawl stopped early with the number of pages it did not request
+        elif crawl.saturation.stopped:
+            urls_not_crawled = min(len(crawl.frontier), self.num_links_to_crawl - len(crawl.visited))
+            self.run_counters['hosters_saturated'] += 1
+            self.run_counters['pages_saved_by_saturation'] += urls_not_crawled
+            writer.write_row(self.hosters_saturated_csv, [hoster_url, hoster_name, hoster_id, crawl.saturation.num_pages, len(crawl.keywords_for_this_hoster), urls_not_crawled])
+
+        # if at least one keyword was found for this hoster
+        if len(crawl.keywords_for_this_hoster) > 0:
+            # Append hoster with list of keywords (in the order of the keywords list) to CSV file
+            writer.write_row(self.hosters_with_keywords_csv, [hoster_url, hoster_name, hoster_id] + [keyword for keyword in self.keywords if keyword in crawl.keywords_for_this_hoster])
+
+            # Append all crawled urls including the found keywords to a csv file
+            writer.write_lines(self.urls_crawled_with_keywords_csv, crawl.urls_crawled_new_with_keywords)
+
+            # only print statistics after each 10 crawled hosters that mentioned at least one keyword
+            if self.num_hosters_with_products >= (self.num_hosters_with_products_last + 10):
+                self.num_hosters_with_products_last = self.num_hosters_with_products
+                self.print_statistics()
+
+        self.metrics.count('hosters')
+        if self.metrics.enabled:
+            self.metrics.add(hoster_url, { 'write': time.perf_counter() - start })
+            self.metrics.finish_hoster(hoster_url)
+
+    def crawl_with_workers(self):
+        """Split all pending hosters into shards and crawl each shard in a separate worker process"""
+        pending_hosters = [hoster for i, hoster in enumerate(self.hosters) if self.is_pending(i, unifyurl(hoster[0]))]
+        num_workers = min(self.workers, len(pending_hosters))
+        arguments = self.options.arguments(skipped=('workers', 'parse_processes', 'hosters', 'start_at', 'stop_at', 'output_dir', 'metrics', 'reset', 'incremental'))
+        processes = []
+
+        for k in range(num_workers):
+            # each worker gets every n-th hoster and writes its own shard files
+            shard_dir = self.shards_dir + '/worker-{:03d}'.format(k)
+            os.makedirs(shard_dir, exist_ok=True)
+            shard_hosters_csv = shard_dir + '/hosters.csv'
+            with open(shard_hosters_csv, 'w', newline='') as csvfile:
+                csv.writer(csvfile).writerows(pending_hosters[k::num_workers])
+
+            command = [sys.executable, SCAN_HOSTERS_PY] + arguments \
+                + ['--hosters', shard_hosters_csv, '--output-dir', shard_dir, '--start-at', '0', '--stop-at', str(len(pending_hosters))] \
+                + ['--parse-processes', str(self.parse_processes)]
+            if self.options.metrics:
+                # each worker exports its own metrics file, which are merged into the metrics of this run
+                command += ['--metrics', shard_dir + '/metrics' + os.path.splitext(self.options.metrics)[1]]
+            if self.options.incremental:
+                # all workers share the page store of the output folder
+                command += ['--incremental', os.path.abspath(self.page_store_db)]
+            with open(shard_dir + '/worker.log', 'w') as log_file:
+                processes.append(subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT))
+
+        print('{:>7,}'.format(len(pending_hosters)), 'hosters split across', num_workers, 'worker processes')
+
+        for k, process in enumerate(processes):
+            if process.wait() != 0:
+                # print the end of the worker log since the shard folder is deleted after merging
+                with open(self.shards_dir + '/worker-{:03d}/worker.log'.format(k), 'r') as log_file:
+                    print('Worker', k, 'failed:', ''.join(log_file.readlines()[-10:]))
+
+        # merge shards into the output files and import the merged data set for the statistics
+        self.merge_shards()
+        self.complete_output_files()
+        self.import_existing_data()
+
+    def crawl(self):
+        """Crawl all pending hosters with the engine and the number of worker processes of the options"""
+
+        # Cache downloaded pages to revalidate them instead of downloading them again in later scans
+        if self.options.cache_dir and self.workers <= 1 and self.cache is None:
+            from http_cache import ResponseCache
+            self.cache = ResponseCache(self.options.cache_dir, int(self.options.cache_max_gb * 1000000000), self.options.cache_max_age * 86400)
+
+        # Start crawling by looping over all hosting companies and downloading each website
+        if self.workers > 1:
+            self.crawl_with_workers()
+        elif self.engine == 'async':
+            from async_engine import crawl_hosters_async
+
+            # parse and match the pages in worker processes unless the parser or the matcher were replaced or pages are profiled
+            if self.parser == self.parse_page and isinstance(self.matcher, KeywordMatcher) and not self.profiler.enabled:
+                self.analysis_pool = create_analysis_pool(self.keywords, self.parser_backend, self.priority, self.parse_processes)
+
+            # crawl many hosters at once, each with up to per_host parallel requests
+            try:
+                crawl_hosters_async(self.hosters_to_crawl(), self.finish_hoster, concurrency=self.concurrency, per_host=self.per_host,
+                                    timeout=HTTP_GET_TIMEOUT, headers=HTML_HEADER, max_page_bytes=self.max_page_bytes, cache=self.cache,
+                                    rate_controller=self.rate_controller, retries=self.retries, analysis_pool=self.analysis_pool)
+            finally:
+                if self.analysis_pool is not None:
+                    self.analysis_pool.shutdown()
+                    self.analysis_pool = None
+        else:
+            from fetcher import create_session
+
+            if self.session is None:
+                self.session = create_session(HTML_HEADER)
+            self.crawl_hosters()
+
+        # Write all queued results, so the output files are complete for the statistics and exports
+        self.writer.flush()
+        if not self.output_complete:
+            self.state.set_output_complete(True)
+            self.state.commit()
+            self.output_complete = True
+
+    def finish(self):
+        """Export metrics and profile of this run, print the statistics and write the output CSV"""
+        if self.metrics.enabled:
+            self.metrics.export()
+            self.metrics.save(self.run_metrics_json)
+
+        # Write the profile of this run and a report of the hot functions, slowest pages and allocations (the workers write their own)
+        if self.profiler.enabled and self.profiler.num_sampled > 0:
+            profile_file = self.profile_prefix + time.strftime('%Y%m%d-%H%M%S')
+            self.profiler.dump(profile_file + '.prof')
+            write_list_to_file(profile_file + '.txt', 'w', self.profiler.report())
+            print('Profile of', '{:,}'.format(self.profiler.num_sampled), 'pages saved to', profile_file + '.prof', 'and', profile_file + '.txt')
+            print()
+
+        self.print_statistics(True)
+
+        # Write the output CSV with one column per keyword from the sparse matches of the crawl state
+        self.write_output_csv()
+
+    def run(self):
+        """Load all inputs, crawl all pending hosters and write the results like scan_hosters.py"""
+        self.load()
+        self.write_keyword_lists()
+        self.open_state()
+        self.crawl()
+        self.finish()
+        self.close()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+"""
+Stats Aggregator keeps the numbers of the summary tables up to date while hosters are crawled: the number of
+hosters mentioning each keyword and each product as well as the top hosters per product. Each finished hoster
+is added once, so printing the statistics only reads one counter per keyword and product instead of checking
+the matches of all hosters again.
+
+snapshot returns the counters and the top hosters per product, which restore loads when a scan is resumed instead of
+adding all hosters again. A restored aggregator does not know the matches of the hosters added before, so it is not
+complete and hosters added before can't be replaced.
+"""
+
+import heapq
+
+class StatsAggregator:
+    """Hoster counts per keyword and product and bounded heaps of the top hosters per product"""
+
+    def __init__(self, num_keywords: int, product_keywords, limit: int = 5):
+        """product_keywords is a list with the indices of the keywords of each product"""
+        self.limit = limit
+        self.keyword_counts = [0] * num_keywords
+        self.product_counts = [0] * len(product_keywords)
+
+        # indices of the products of each keyword
+        self.keyword_products = [[] for _ in range(num_keywords)]
+        for p, keyword_indices in enumerate(product_keywords):
+            for i in keyword_indices:
+                self.keyword_products[i].append(p)
+
+        # min heaps of (mentions, -seq, hoster_id), so the weakest of the top hosters is replaced first
+        self.top_heaps = [[] for _ in product_keywords]
+
+        # hoster_id -> (seq, hoster name, matched keyword indices, dictionary of product index and mentions)
+        self.hosters = {}
+        self.num_hosters = 0
+        self.complete = True
+
+    def __len__(self):
+        return self.num_hosters
+
+    def add(self, hoster_id: str, hoster_name: str, matches: dict):
+        """Add matches of a finished hoster as dictionary of keyword index and count, replacing the matches added before for the same hoster id"""
+        previous = self.hosters.get(hoster_id)
+        seq = previous[0] if previous else self.num_hosters
+        if previous:
+            self._remove(hoster_id, previous)
+        else:
+            self.num_hosters += 1
+
+        matched_keywords = [i for i, count in matches.items() if count > 0]
+        product_mentions = {}
+        for i in matched_keywords:
+            self.keyword_counts[i] += 1
+            for p in self.keyword_products[i]:
+                product_mentions[p] = product_mentions.get(p, 0) + matches[i]
+
+        self.hosters[hoster_id] = (seq, hoster_name, matched_keywords, product_mentions)
+
+        for p, mentions in product_mentions.items():
+            self.product_counts[p] += 1
+            self._push(p, (mentions, -seq, hoster_id))
+
+    def _remove(self, hoster_id: str, previous):
+        """Remove the counts of a hoster and rebuild the top hosters of products it was part of"""
+        _, _, matched_keywords, product_mentions = previous
+        for i in matched_keywords:
+            self.keyword_counts[i] -= 1
+        del self.hosters[hoster_id]
+
+        for p in product_mentions:
+            self.product_counts[p] -= 1
+            if any(entry[2] == hoster_id for entry in self.top_heaps[p]):
+                self._rebuild(p)
+
+    def _push(self, p: int, entry):
+        heap = self.top_heaps[p]
+        if len(heap) < self.limit:
+            heapq.heappush(heap, entry)
+        elif heap and entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def _rebuild(self, p: int):
+        """Rebuild the top hosters of a product from all hosters, only needed if a top hoster was replaced"""
+        self.top_heaps[p] = []
+        for hoster_id, (seq, _, _, product_mentions) in self.hosters.items():
+            if p in product_mentions:
+                self._push(p, (product_mentions[p], -seq, hoster_id))
+
+    def top_hosters(self, p: int):
+        """Return list of (hoster_id, hoster name) of the hosters mentioning a product most often"""
+        return [(hoster_id, self.hosters[hoster_id][1]) for _, _, hoster_id in sorted(self.top_heaps[p], reverse=True)]
+
+    def snapshot(self):
+        """Return dictionary with the counters, the top hosters per product and their names that can be stored as JSON"""
+        names = {hoster_id: self.hosters[hoster_id][1] for heap in self.top_heaps for _, _, hoster_id in heap}
+        return {'num_hosters': self.num_hosters, 'keyword_counts': self.keyword_counts, 'product_counts': self.product_counts,
+                'top_heaps': self.top_heaps, 'names': names}
+
+    def restore(self, snapshot: dict):
+        """Replace all counters and top hosters with a snapshot of an aggregator with the same keywords and products"""
+        self.num_hosters = snapshot['num_hosters']
+        self.keyword_counts = snapshot['keyword_counts']
+        self.product_counts = snapshot['product_counts']
+        self.top_heaps = [[tuple(entry) for entry in heap] for heap in snapshot['top_heaps']]
+
+        # the matches of the restored top hosters are not known
+        names = snapshot['names']
+        self.hosters = {hoster_id: (-seq, names[hoster_id], None, None) for heap in self.top_heaps for _, seq, hoster_id in heap}
+        self.complete = False
@@ -0,0 +1,67 @@
+import socket
+from circuit_breaker import CircuitBreaker, is_transient, is_unreachable, backoff_delay, RETRY_MAX_DELAY
+from rate_control import RateController, MIN_TIMEOUT, MIN_TIMEOUT_SAMPLES
+
+def test_breaker_trips_once_after_consecutive_failures():
+    breaker = CircuitBreaker(3)
+    assert not breaker.record_failure(TimeoutError(), 30)
+    assert not breaker.record_failure(TimeoutError(), 30)
+    assert breaker.record_failure(TimeoutError(), 30)
+    assert breaker.tripped
+
+    # requests in flight that fail afterwards don't trip it again
+    assert not breaker.record_failure(TimeoutError(), 30)
+    assert breaker.tripped
+    assert breaker.failures == 4
+    assert breaker.average_failure_seconds() == 30
+
+def test_success_resets_consecutive_failures():
+    breaker = CircuitBreaker(2)
+    breaker.record_failure(ConnectionResetError())
+    breaker.record_success()
+    assert not breaker.record_failure(ConnectionResetError())
+    assert not breaker.tripped
+
+def test_other_errors_do_not_count():
+    breaker = CircuitBreaker(1)
+    assert not breaker.record_failure(ValueError('no html'))
+    assert breaker.failures == 0
+    assert not breaker.tripped
+
+def test_disabled_breaker_never_trips():
+    breaker = CircuitBreaker(0)
+    for _ in range(10):
+        assert not breaker.record_failure(TimeoutError())
+    assert not breaker.tripped
+
+def test_unreachable_errors_are_not_transient():
+    try:
+        try:
+            raise socket.gaierror(-2, 'Name or service not known')
+        except socket.gaierror as cause:
+            raise ConnectionError('Failed to resolve') from cause
+    except ConnectionError as e:
+        error = e
+    assert is_unreachable(error)
+    assert not is_transient(error)
+    assert not is_transient(ConnectionRefusedError())
+    assert is_transient(TimeoutError())
+    assert is_transient(ConnectionResetError())
+    assert not is_transient(ValueError())
+
+def test_backoff_delay_is_bounded():
+    assert 0.25 <= backoff_delay(0) <= 0.5
+    assert backoff_delay(20) <= RETRY_MAX_DELAY
+
+def test_timeout_adapts_to_latency_percentile():
+    rates = RateController()
+    assert rates.timeout(30) == 30
+    for _ in range(MIN_TIMEOUT_SAMPLES):
+        rates.record('https://example.com', 200, 2.0)
+    assert rates.timeout(30) == 8.0
+    assert rates.timeout(6) == 6
+
+    rates = RateController()
+    for _ in range(MIN_TIMEOUT_SAMPLES):
+        rates.record('https://example.com', 200, 0.01)
+    assert rates.timeout(30) == MIN_TIMEOUT
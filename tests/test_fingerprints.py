@@ -0,0 +1,47 @@
+import os
+import pytest
+from fingerprints import FingerprintSet, BloomFilter, fingerprint, MIN_SLOTS
+
+URLS = ['https://hoster{}.com/page/{}'.format(i % 97, i) for i in range(5000)]
+
+def test_fingerprint_is_stable_64_bit():
+    assert fingerprint('https://example.com') == fingerprint('https://example.com')
+    assert fingerprint('https://example.com') != fingerprint('https://example.com/')
+    assert 0 <= fingerprint('https://example.com') < 2 ** 64
+
+@pytest.mark.parametrize('memory_mapped', [False, True])
+def test_fingerprint_set_behaves_like_set(tmp_path, memory_mapped):
+    urls = FingerprintSet(filename=str(tmp_path / 'urls.fp') if memory_mapped else None)
+    added = [urls.add(url) for url in URLS]
+    assert all(added)
+    assert not urls.add(URLS[0])
+    assert len(urls) == len(URLS)
+    assert all(url in urls for url in URLS)
+    assert 'https://hoster1.com/page/5000' not in urls
+
+    # the table grew and keeps at most two thirds of its slots filled
+    assert urls.nbytes >= 8 * len(URLS) * 3 // 2
+    assert urls.nbytes > 8 * MIN_SLOTS
+
+    urls.close()
+    assert len(urls) == 0
+    assert URLS[0] not in urls
+    assert not os.listdir(tmp_path)
+
+def test_fingerprint_set_from_urls():
+    urls = FingerprintSet(URLS[:10] + URLS[:10])
+    assert len(urls) == 10
+    assert URLS[9] in urls and URLS[10] not in urls
+
+def test_bloom_filter_has_no_false_negatives():
+    urls = BloomFilter(len(URLS), urls=URLS)
+    assert all(url in urls for url in URLS)
+    assert not urls.add(URLS[0])
+
+    # false positives stay near the error rate
+    others = ['https://other{}.net/'.format(i) for i in range(10000)]
+    assert sum(url in urls for url in others) < 50
+
+    urls.close()
+    assert len(urls) == 0
+    assert URLS[0] not in urls
@@ -0,0 +1,44 @@
+import pytest
+from keyword_matcher import KeywordMatcher, ahocorasick
+
+BACKENDS = ['re'] + (['ahocorasick'] if ahocorasick is not None else [])
+
+def substring_match(keywords, text):
+    """Return indices of the keywords found by the per-keyword substring loop the matcher replaces"""
+    return [i for i, keyword in enumerate(keywords) if keyword and keyword.lower() in text.lower()]
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_match_is_case_insensitive(backend):
+    matcher = KeywordMatcher(['Plesk', 'cPanel', 'WordPress'], backend)
+    assert matcher.match('We offer CPANEL and wordpress hosting') == [1, 2]
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_match_finds_overlapping_and_prefix_keywords(backend):
+    keywords = ['Word', 'WordPress', 'Press', 'ordP']
+    matcher = KeywordMatcher(keywords, backend)
+    assert matcher.match('wordpress') == [0, 1, 2, 3]
+    assert matcher.match('a word') == [0]
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_match_keeps_keywords_with_same_spelling(backend):
+    matcher = KeywordMatcher(['Joomla', 'joomla', ''], backend)
+    assert matcher.match('Joomla!') == [0, 1]
+    assert matcher.match('') == []
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_match_equals_substring_loop(backend):
+    keywords = ['SQL', 'MySQL', 'PostgreSQL', 'Postgres', 'Node.js', 'node', 'C++', 'a+b', 'Ubuntu 22.04', 'x']
+    text = 'Managed MySQL and postgresql servers with node.js, c++ builds on ubuntu 22.04 (a+b)'
+    assert KeywordMatcher(keywords, backend).match(text) == substring_match(keywords, text)
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_count_counts_each_occurrence(backend):
+    matcher = KeywordMatcher(['ab', 'b'], backend)
+    assert matcher.count('abab b') == {0: 2, 1: 3}
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        KeywordMatcher(['Plesk'], 'grep')
+
+def test_no_keywords_match_nothing():
+    assert KeywordMatcher([]).match('anything') == []
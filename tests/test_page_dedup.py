@@ -0,0 +1,51 @@
+import random
+from page_dedup import language_variant_key, simhash, hamming_distance, ContentMemo, AnalyzedContent, NEAR_DUPLICATE_DISTANCE
+
+WORDS = ('managed wordpress hosting plan with daily backups free ssl support cloud server vps dedicated email domain '
+         'storage nvme cores ipv6 frankfurt london migration uptime guarantee reseller panel plesk cpanel php node '
+         'python database mysql firewall ddos protection cdn website builder').split()
+
+# texts with thousands of different word 3-grams, so the few 3-grams of a new headline hardly ever flip a bit of the simhash
+def random_text(seed: int, num_words: int = 5000):
+    rnd = random.Random(seed)
+    return ' '.join(rnd.choice(WORDS) for _ in range(num_words))
+
+TEXT = random_text(1)
+
+def test_language_variants_share_a_key():
+    key = language_variant_key('https://example.com/hosting/vps')
+    assert key == 'https://example.com/hosting/vps'
+    assert language_variant_key('https://example.com/de/hosting/vps') == key
+    assert language_variant_key('https://example.com/en-us/hosting/vps') == key
+    assert language_variant_key('https://example.com/pt_br/hosting/vps') == key
+    assert language_variant_key('https://example.com/de') == 'https://example.com'
+
+def test_other_first_segments_are_kept():
+    for url in ('https://example.com/go/hosting', 'https://example.com/xx/hosting', 'https://example.com/vps/de', 'https://example.com'):
+        assert language_variant_key(url) == url
+
+def test_simhash_of_near_duplicates_is_close():
+    page = simhash(TEXT)
+    assert simhash(TEXT.upper()) == page
+    assert hamming_distance(simhash('Our new headline ' + TEXT), page) <= NEAR_DUPLICATE_DISTANCE
+    other = simhash(random_text(2))
+    assert hamming_distance(other, page) > NEAR_DUPLICATE_DISTANCE
+
+def test_simhash_of_short_text_is_none():
+    assert simhash('Only a few words here') is None
+
+def test_content_memo_forgets_least_recently_used():
+    memo = ContentMemo(2)
+    for key in (b'a', b'b'):
+        memo.put(key, AnalyzedContent(None, None, [1], ['https://example.com/' + key.decode(), 'https://example.com'], None))
+    assert memo.get(b'a').links == ['https://example.com/a', 'https://example.com']
+    memo.put(b'c', AnalyzedContent(None, None, [], [], None))
+    assert memo.get(b'b') is None
+    assert memo.get(b'a').keywords == [1]
+    assert memo.get(b'c').links == []
+    assert len(memo) == 2
+
+def test_disabled_content_memo_remembers_nothing():
+    memo = ContentMemo(0)
+    memo.put(b'a', AnalyzedContent(None, None, [], [], None))
+    assert memo.get(b'a') is None
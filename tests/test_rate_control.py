@@ -0,0 +1,96 @@
+import pytest
+from rate_control import RateController, parse_crawl_delay, parse_sitemaps, retry_after_seconds, MIN_THROTTLED_INTERVAL, RECOVERY_RESPONSES
+
+URL = 'https://example.com/broken'
+
+def test_parse_crawl_delay_of_matching_group():
+    robots_txt = 'User-agent: Googlebot\nCrawl-delay: 9\n\nUser-agent: *\nDisallow: /admin\nCrawl-delay: 0.5 # seconds\n'
+    assert parse_crawl_delay(robots_txt) == 0.5
+    assert parse_crawl_delay(robots_txt, 'googlebot') == 9
+    assert parse_crawl_delay('User-agent: *\nCrawl-delay: soon\n') == 0.0
+
+def test_parse_sitemaps():
+    robots_txt = 'Sitemap: https://example.com/sitemap.xml\nsitemap: /relative.xml\nUser-agent: *\nSITEMAP: http://example.com/b.xml'
+    assert parse_sitemaps(robots_txt) == ['https://example.com/sitemap.xml', 'http://example.com/b.xml']
+
+def test_retry_after_seconds():
+    assert retry_after_seconds({ 'Retry-After': '120' }) == 120
+    assert retry_after_seconds({ 'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT' }) == 0
+    assert retry_after_seconds({ 'Retry-After': 'later' }) is None
+    assert retry_after_seconds({}) is None
+
+def test_throttling_halves_limit_and_doubles_interval():
+    rates = RateController(8)
+    # the limit grows by one per round of healthy responses
+    for _ in range(50):
+        rates.record('https://example.com/page', 200, 0.01)
+    assert rates.concurrency(URL) == 8
+
+    rates.record('https://example.com/a', 503, 0.01)
+    assert rates.concurrency(URL) == 4
+    assert rates.host(URL).interval == MIN_THROTTLED_INTERVAL
+    rates.record('https://example.com/b', 429, 0.01)
+    assert rates.concurrency(URL) == 2
+    assert rates.host(URL).interval == 2 * MIN_THROTTLED_INTERVAL
+
+def test_repeated_503_of_one_url_slows_domain_down_once():
+    rates = RateController(4)
+    for _ in range(10):
+        rates.record(URL, 503, 0.01)
+    assert rates.host(URL).throttled == 1
+    assert rates.host(URL).interval == MIN_THROTTLED_INTERVAL
+    assert not rates.is_healthy(URL)
+
+    # the url slows the domain down again once it responded healthy in between
+    rates.record(URL, 200, 0.01)
+    rates.record(URL, 503, 0.01)
+    assert rates.host(URL).throttled == 2
+
+def test_domain_is_healthy_while_other_pages_respond():
+    rates = RateController(4)
+    rates.record(URL, 503, 0.01)
+    rates.record('https://example.com/page', 200, 0.01)
+    rates.record(URL, 503, 0.01)
+    assert rates.is_healthy(URL)
+    assert rates.host(URL).throttled == 1
+
+def test_interval_recovers_after_healthy_responses():
+    rates = RateController(4, max_delay=30)
+    for i in range(5):
+        rates.record('https://example.com/{}'.format(i), 503, 0.01)
+    assert rates.host(URL).interval == 16 * MIN_THROTTLED_INTERVAL
+
+    for _ in range(RECOVERY_RESPONSES - 1):
+        rates.record('https://example.com/page', 200, 0.01)
+    assert rates.host(URL).interval > 0
+    rates.record('https://example.com/page', 200, 0.01)
+    assert rates.host(URL).interval == 0
+
+def test_interval_recovers_to_crawl_delay():
+    rates = RateController()
+    rates.set_crawl_delay(URL, 2)
+    rates.record(URL, 503, 0.01)
+    assert rates.host(URL).interval == 2 * 2
+    for _ in range(RECOVERY_RESPONSES):
+        rates.record('https://example.com/page', 200, 0.01)
+    assert rates.host(URL).interval == 2
+
+def test_retry_after_delays_next_request():
+    rates = RateController(max_delay=10)
+    rates.record(URL, 503, 0.01, retry_after=3600)
+    assert rates.delay('https://example.com/other') == pytest.approx(10, abs=0.5)
+    assert rates.reserve('https://example.com/other') == pytest.approx(10, abs=0.5)
+    assert rates.delay('https://other.com') == 0
+
+def test_reserve_spaces_requests_by_interval():
+    rates = RateController()
+    rates.set_crawl_delay(URL, 5)
+    assert rates.reserve(URL) == 0
+    assert rates.reserve(URL) == pytest.approx(5, abs=0.5)
+    assert rates.delay(URL) == pytest.approx(10, abs=0.5)
+
+def test_needs_robots_once_per_domain():
+    rates = RateController()
+    assert rates.needs_robots('https://example.com/a')
+    assert not rates.needs_robots('https://Example.com/b')
+    assert rates.needs_robots('https://other.com')
@@ -0,0 +1,80 @@
+import os
+import time
+import pytest
+from fetcher import Page, ThrottledResponse
+from scanner import Scanner, ScanOptions
+
+def page(*links):
+    return '<html><body>Plesk hosting ' + ''.join('<a href="{0}">{0}</a>'.format(link) for link in links) + '</body></html>'
+
+class FakeWeb:
+    """Fetcher serving pages from a dictionary, urls in throttled respond with 503 the specified number of times"""
+
+    def __init__(self, pages, throttled, retry_after=None):
+        self.pages = pages
+        self.throttled = dict(throttled)
+        self.retry_after = retry_after
+        self.requested = []
+
+    def __call__(self, session, url, timeout, max_page_bytes, cache=None, rate_controller=None):
+        self.requested.append(url)
+        if self.throttled.get(url, 0) != 0:
+            self.throttled[url] -= 1
+            rate_controller.record(url, 503, 0.01, self.retry_after)
+            raise ThrottledResponse(url, 503, self.retry_after)
+        rate_controller.record(url, 200, 0.01)
+        return Page(url, 200, { 'Content-Type': 'text/html' }, self.pages[url].encode('utf-8'), False, False, {})
+
+@pytest.fixture
+def scan(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'products.csv').write_text('Plesk\ncPanel\n')
+
+    def scan(web, hosters):
+        (tmp_path / 'hosters.csv').write_text(''.join('{0},Hoster {0},{1}\n'.format(url, i) for i, url in enumerate(hosters)))
+        scanner = Scanner(ScanOptions(hosters='hosters.csv', products='products.csv', output_dir='output', reset=True, max_depth=10), fetcher=web)
+        scanner.load()
+        scanner.open_state()
+        scanner.crawl()
+        scanner.close()
+        errors = []
+        if os.path.exists('output/urls_with_errors.txt'):
+            with open('output/urls_with_errors.txt') as file:
+                errors = file.read().split()
+        return scanner, errors
+    return scan
+
+def test_url_that_keeps_responding_503_is_an_error(scan):
+    web = FakeWeb({
+        'https://a.test': page('https://a.test/broken', 'https://a.test/vps', 'https://a.test/cloud'),
+        'https://a.test/vps': page(),
+        'https://a.test/cloud': page(),
+    }, { 'https://a.test/broken': -1 })
+    scanner, errors = scan(web, ['https://a.test'])
+
+    # the broken url is retried once after the other pages and slowed its domain down only once
+    assert web.requested == ['https://a.test', 'https://a.test/broken', 'https://a.test/vps', 'https://a.test/cloud', 'https://a.test/broken']
+    assert errors == ['https://a.test/broken']
+    assert scanner.rate_controller.host('https://a.test').throttled == 1
+    assert scanner.run_counters['requests_throttled'] == 1
+
+def test_throttled_url_is_retried_until_it_responds(scan):
+    web = FakeWeb({ 'https://a.test': page('https://a.test/vps'), 'https://a.test/vps': page() }, { 'https://a.test/vps': 2 })
+    _, errors = scan(web, ['https://a.test'])
+    assert web.requested == ['https://a.test', 'https://a.test/vps', 'https://a.test/vps', 'https://a.test/vps']
+    assert errors == []
+
+def test_sync_engine_crawls_other_hosters_during_back_off(scan):
+    web = FakeWeb({
+        'https://a.test': page('https://a.test/vps'),
+        'https://a.test/vps': page(),
+        'https://b.test': page('https://b.test/vps'),
+        'https://b.test/vps': page(),
+    }, { 'https://a.test': 1 }, retry_after=1.5)
+    start = time.monotonic()
+    _, errors = scan(web, ['https://a.test', 'https://b.test'])
+
+    # a.test waits for Retry-After while b.test is crawled
+    assert web.requested == ['https://a.test', 'https://b.test', 'https://b.test/vps', 'https://a.test', 'https://a.test/vps']
+    assert errors == []
+    assert time.monotonic() - start >= 1.0
@@ -0,0 +1,61 @@
+from stats_aggregator import StatsAggregator
+
+# keywords 0 and 1 belong to product 0, keyword 2 to product 1
+PRODUCT_KEYWORDS = [[0, 1], [2]]
+
+def aggregator(limit: int = 5):
+    return StatsAggregator(3, PRODUCT_KEYWORDS, limit)
+
+def test_counts_hosters_per_keyword_and_product():
+    stats = aggregator()
+    stats.add('h1', 'Hoster 1', {0: 2, 1: 1})
+    stats.add('h2', 'Hoster 2', {1: 1, 2: 4})
+    stats.add('h3', 'Hoster 3', {})
+    assert len(stats) == 3
+    assert stats.keyword_counts == [1, 2, 1]
+    assert stats.product_counts == [2, 1]
+    assert stats.top_hosters(0) == [('h1', 'Hoster 1'), ('h2', 'Hoster 2')]
+    assert stats.top_hosters(1) == [('h2', 'Hoster 2')]
+
+def test_top_hosters_are_bounded_and_ties_keep_the_first():
+    stats = aggregator(limit=2)
+    stats.add('h1', 'Hoster 1', {0: 1})
+    stats.add('h2', 'Hoster 2', {0: 3})
+    stats.add('h3', 'Hoster 3', {0: 1})
+    stats.add('h4', 'Hoster 4', {0: 2})
+    assert stats.top_hosters(0) == [('h2', 'Hoster 2'), ('h4', 'Hoster 4')]
+    assert stats.product_counts == [4, 0]
+
+def test_adding_a_hoster_again_replaces_its_matches():
+    stats = aggregator(limit=2)
+    stats.add('h1', 'Hoster 1', {0: 5})
+    stats.add('h2', 'Hoster 2', {0: 3})
+    stats.add('h3', 'Hoster 3', {0: 1})
+    stats.add('h1', 'Hoster 1', {2: 1})
+    assert len(stats) == 3
+    assert stats.keyword_counts == [2, 0, 1]
+    assert stats.product_counts == [2, 1]
+    assert stats.top_hosters(0) == [('h2', 'Hoster 2'), ('h3', 'Hoster 3')]
+    assert stats.top_hosters(1) == [('h1', 'Hoster 1')]
+
+def test_restored_snapshot_continues_like_the_full_aggregator():
+    import json
+
+    full = aggregator(limit=2)
+    full.add('h1', 'Hoster 1', {0: 2})
+    full.add('h2', 'Hoster 2', {0: 4, 2: 1})
+    full.add('h3', 'Hoster 3', {1: 1})
+
+    # the snapshot is stored as JSON in the crawl state
+    restored = aggregator(limit=2)
+    restored.restore(json.loads(json.dumps(full.snapshot())))
+    assert not restored.complete
+    assert full.complete
+
+    for stats in (full, restored):
+        stats.add('h4', 'Hoster 4', {0: 3, 2: 2})
+    assert len(restored) == len(full) == 4
+    assert restored.keyword_counts == full.keyword_counts
+    assert restored.product_counts == full.product_counts
+    for p in range(len(PRODUCT_KEYWORDS)):
+        assert restored.top_hosters(p) == full.top_hosters(p)
@@ -0,0 +1,56 @@
+import pytest
+from functions import UrlPolicy, unifyurl, BLOCKED_URL_ENDINGS, BLOCKED_URL_SUBSTRINGS
+
+SCOPES = ('https://example.com', 'https://www.example.com')
+
+def is_blocked_with_loop(url):
+    """Return the result of the former endswith and substring checks of each link"""
+    return url.endswith(BLOCKED_URL_ENDINGS) or any(substring in url for substring in BLOCKED_URL_SUBSTRINGS)
+
+@pytest.mark.parametrize('url', [
+    'https://example.com/contact', 'https://example.com/de/impressum', 'https://example.com/files/setup.exe',
+    'https://example.com/image.JPG'.lower(), 'https://example.com/blog/post', 'https://example.com/wp-admin/edit.php',
+    'https://example.com/share-on-facebook', 'https://example.com/manual.doc/about',
+])
+def test_blocked_urls(url):
+    assert UrlPolicy().is_blocked(url)
+    assert is_blocked_with_loop(url)
+
+@pytest.mark.parametrize('url', [
+    'https://example.com', 'https://example.com/hosting', 'https://example.com/contact/form',
+    'https://example.com/products.html', 'https://example.com/pdf-guide', 'https://example.com/team-plans',
+    'https://example.com/page.doc',
+])
+def test_allowed_urls(url):
+    assert not UrlPolicy().is_blocked(url)
+    assert not is_blocked_with_loop(url)
+
+def test_custom_endings_without_substrings():
+    policy = UrlPolicy(('/checkout', '.svg', '/shop/cart'), ())
+    assert policy.is_blocked('https://example.com/checkout')
+    assert policy.is_blocked('https://example.com/logo.svg')
+    assert policy.is_blocked('https://example.com/shop/cart')
+    assert not policy.is_blocked('https://example.com/blog')
+
+def test_crawlable_links_are_unified_in_page_order():
+    # only identical links are skipped, the crawl loop skips urls that are unified to a visited url
+    links = ['https://Example.com/Hosting/?page=2', 'https://example.com/hosting#plans', 'https://example.com/contact',
+             'mailto:info@example.com', 'https://other.com/hosting', 'https://www.example.com/vps/',
+             'https://Example.com/Hosting/?page=2']
+    assert UrlPolicy().crawlable_links(links, SCOPES) == ['https://example.com/hosting', 'https://example.com/hosting', 'https://www.example.com/vps']
+
+def test_crawlable_links_equal_unifyurl_and_loop():
+    links = ['https://example.com/a/', 'https://example.com/b.pdf', 'http://example.com/c', 'https://example.com/twitter-feed']
+    expected = []
+    for link in links:
+        url = unifyurl(link)
+        if url.startswith(SCOPES) and not is_blocked_with_loop(url) and url not in expected:
+            expected.append(url)
+    assert UrlPolicy().crawlable_links(links, SCOPES) == expected
+
+def test_classify_links_keeps_parameters_and_splits_external():
+    links = ['https://example.com/list?page=2', 'https://example.com/list?page=2/', 'https://Hoster.COM/plans/',
+             'http://hoster2.net', 'https://example.com/contact', 'ftp://example.com/file', 'https://linkedin.com/company/x']
+    internal, external = UrlPolicy().classify_links(links, SCOPES)
+    assert internal == ['https://example.com/list?page=2']
+    assert external == [('https://hoster.com', 'hoster.com'), ('http://hoster2.net', 'hoster2.net')]